@@ -1,1161 +1,320 @@
 # app.py
 from flask import Flask, jsonify, request
 import json
-import numpy as np
 import networkx as nx
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
-from torch_geometric.data import Data, HeteroData
-from torch_geometric.nn import GATConv
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import GridSearchCV
-from sklearn.base import BaseEstimator, RegressorMixin
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
-from collections import defaultdict
-import shap
-import matplotlib
-matplotlib.use('Agg')  # 使用非GUI后端
-import matplotlib.pyplot as plt
+import hashlib
+import functools
+import gzip
+import io
 import os
-from flask import Flask, jsonify, request
 from flask_cors import CORS
-import re
 import logging
+from graph_indexes import GraphIndexes
+from csr_graph import CSRGraph
+from ego_expansion import DIRECTIONS, RANKINGS, expand_ego
+from name_index import NameIndex
+from graph_binary import MIMETYPE as GRAPH_BINARY_MIMETYPE, encode_graph_binary
+from graph_json import iter_node_link_json
+from graph_snapshot import build_graph_from_processed_data, default_snapshot_path, open_snapshot, source_version
+from graph_ingest import IngestError, ReadWriteLock, apply_batch, next_graph_version
+from response_cache import LRUResponseCache
+from year_shards import YearShards
+from model_registry import graph_content_hash
+from prediction_jobs import JobSubmitError, PredictionJobManager, STATUS_DONE, STATUS_FAILED
 
 app = Flask(__name__)
 CORS(app)  # 允许所有跨域请求
 logging.basicConfig(level=logging.INFO) # 设置日志级别
 
-# 当前日期设定
-CURRENT_YEAR = 2040
+# 数据文件路径相对于本模块所在目录解析（与 wsgi.py 的 GRAPH_DATA_PATH 一致），不依赖进程的工作目录
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 查询接口使用的图引擎: 'networkx'（MultiDiGraph，默认）或 'csr'（只读的 NumPy CSR 图，内存占用更小）
+GRAPH_ENGINE = os.environ.get('GRAPH_ENGINE', 'networkx')
+
+# 是否允许 /api/graph/ingest 增量更新（多进程部署时由 gunicorn.conf.py 默认关闭）
+GRAPH_INGEST_ENABLED = os.environ.get('GRAPH_INGEST', '1') == '1'
+
+# 运行模式: 'full'（默认，/predict 第一次使用时才导入预测流水线）或 'query'（只提供图查询接口，
+# 从不导入 torch / torch_geometric / scikit-learn / shap / matplotlib，预测接口返回 503）
+APP_MODE = os.environ.get('APP_MODE', 'full')
+
+# --- 预测流水线（延迟导入） ---
+
+def prediction_module():
+    """返回预测流水线模块 (prediction.py)，第一次调用时才导入"""
+    import prediction
+    return prediction
+
+def requires_prediction(view):
+    """路由装饰器：query 模式下预测接口不可用"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if APP_MODE == 'query':
+            return jsonify({'error': 'Prediction is disabled in query-only mode (APP_MODE=query).'}), 503
+        return view(*args, **kwargs)
+    return wrapper
+
+# 图引用解析：/predict 可以只传 graphRef，由服务端直接使用已加载的数据
+# 除 'full'（即 FULL_NETWORKX_GRAPH）外，可引用的服务端数据集文件（build_knowledge_graph 格式）
+PREDICTION_DATASET_FILES = {
+    'oceanus': os.path.join(BASE_DIR, 'public', 'Oceanus.json')
+}
+_DATASET_FILE_CACHE = {}  # 数据集名 -> (mtime, 版本哈希, 图数据)
+RESOLVED_GRAPH_CACHE_SIZE = 8
+_RESOLVED_GRAPH_CACHE = LRUResponseCache(max_entries=RESOLVED_GRAPH_CACHE_SIZE)  # 引用键 -> 图数据（仅 'full' 数据集，线程安全的 LRU）
+
+class GraphReferenceError(Exception):
+    """graphRef 无法解析时抛出，status 为对应的 HTTP 状态码"""
+    def __init__(self, message, status=400, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+def _load_dataset_file(dataset):
+    filename = PREDICTION_DATASET_FILES[dataset]
+    mtime = os.path.getmtime(filename)
+    cached = _DATASET_FILE_CACHE.get(dataset)
+    if cached is None or cached[0] != mtime:
+        with open(filename, 'rb') as f:
+            raw = f.read()
+        cached = (mtime, hashlib.sha256(raw).hexdigest()[:16], json.loads(raw))
+        _DATASET_FILE_CACHE[dataset] = cached
+    return cached[1], cached[2]
+
+def graph_to_prediction_data(graph):
+    """把服务端的 NetworkX 图转换为 build_knowledge_graph 所需的 nodes/edges 格式"""
+    return {
+        'nodes': [dict(d, id=n) for n, d in graph.nodes(data=True)],
+        'edges': [
+            {'source': u, 'target': v, 'Edge Type': d.get('Edge Type')}
+            for u, v, d in graph.edges(data=True)
+        ]
+    }
 
-# 1. 数据加载与预处理（过滤未来数据）
-def load_data(filename):
-    with open(filename, 'r') as f:
-        data = json.load(f)
-    
-    # 过滤未来数据
-    for node in data['nodes']:
-        if 'release_date' in node and node['release_date'].isdigit():
-            release_year = int(node['release_date'])
-            if release_year > CURRENT_YEAR:
-                # 清空未来数据
-                node['release_date'] = ""
-                node['notable'] = False
-    
-    return data
+def resolve_graph_reference(graph_ref):
+    """
+    解析 graphRef = {"dataset": "full" | "oceanus", "version": 可选的版本哈希, "filters": 可选的筛选条件}。
+    返回 (图数据, 图标识哈希)。filters 与 /api/graph/layout 的 filters 格式相同，仅用于 'full' 数据集。
+    """
+    if not isinstance(graph_ref, dict):
+        raise GraphReferenceError("graphRef must be an object")
+    dataset = graph_ref.get('dataset', 'full')
+    expected_version = graph_ref.get('version')
+    filters = graph_ref.get('filters') or {}
+
+    if dataset == 'full':
+        if FULL_NETWORKX_GRAPH is None:
+            raise GraphReferenceError("Graph data is not loaded yet.", status=503)
+        version = GRAPH_VERSION
+    elif dataset in PREDICTION_DATASET_FILES:
+        if filters:
+            raise GraphReferenceError(f"Dataset '{dataset}' does not support filters")
+        try:
+            version, graph_data = _load_dataset_file(dataset)
+        except (OSError, ValueError) as e:
+            raise GraphReferenceError(f"Dataset '{dataset}' is unavailable: {e}", status=503)
+    else:
+        raise GraphReferenceError(f"Unknown dataset: {dataset}")
 
-# 2. 构建知识图谱
-def build_knowledge_graph(data):
-    G = nx.MultiDiGraph()
-    node_mapping = {}
-    label_mapping = {}
-    
-    for node in data['nodes']:
-        node_id = node['id']
-        node_mapping[node_id] = node
-        node_type = node['Node Type']
-        G.add_node(node_id, **node)
-        
-        if node_type == 'RecordLabel':
-            label_mapping[node_id] = node['name']
-    
-    for edge in data['edges']:
-        source = edge['source']
-        target = edge['target']
-        edge_type = edge['Edge Type']
-        
-        if source in node_mapping and target in node_mapping:
-            G.add_edge(source, target, relationship=edge_type)
-    
-    return G, node_mapping, label_mapping
-
-# 3. 增强特征工程 - 使用动态计算的唱片公司权重
-def extract_features(G, node_mapping, label_mapping):
-    # 动态计算唱片公司权重
-    label_stats = defaultdict(lambda: {
-        'artist_count': 0,
-        'total_works': 0,
-        'notable_works': 0,
-        'recent_works': 0
-    })
-    
-    # 构建作品到唱片公司的映射
-    work_to_labels = defaultdict(set)
-    for src, tgt, data in G.edges(data=True):
-        edge_type = data.get('relationship', '')
-        # 处理唱片公司关联边
-        if edge_type in ['RecordedBy', 'DistributedBy']:
-            work_id = src
-            label_id = tgt
-            if (G.nodes.get(work_id, {}).get('Node Type') in ['Song', 'Album'] and 
-                G.nodes.get(label_id, {}).get('Node Type') == 'RecordLabel'):
-                work_to_labels[work_id].add(label_id)
-    
-    # 构建艺术家到唱片公司的映射 - 通过作品间接关联
-    artist_to_labels = defaultdict(set)
-    
-    # 第一轮：通过作品统计唱片公司数据
-    for node_id, data in G.nodes(data=True):
-        node_type = data.get('Node Type', '')
-        
-        # 只处理作品节点
-        if node_type not in ['Song', 'Album']:
-            continue
-        
-        # 过滤未来数据
-        release_date = data.get('release_date', '')
-        if release_date and release_date.isdigit():
-            release_year = int(release_date)
-            if release_year > CURRENT_YEAR:  # 跳过未来数据
-                continue
-        else:
-            release_year = 0
-        
-        notable = data.get('notable', False)
-        is_recent = CURRENT_YEAR - 3 < release_year <= CURRENT_YEAR
-        
-        # 获取作品关联的唱片公司
-        label_ids = work_to_labels.get(node_id, set())
-        
-        # 更新唱片公司统计
-        for label_id in label_ids:
-            label_stats[label_id]['total_works'] += 1
-            if notable:
-                label_stats[label_id]['notable_works'] += 1
-            if is_recent:
-                label_stats[label_id]['recent_works'] += 1
-        
-        # 获取作品关联的艺术家
-        artists = set()
-        for src, _, edge_data in G.in_edges(node_id, data=True):
-            if edge_data['relationship'] in ['PerformerOf', 'ComposerOf', 'LyricistOf']:
-                artists.add(src)
-        
-        # 将艺术家与唱片公司关联
-        for artist_id in artists:
-            artist_to_labels[artist_id].update(label_ids)
-    
-    # 第二轮：通过艺术家统计唱片公司数据
-    for artist_id, label_ids in artist_to_labels.items():
-        for label_id in label_ids:
-            label_stats[label_id]['artist_count'] += 1
-    
-    # 第三轮：直接关联统计（确保所有唱片公司都被包含）
-    for node_id, data in G.nodes(data=True):
-        if data.get('Node Type') == 'RecordLabel' and node_id not in label_stats:
-            label_stats[node_id] = {
-                'artist_count': 0,
-                'total_works': 0,
-                'notable_works': 0,
-                'recent_works': 0
-            }
-    
-    # 计算唱片公司权重（仅基于历史数据）
-    LABEL_WEIGHTS = {}
-    
-    # 计算各项指标的最大值（避免除零错误）
-    max_artist = max(1, max(stats['artist_count'] for stats in label_stats.values()))
-    max_works = max(1, max(stats['total_works'] for stats in label_stats.values()))
-    max_notable = max(1, max(stats['notable_works'] for stats in label_stats.values()))
-    max_recent = max(1, max(stats['recent_works'] for stats in label_stats.values()))
-    
-    # 计算每家唱片公司的权重
-    for label_id, stats in label_stats.items():
-        # 标准化各项指标（0-1范围）
-        artist_score = stats['artist_count'] / max_artist
-        works_score = stats['total_works'] / max_works
-        notable_score = stats['notable_works'] / max_notable
-        recent_score = stats['recent_works'] / max_recent
-        
-        # 计算综合权重
-        composite_score = (
-            0.3 * artist_score +
-            0.2 * works_score +
-            0.3 * notable_score +
-            0.2 * recent_score
+    if expected_version and expected_version != version:
+        raise GraphReferenceError(
+            f"Graph version mismatch for '{dataset}'", status=409, current_version=version
         )
-        
-        # 确保权重在合理范围内
-        weight = max(0.4, min(0.95, composite_score))
-        
-        label_name = node_mapping.get(label_id, {}).get('name', f"Label_{label_id}")
-        LABEL_WEIGHTS[label_name] = weight
-    
-    # 设置默认权重
-    LABEL_WEIGHTS["Other"] = 0.5
-    
-    # 打印权重信息
-    print("\n唱片公司权重计算:")
-    print("=" * 70)
-    print(f"{'唱片公司':<25}{'艺术家数':<8}{'作品数':<8}{'上榜作品':<10}{'近期作品':<10}{'权重':<8}")
-    print("-" * 70)
-    for label_name, weight in sorted(LABEL_WEIGHTS.items(), key=lambda x: x[1], reverse=True):
-        if label_name == "Other":
-            continue
-        # 查找对应的统计数据
-        label_stats_entry = next(
-            (stats for label_id, stats in label_stats.items() 
-             if node_mapping.get(label_id, {}).get('name') == label_name),
-            {'artist_count': 0, 'total_works': 0, 'notable_works': 0, 'recent_works': 0}
-        )
-        print(f"{label_name:<25}{label_stats_entry.get('artist_count',0):<8}{label_stats_entry.get('total_works',0):<8}"
-              f"{label_stats_entry.get('notable_works',0):<10}{label_stats_entry.get('recent_works',0):<10}{weight:.4f}")
-    print("=" * 70)
-    
-    # 艺术家特征提取
-    artist_features_dict = {}
-    work_stats = defaultdict(lambda: defaultdict(int))
-    all_works = defaultdict(list)
-    
-    # 收集所有作品信息（过滤未来数据）
-    for node_id, data in G.nodes(data=True):
-        node_type = data.get('Node Type', '')
-        
-        if node_type in ['Song', 'Album']:
-            notable = data.get('notable', False)
-            release_date = data.get('release_date')
-            genre = data.get('genre', '')
-            
-            # 过滤未来年份数据
-            if release_date and release_date.isdigit():
-                release_year = int(release_date)
-                if release_year > CURRENT_YEAR:  # 跳过未来数据
-                    continue
-            else:
-                release_year = 0
-                
-            performers = []
-            composers = []
-            lyricists = []
-            
-            # 收集所有参与者
-            for src, _, edge_data in G.in_edges(node_id, data=True):
-                if edge_data['relationship'] == 'PerformerOf':
-                    performers.append(src)
-                elif edge_data['relationship'] == 'ComposerOf':
-                    composers.append(src)
-                elif edge_data['relationship'] == 'LyricistOf':
-                    lyricists.append(src)
-            
-            all_artists = set(performers + composers + lyricists)
-            
-            for artist_id in all_artists:
-                all_works[artist_id].append({
-                    'id': node_id,
-                    'type': node_type,
-                    'notable': notable,
-                    'release_year': release_year,
-                    'genre': genre,
-                    'roles': []
-                })
-                
-                if artist_id in performers:
-                    all_works[artist_id][-1]['roles'].append('performer')
-                if artist_id in composers:
-                    all_works[artist_id][-1]['roles'].append('composer')
-                if artist_id in lyricists:
-                    all_works[artist_id][-1]['roles'].append('lyricist')
-                
-                # 确保只统计当前及之前年份的数据
-                if 'Oceanus Folk' in genre and release_year <= CURRENT_YEAR:
-                    work_stats[artist_id]['oceanus_works'] += 1
-                    if notable:
-                        work_stats[artist_id]['oceanus_notable'] += 1
-                    if release_year > CURRENT_YEAR - 3 and release_year <= CURRENT_YEAR:
-                        work_stats[artist_id]['oceanus_recent'] += 1
-    
-    # 计算影响力特征
-    for node_id, data in G.nodes(data=True):
-        node_type = data.get('Node Type', '')
-        
-        if node_type == 'Person':
-            features = {
-                'oceanus_works': 0,
-                'oceanus_notable': 0,
-                'oceanus_recent': 0,
-                'total_works': 0,
-                'total_notable': 0,
-                'recent_activity': CURRENT_YEAR,
-                'collab_diversity': 0,
-                'influence_score': 0,
-                'creative_depth': 0,
-                'label_weight': 0,
-                'years_active': 0,
-                'last_release_year': 0,  # 新增：最后发布作品的年份
-                'composer_count': 0,
-                'lyricist_count': 0,
-                'producer_count': 0,
-                'oceanus_ratio': 0.0,
-                'interpolation_count': 0,
-                'lyrical_references': 0,
-                'collaboration_score': 0 
-            }
-            
-            if node_id in work_stats:
-                for k, v in work_stats[node_id].items():
-                    features[k] = v
-            
-            artist_works = all_works.get(node_id, [])
-            features['total_works'] = len(artist_works)
-            
-            collaborators = set()
-            labels_worked_with = set()
-            earliest_year = CURRENT_YEAR
-            latest_year = 0
-            notable_count = 0
-            composer_count = 0
-            lyricist_count = 0
-            producer_count = 0
-            
-            for work in artist_works:
-                release_year = work['release_year']
-                # 确保只使用有效历史数据
-                if release_year > 0 and release_year <= CURRENT_YEAR:
-                    earliest_year = min(earliest_year, release_year)
-                    latest_year = max(latest_year, release_year)
-                    # 封顶到当前年份
-                    features['last_release_year'] = max(features['last_release_year'], min(release_year, CURRENT_YEAR))
-                
-                if work['notable']:
-                    notable_count += 1
-                
-                if 'composer' in work['roles']:
-                    composer_count += 1
-                if 'lyricist' in work['roles']:
-                    lyricist_count += 1
-                
-                for other_artist in all_works:
-                    if other_artist != node_id:
-                        for other_work in all_works[other_artist]:
-                            if other_work['id'] == work['id']:
-                                collaborators.add(other_artist)
-                                # 计算协作强度
-                                features['collaboration_score'] += 1
-                
-                # 处理作品关联的唱片公司
-                for _, label_id, e_data in G.in_edges(work['id'], data=True):
-                    if e_data['relationship'] in ['RecordedBy', 'DistributedBy']:
-                        label_name = node_mapping.get(label_id, {}).get('name', "Other")
-                        labels_worked_with.add(label_name)
-            
-            features['total_notable'] = notable_count
-            features['composer_count'] = composer_count
-            features['lyricist_count'] = lyricist_count
-            features['collab_diversity'] = len(collaborators)
-            # 确保活跃年限计算有效
-            if latest_year > 0 and earliest_year <= CURRENT_YEAR:
-                features['years_active'] = min(latest_year, CURRENT_YEAR) - min(earliest_year, CURRENT_YEAR)
-            else:
-                features['years_active'] = 0
-            
-            # 确保最近活动时间有效
-            if latest_year > 0 and latest_year <= CURRENT_YEAR:
-                features['recent_activity'] = CURRENT_YEAR - latest_year
-                features['last_release_year'] = latest_year  # 记录最后发布年份
-            else:
-                features['recent_activity'] = CURRENT_YEAR
-                features['last_release_year'] = 0
-            
-            label_weight_sum = 0
-            for label in labels_worked_with:
-                label_weight_sum += LABEL_WEIGHTS.get(label, LABEL_WEIGHTS['Other'])
-            features['label_weight'] = label_weight_sum / max(1, len(labels_worked_with)) if labels_worked_with else 0
-            
-            # 计算影响力评分 - 包含所有关系类型
-            influence_score = 0
-            influence_relations = [
-                'InStyleOf', 'CoverOf', 'DirectlySamples',
-                'InterpolatesFrom', 'LyricalReferenceTo'
-            ]
-            
-            for work in artist_works:
-                # 只考虑当前及之前年份的影响力
-                if work['release_year'] > CURRENT_YEAR:
-                    continue
-                    
-                # 作品被其他作品影响
-                for _, _, edge_data in G.in_edges(work['id'], data=True):
-                    if edge_data['relationship'] in influence_relations:
-                        influence_score += 0.5  # 被动影响力
-                    
-                # 作品影响其他作品
-                for _, _, edge_data in G.out_edges(work['id'], data=True):
-                    if edge_data['relationship'] in influence_relations:
-                        influence_score += 1.0  # 主动影响力
-                        
-                    # 特定关系类型计数
-                    if edge_data['relationship'] == 'InterpolatesFrom':
-                        features['interpolation_count'] += 1
-                    elif edge_data['relationship'] == 'LyricalReferenceTo':
-                        features['lyrical_references'] += 1
-            
-            # 艺术家被直接引用
-            for src, _, edge_data in G.in_edges(node_id, data=True):
-                if edge_data['relationship'] in influence_relations:
-                    influence_score += 2.0  # 直接影响力
-            
-            influence_score += features['total_notable'] * 0.5
-            influence_score += features['oceanus_notable'] * 1.0
-            
-            features['influence_score'] = influence_score
-            
-            # 制作人角色统计
-            for _, _, edge_data in G.out_edges(node_id, data=True):
-                if edge_data['relationship'] == 'ProducerOf':
-                    producer_count += 1
-            features['producer_count'] = producer_count
-            
-            # 乐队成员关系统计
-            band_members = set()
-            for _, tgt, edge_data in G.in_edges(node_id, data=True):
-                if edge_data['relationship'] == 'MemberOf':
-                    band_members.add(tgt)
-            for src, _, edge_data in G.out_edges(node_id, data=True):
-                if edge_data['relationship'] == 'MemberOf':
-                    band_members.add(src)
-            features['band_members'] = len(band_members)
-            
-            # 创作深度计算
-            creative_works = composer_count + lyricist_count + features['interpolation_count'] + features['lyrical_references']
-            features['creative_depth'] = creative_works / max(1, features['total_works']) if features['total_works'] > 0 else 0
-            
-            oceanus_works = features.get('oceanus_works', 0)
-            features['oceanus_ratio'] = oceanus_works / max(1, features['total_works']) if features['total_works'] > 0 else 0
-            
-            artist_features_dict[node_id] = features
-    
-    return artist_features_dict
 
-# 4. 自定义权重优化器类（符合scikit-learn接口）
-class WeightOptimizer(BaseEstimator, RegressorMixin):
-    def __init__(self, weights=None):
-        self.weights = weights if weights is not None else [0.20, 0.18, 0.15, 0.15, 0.12, 0.10, 0.05, 0.05]
-    
-    def fit(self, X, y):
-        # 不需要实际训练，权重已由网格搜索提供
-        return self
-    
-    def predict(self, X):
-        return np.sum(X * self.weights, axis=1)
-    
-    def score(self, X, y):
-        predictions = self.predict(X)
-        return -mean_squared_error(y, predictions)  # 负MSE，越大越好
-    
-    def get_params(self, deep=True):
-        return {"weights": self.weights}
-    
-    def set_params(self, **params):
-        if "weights" in params:
-            self.weights = params["weights"]
-        return self
-
-# 5. 网格搜索优化权重系数（修改为接受用户权重偏好）
-def optimize_weights(artist_features_dict, weight_preferences=None):
-    # 默认权重排序（如果用户未提供）
-    DEFAULT_WEIGHT_PREFS = [
-        'influence_score',
-        'creative_depth',
-        'label_weight',
-        'producer_count',
-        'oceanus',
-        'collab'
-    ]
-    
-    # 如果用户未提供权重偏好，使用默认值
-    if weight_preferences is None:
-        weight_preferences = DEFAULT_WEIGHT_PREFS
-    
-    # 准备数据
-    features_list = []
-    scores_list = []
-    
-    for artist_id, feat in artist_features_dict.items():
-        features_list.append([
-            feat.get('influence_score', 0),
-            feat.get('creative_depth', 0),
-            feat.get('label_weight', 0),
-            feat.get('oceanus_recent', 0),
-            feat.get('collab_diversity', 0),
-            feat.get('producer_count', 0),
-            feat.get('oceanus_ratio', 0),
-            feat.get('collaboration_score', 0)
-        ])
-        
-        # 使用当前公式计算基准分数
-        base_score = (
-            feat.get('influence_score', 0) * 0.20 +
-            feat.get('creative_depth', 0) * 0.18 +
-            feat.get('label_weight', 0) * 0.15 +
-            feat.get('oceanus_recent', 0) * 0.15 +
-            feat.get('collab_diversity', 0) * 0.12 +
-            feat.get('producer_count', 0) * 0.10 +
-            feat.get('oceanus_ratio', 0) * 0.05 +
-            feat.get('collaboration_score', 0) * 0.05
-        )
-        scores_list.append(base_score)
-    
-    X = np.array(features_list)
-    y = np.array(scores_list)
-    
-    # 标准化特征
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    
-    # 根据用户偏好生成初始权重矩阵
-    base_weights = [0] * 8
-    weight_values = [0.25, 0.20, 0.18, 0.15, 0.12, 0.10]  # 线性递减权重
-    
-    # 映射用户偏好到特征索引
-    feature_mapping = {
-        'influence_score': [0],
-        'creative_depth': [1],
-        'label_weight': [2],
-        'producer_count': [5],
-        'oceanus': [3, 6],  # oceanus_recent 和 oceanus_ratio
-        'collab': [4, 7]    # collab_diversity 和 collaboration_score
-    }
-    
-    # 应用用户权重偏好
-    for pref, weight in zip(weight_preferences, weight_values):
-        indices = feature_mapping.get(pref, [])
-        if not indices:
-            continue
-            
-        # 平分权重到组内特征
-        per_feature_weight = weight / len(indices)
-        for idx in indices:
-            base_weights[idx] = per_feature_weight
-    
-    # 生成权重调整版本
-    param_grid = {'weights': [base_weights]}  # 包含用户偏好的基础权重
-    
-    # 创建5个更聚焦的调整版本
-    # 1. 放大用户最关注的特征
-    top_focus = [0] * 8
-    for idx in feature_mapping[weight_preferences[0]]:
-        top_focus[idx] = 0.15  # 显著增加最关注特征的权重
-    param_grid['weights'].append([
-        min(0.3, max(0.01, base_weights[i] + top_focus[i]))
-        for i in range(8)
-    ])
-    
-    # 2. 缩小用户最不关注的特征
-    bottom_focus = [0] * 8
-    for idx in feature_mapping[weight_preferences[-1]]:
-        bottom_focus[idx] = -0.1  # 显著减少最不关注特征的权重
-    param_grid['weights'].append([
-        min(0.3, max(0.01, base_weights[i] + bottom_focus[i]))
-        for i in range(8)
-    ])
-    
-    # 3. 放大前两个关注特征
-    top2_focus = [0] * 8
-    for pref in weight_preferences[:2]:
-        for idx in feature_mapping.get(pref, []):
-            top2_focus[idx] = 0.08  # 增加关注特征的权重
-    param_grid['weights'].append([
-        min(0.3, max(0.01, base_weights[i] + top2_focus[i]))
-        for i in range(8)
-    ])
-    
-    # 4. 缩小后两个关注特征
-    bottom2_focus = [0] * 8
-    for pref in weight_preferences[-2:]:
-        for idx in feature_mapping.get(pref, []):
-            bottom2_focus[idx] = -0.06  # 减少不太关注特征的权重
-    param_grid['weights'].append([
-        min(0.3, max(0.01, base_weights[i] + bottom2_focus[i]))
-        for i in range(8)
-    ])
-    
-    # 5. 平均权重作为参考
-    param_grid['weights'].append([0.125, 0.125, 0.125, 0.125, 0.125, 0.125, 0.125, 0.125])
-    
-    # 归一化所有权重组合
-    normalized_weights = []
-    for weight_list in param_grid['weights']:
-        total = sum(weight_list)
-        normalized = [w / total for w in weight_list]
-        normalized_weights.append(normalized)
-    
-    param_grid['weights'] = normalized_weights
-    
-    # 网格搜索
-    grid_search = GridSearchCV(
-        WeightOptimizer(),
-        param_grid,
-        scoring='neg_mean_squared_error',
-        cv=5,
-        refit=True
-    )
-    
-    grid_search.fit(X_scaled, y)
-    
-    # 获取最佳权重
-    best_weights = grid_search.best_params_['weights']
-    print(f"网格搜索完成，最佳权重: {best_weights}")
-    print(f"最佳分数: {-grid_search.best_score_:.4f}")
-    
-    # 使用SHAP分析特征重要性（保持不变）
-    model = LinearRegression()
-    model.fit(X_scaled, y)
-    explainer = shap.Explainer(model, X_scaled)
-    shap_values = explainer(X_scaled)
-    
-    feature_names = [
-        'influence_score',
-        'creative_depth',
-        'label_weight',
-        'oceanus_recent',
-        'collab_diversity',
-        'producer_count',
-        'oceanus_ratio',
-        'collaboration_score'
-    ]
-    
-    shap_importances = np.abs(shap_values.values).mean(axis=0)
-    total_shap = sum(shap_importances)
-    shap_weights = shap_importances / total_shap
-    
-    print("\nSHAP特征重要性:")
-    for i, name in enumerate(feature_names):
-        print(f"{name}: {shap_weights[i]:.4f}")
-    
-    # 结合网格搜索和SHAP结果
-    final_weights = [
-        0.8 * best_weights[i] + 0.2 * shap_weights[i]
-        for i in range(len(best_weights))
-    ]
-    
-    # 归一化确保权重和为1
-    total = sum(final_weights)
-    final_weights = [w / total for w in final_weights]
-    
-    print("\n优化后最终权重:")
-    for i, name in enumerate(feature_names):
-        print(f"{name}: {final_weights[i]:.4f}")
-    
-    return final_weights
+    ref_key = json.dumps({'dataset': dataset, 'version': version, 'filters': filters}, sort_keys=True)
+    graph_hash = hashlib.sha256(ref_key.encode('utf-8')).hexdigest()
+    if dataset != 'full':
+        return graph_data, graph_hash
 
-# 6. 异构图神经网络模型
-class HeteroArtistPredictor(nn.Module):
-    def __init__(self, input_dim_artist, input_dim_work, hidden_dim):
-        super(HeteroArtistPredictor, self).__init__()
-        
-        # 艺术家特征编码
-        self.artist_encoder = nn.Sequential(
-            nn.Linear(input_dim_artist, hidden_dim),
-            nn.ReLU(),
-            nn.Linear(hidden_dim, hidden_dim)
-        )
-        
-        # 作品特征编码
-        self.work_encoder = nn.Sequential(
-            nn.Linear(input_dim_work, hidden_dim),
-            nn.ReLU(),
-            nn.Linear(hidden_dim, hidden_dim)
-        )
-        
-        # 创作关系图卷积
-        self.creation_conv = GATConv(
-            in_channels=hidden_dim,
-            out_channels=hidden_dim,
-            heads=1,
-            concat=False
-        )
-        
-        # 影响关系图卷积
-        self.influence_conv = GATConv(
-            in_channels=hidden_dim,
-            out_channels=hidden_dim,
-            heads=1,
-            concat=False
-        )
-        
-        # 协作关系图卷积
-        self.collab_conv = GATConv(
-            in_channels=hidden_dim,
-            out_channels=hidden_dim,
-            heads=1,
-            concat=False
-        )
-        
-        # 预测层
-        self.predictor = nn.Sequential(
-            nn.Linear(hidden_dim * 2, 256),
-            nn.ReLU(),
-            nn.Dropout(0.4),
-            nn.Linear(256, 128),
-            nn.ReLU(),
-            nn.Dropout(0.3),
-            nn.Linear(128, 1)
-        )
+    graph_data = _RESOLVED_GRAPH_CACHE.get(ref_key)
+    if graph_data is None:
+        with GRAPH_LOCK.read():
+            graph = apply_graph_filters(FULL_NETWORKX_GRAPH, filters)
+            graph_data = graph_to_prediction_data(graph)
+        _RESOLVED_GRAPH_CACHE.put(ref_key, graph_data)
+    return graph_data, graph_hash
 
-    def forward(self, data):
-        # 编码节点特征
-        artist_x = self.artist_encoder(data['artist'].x)
-        work_x = self.work_encoder(data['work'].x)
-        
-        # 创作关系传播 (艺术家 -> 作品)
-        if hasattr(data, 'artist_creates_work_edge_index'):
-            work_x = self.creation_conv(
-                (artist_x, work_x),
-                data.artist_creates_work_edge_index
-            )
-            work_x = F.elu(work_x)
-        
-        # 影响关系传播 (作品 -> 作品)
-        if hasattr(data, 'work_influences_work_edge_index'):
-            work_x = self.influence_conv(
-                work_x,
-                data.work_influences_work_edge_index
-            )
-            work_x = F.elu(work_x)
-        
-        # 反向创作关系传播 (作品 -> 艺术家)
-        if hasattr(data, 'work_created_by_artist_edge_index'):
-            artist_x_updated = self.creation_conv(
-                (work_x, artist_x),
-                data.work_created_by_artist_edge_index
-            )
-        else:
-            artist_x_updated = artist_x
-        
-        # 协作关系传播 (艺术家 -> 艺术家)
-        if hasattr(data, 'artist_collaborates_artist_edge_index'):
-            artist_collab = self.collab_conv(
-                artist_x_updated,
-                data.artist_collaborates_artist_edge_index
-            )
-            artist_collab = F.elu(artist_collab)
-        else:
-            artist_collab = artist_x_updated
-        
-        # 合并特征
-        combined = torch.cat([artist_x_updated, artist_collab], dim=1)
-        
-        # 最终预测
-        return self.predictor(combined).squeeze()
-
-# 7. 准备异构图数据
-def prepare_hetero_graph_data(G, artist_features_dict, node_mapping, weights):
-    # 收集艺术家节点 - 只包含最近5年有活动的艺术家
-    artist_nodes = []
-    artist_features_list = []
-    for node_id, data in G.nodes(data=True):
-        if data['Node Type'] == 'Person' and node_id in artist_features_dict:
-            feat = artist_features_dict[node_id]
-            
-            # 检查艺术家是否在最近5年有活动
-            if feat.get('last_release_year', 0) >= CURRENT_YEAR - 5:
-                artist_nodes.append(node_id)
-                artist_features_list.append([
-                    feat.get('oceanus_works', 0),
-                    feat.get('oceanus_notable', 0),
-                    feat.get('oceanus_recent', 0),
-                    feat.get('total_works', 0),
-                    feat.get('total_notable', 0),
-                    feat.get('influence_score', 0),
-                    feat.get('creative_depth', 0),
-                    feat.get('label_weight', 0),
-                    feat.get('composer_count', 0),
-                    feat.get('lyricist_count', 0),
-                    feat.get('producer_count', 0),
-                    feat.get('collab_diversity', 0),
-                    feat.get('oceanus_ratio', 0),
-                    feat.get('interpolation_count', 0),
-                    feat.get('lyrical_references', 0),
-                    feat.get('collaboration_score', 0)
-                ])
-    
-    # 收集作品节点
-    work_nodes = []
-    work_features_list = []
-    for node_id, data in G.nodes(data=True):
-        if data['Node Type'] in ['Song', 'Album']:
-            work_nodes.append(node_id)
-            release_date = data.get('release_date', '')
-            if release_date and release_date.isdigit():
-                release_year = int(release_date)
-                if release_year > CURRENT_YEAR:  # 过滤未来作品
-                    release_year = 0
-            else:
-                release_year = 0
-                
-            work_features_list.append([
-                1 if data.get('notable', False) else 0,
-                release_year,
-                1 if 'Oceanus Folk' in data.get('genre', '') else 0
-            ])
-    
-    # 标准化特征
-    artist_scaler = StandardScaler()
-    artist_features_scaled = artist_scaler.fit_transform(artist_features_list) if artist_features_list else np.zeros((0, 16))
-    
-    work_scaler = StandardScaler()
-    work_features_scaled = work_scaler.fit_transform(work_features_list) if work_features_list else np.zeros((0, 3))
-    
-    # 创建异构图数据对象
-    data = HeteroData()
-    
-    # 添加节点
-    data['artist'].x = torch.tensor(artist_features_scaled, dtype=torch.float)
-    data['artist'].node_id = artist_nodes
-    data['work'].x = torch.tensor(work_features_scaled, dtype=torch.float)
-    data['work'].node_id = work_nodes
-    
-    # 添加边索引
-    # 协作关系 (艺术家-艺术家)
-    collab_edges = []
-    for src, tgt, edge_data in G.edges(data=True):
-        if (edge_data['relationship'] == 'MemberOf' and
-            src in artist_nodes and tgt in artist_nodes):
-            src_idx = artist_nodes.index(src)
-            tgt_idx = artist_nodes.index(tgt)
-            collab_edges.append([src_idx, tgt_idx])
-            collab_edges.append([tgt_idx, src_idx])
-    
-    if collab_edges:
-        collab_edge_index = torch.tensor(collab_edges, dtype=torch.long).t().contiguous()
-        setattr(data, 'artist_collaborates_artist_edge_index', collab_edge_index)
-    
-    # 影响关系 (作品-作品)
-    influence_edges = []
-    influence_relations = [
-        'InStyleOf', 'CoverOf', 'DirectlySamples',
-        'InterpolatesFrom', 'LyricalReferenceTo'
-    ]
-    
-    for src, tgt, edge_data in G.edges(data=True):
-        if (edge_data['relationship'] in influence_relations and
-            src in work_nodes and tgt in work_nodes):
-            src_idx = work_nodes.index(src)
-            tgt_idx = work_nodes.index(tgt)
-            influence_edges.append([src_idx, tgt_idx])
-    
-    if influence_edges:
-        influence_edge_index = torch.tensor(influence_edges, dtype=torch.long).t().contiguous()
-        setattr(data, 'work_influences_work_edge_index', influence_edge_index)
-    
-    # 创作关系 (艺术家-作品)
-    creates_edges = []
-    created_by_edges = []
-    for src, tgt, edge_data in G.edges(data=True):
-        if (edge_data['relationship'] in ['PerformerOf', 'ComposerOf', 'LyricistOf'] and
-            src in artist_nodes and tgt in work_nodes):
-            artist_idx = artist_nodes.index(src)
-            work_idx = work_nodes.index(tgt)
-            creates_edges.append([artist_idx, work_idx])
-            created_by_edges.append([work_idx, artist_idx])
-    
-    if creates_edges:
-        creates_edge_index = torch.tensor(creates_edges, dtype=torch.long).t().contiguous()
-        setattr(data, 'artist_creates_work_edge_index', creates_edge_index)
-        
-        created_by_edge_index = torch.tensor(created_by_edges, dtype=torch.long).t().contiguous()
-        setattr(data, 'work_created_by_artist_edge_index', created_by_edge_index)
-    
-    # 使用优化后的权重计算标签
-    labels = []
-    for artist_id in artist_nodes:
-        feat = artist_features_dict[artist_id]
-        # 使用后的权重计算潜力评分
-        score = (
-            feat.get('influence_score', 0) * weights[0] +
-            feat.get('creative_depth', 0) * weights[1] +
-            feat.get('label_weight', 0) * weights[2] +
-            feat.get('oceanus_recent', 0) * weights[3] +
-            feat.get('collab_diversity', 0) * weights[4] +
-            feat.get('producer_count', 0) * weights[5] +
-            feat.get('oceanus_ratio', 0) * weights[6] +
-            feat.get('collaboration_score', 0) * weights[7]
-        )
-        labels.append(score)
-    
-    data['artist'].y = torch.tensor(labels, dtype=torch.float) if labels else torch.zeros(0, dtype=torch.float)
-    
-    return data
+def parse_prediction_request(request_data):
+    """
+    解析预测请求，返回 (图数据, 图标识哈希, 权重偏好)。
+    优先使用 graphRef 引用服务端数据；未提供时回退到上传的完整 graphData。
+    """
+    if not request_data or ('graphRef' not in request_data and 'graphData' not in request_data):
+        raise GraphReferenceError('No graph data provided')
 
-# 8. 训练与预测 (基于训练损失早停)
-def train_and_predict(data, node_mapping, artist_features_dict):
-    if data['artist'].num_nodes == 0:
-        return []
-    
-    model = HeteroArtistPredictor(
-        input_dim_artist=data['artist'].x.size(1),
-        input_dim_work=data['work'].x.size(1),
-        hidden_dim=64
-    )
-    
-    optimizer = torch.optim.Adam(model.parameters(), lr=0.001, weight_decay=1e-4)
-    criterion = nn.MSELoss()
-    
-    # 早停法参数 - 基于训练损失
-    patience = 50  # 连续多少个epoch损失无改善则停止
-    min_delta = 0.001  # 视为改善的最小变化量
-    best_loss = float('inf')
-    patience_counter = 0
-    best_model_state = None
-    
-    model.train()
-    losses = []
-    
-    for epoch in range(1000):
-        optimizer.zero_grad()
-        out = model(data)
-        
-        if data['artist'].y.numel() > 0:
-            loss = criterion(out, data['artist'].y)
-            loss.backward()
-            optimizer.step()
-            losses.append(loss.item())
-            
-            # 早停法检查 - 基于训练损失
-            if loss.item() < best_loss - min_delta:
-                best_loss = loss.item()
-                patience_counter = 0
-                # 保存最佳模型状态
-                best_model_state = model.state_dict().copy()
-            else:
-                patience_counter += 1
-                
-            if patience_counter >= patience:
-                print(f'早停在epoch {epoch}: 训练损失连续{patience}个epoch未改善')
-                # 恢复最佳模型状态
-                model.load_state_dict(best_model_state)
-                break
-        else:
-            # 如果没有标签数据，无法计算损失，跳过训练
-            print("无有效标签数据，跳过训练")
-            break
-        
-        if epoch % 50 == 0:
-            loss_value = loss.item() if 'loss' in locals() else float('nan')
-            print(f'Epoch {epoch}, Loss: {loss_value:.4f}')
-    
-    model.eval()
-    with torch.no_grad():
-        if data['artist'].x.size(0) > 0:
-            raw_predictions = model(data)
-            predictions = torch.sigmoid(raw_predictions)
-        else:
-            predictions = torch.tensor([])
-    
-    results = []
-    for i in range(data['artist'].num_nodes):
-        artist_id = data['artist'].node_id[i]
-        artist_data = node_mapping.get(artist_id, {'name': 'Unknown', 'stage_name': 'Unknown'})
-        
-        name = artist_data.get('stage_name', artist_data.get('name', 'Unknown'))
-        feat = artist_features_dict.get(artist_id, {})
-        
-        # 双重验证：只包含最近5年有活动的艺术家
-        if feat.get('last_release_year', 0) < CURRENT_YEAR - 5:
-            continue
-        
-        probability = predictions[i].item() if predictions.numel() > 1 else (predictions.item() if predictions.numel() == 1 else 0.0)
-        
-        results.append({
-            'id': artist_id,
-            'name': name,
-            'probability': probability,
-            'features': feat
-        })
-    
-    results.sort(key=lambda x: x['probability'], reverse=True)
-    return results
+    weight_preferences = request_data.get('weightPreferences')
+    if 'graphRef' in request_data:
+        graph_data, graph_hash = resolve_graph_reference(request_data['graphRef'])
+        print(f"使用服务端图引用: {request_data['graphRef']}")
+    else:
+        graph_data = request_data['graphData']
+        graph_hash = graph_content_hash(graph_data)
+        print(f"收到图谱数据: {len(graph_data.get('nodes', []))} 节点, {len(graph_data.get('edges', []))} 边")
+    if weight_preferences:
+        print(f"用户权重偏好: {weight_preferences}")
+    return graph_data, graph_hash, weight_preferences
+
+def graph_reference_error_response(e):
+    return jsonify({'error': str(e), **e.details}), e.status
 
 @app.route('/predict', methods=['POST'])
+@requires_prediction
 def predict():
     try:
-        # 获取前端发送的 JSON 数据
+        # 获取前端发送的 JSON 数据（graphRef 或完整 graphData）
         request_data = request.get_json()
+        graph_data, graph_hash, weight_preferences = parse_prediction_request(request_data)
         
-        if not request_data or 'graphData' not in request_data:
-            return jsonify({'error': 'No graph data provided'}), 400
-        
-        graph_data = request_data['graphData']
-        
-        # 获取用户权重偏好（如果有）
-        weight_preferences = request_data.get('weightPreferences')
-        
-        # 调试日志
-        print(f"收到图谱数据: {len(graph_data.get('nodes', []))} 节点, {len(graph_data.get('edges', []))} 边")
-        if weight_preferences:
-            print(f"用户权重偏好: {weight_preferences}")
-        
-        # 使用接收到的数据构建图谱
-        G, node_mapping, label_mapping = build_knowledge_graph(graph_data)
-        
-        # 特征提取
-        artist_features_dict = extract_features(G, node_mapping, label_mapping)
-        
-        # 优化权重（传入用户偏好）
-        optimized_weights = optimize_weights(artist_features_dict, weight_preferences)
-        
-        # 准备图数据
-        hetero_data = prepare_hetero_graph_data(G, artist_features_dict, node_mapping, optimized_weights)
-        
-        # 训练和预测
-        results = train_and_predict(hetero_data, node_mapping, artist_features_dict)
-        
-        # 准备返回结果
-        top_artists = []
-        for artist in results[:5]:
-            features = artist.get('features', {})
-            top_artists.append({
-                'id': artist['id'],
-                'name': artist['name'],
-                'probability': artist['probability'],
-                'last_active': features.get('last_release_year', '未知'),
-                'oceanus_works': features.get('oceanus_works', 0),
-                'notable_works': features.get('total_notable', 0),
-                'influence_score': features.get('influence_score', 0),
-                'creative_depth': features.get('creative_depth', 0),
-                'features': features
-            })
-        
-        # 生成报告
-        creativity_scores = [a['features'].get('creative_depth', 0) for a in results]
-        avg_creativity = np.mean(creativity_scores) if creativity_scores else 0
-        
-        top_companies = list(label_mapping.values())[:3] if label_mapping else ["无唱片公司数据"]
-        
-        # 准备未来之星数据
-        predicted_stars = []
-        for artist in results[:3]:
-            feat = artist.get('features', {})
-            strengths = []
-            if feat.get('composer_count', 0) > 0:
-                strengths.append(f"作曲作品: {feat['composer_count']}")
-            if feat.get('lyricist_count', 0) > 0:
-                strengths.append(f"作词作品: {feat['lyricist_count']}")
-            if feat.get('producer_count', 0) > 0:
-                strengths.append(f"制作经验: {feat['producer_count']}")
-            
-            risk_factors = []
-            if 'recent_activity' in feat:
-                risk_factors.append(f"最近活动: {feat['recent_activity']}年前")
-            if 'collab_diversity' in feat:
-                risk_factors.append(f"合作多样性: {feat['collab_diversity']}")
-            
-            predicted_stars.append({
-                'name': artist['name'],
-                'probability': round(artist['probability'], 4),
-                'strengths': strengths,
-                'risk_factors': risk_factors
-            })
-        
-        # 准备雷达图数据
-        radar_dimensions = {
-            'influence_score': '影响力',
-            'creative_depth': '创作深度',
-            'collab_diversity': '合作多样性',
-            'oceanus_works': 'Oceanus作品',
-            'total_notable': '知名作品',
-            'collaboration_score': '协作强度'
-        }
-        
-        radar_data = []
-        for artist in results[:3]:
-            feat = artist['features']
-            radar_values = {}
-            # 预计算每个维度的最大值（排除creative_depth）
-            max_values = {}
-            for dim in radar_dimensions.keys():
-                if dim == 'creative_depth': 
-                    continue  # creative_depth不需要最大值
-                # 获取该维度在所有特征中的最大值（至少为1）
-                max_val = max(1, max(feat.get(dim, 0) for feat in artist_features_dict.values()))
-                max_values[dim] = max_val
-
-            # 计算每个维度的标准化值 (50-100)
-            radar_values = {}
-            for dim, dim_name in radar_dimensions.items():
-                value = feat.get(dim, 0)
-                
-                if dim == 'influence_score':
-                    # 使用预计算的最大值归一化
-                    normalized = min(value / max_values[dim] * 100, 100)
-                elif dim == 'creative_depth':
-                    normalized = value * 100  # 0-1 -> 0-100
-                else:
-                    # 使用预计算的最大值归一化
-                    normalized = min(value / max_values[dim] * 100, 100)
-                
-                # 关键变换：映射到50-100范围
-                scaled_value = 50 + normalized * 0.5
-                radar_values[dim_name] = round(scaled_value, 1)          
-            
-            radar_data.append({
-                'name': artist['name'],
-                'data': radar_values
-            })
-
-        report = {
-            "top_artists": top_artists,
-            "trends": {
-                "top_companies": top_companies,
-                "avg_creativity": round(avg_creativity, 2),
-                "active_artists": len(results)
-            },
-            "predicted_stars": predicted_stars,
-            "radar_data": radar_data  # 包含三位艺术家的雷达图数据
-        }
-        print(radar_data)
+        prediction = prediction_module()
+        report = prediction.run_prediction(
+            graph_data, weight_preferences,
+            registry_key=prediction.prediction_key(graph_data, weight_preferences, graph_hash=graph_hash)
+        )
         return jsonify(report)
         
+    except GraphReferenceError as e:
+        return graph_reference_error_response(e)
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({'error': f'服务器错误: {str(e)}'}), 500
+
+@app.route('/predict/rescore', methods=['POST'])
+@requires_prediction
+def rescore_prediction():
+    """
+    交互式调整 weightPreferences 时的快速路径（请求体与 /predict 相同）：复用按图缓存的特征矩阵与基础模型，
+    只重新计算标签并微调少量 epoch。同一图第一次请求时需要构建缓存（必要时训练基础模型）。
+    """
+    try:
+        request_data = request.get_json(silent=True)
+        graph_data, graph_hash, weight_preferences = parse_prediction_request(request_data)
+        report = prediction_module().run_fast_prediction(graph_data, weight_preferences, graph_hash=graph_hash)
+        return jsonify(report)
+    except GraphReferenceError as e:
+        return graph_reference_error_response(e)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'服务器错误: {str(e)}'}), 500
+
+# --- 异步预测任务 ---
+# 有界进程池执行完整预测流程，进行中的相同请求只执行一次；工作进程只导入 prediction 模块
+PREDICTION_JOBS = PredictionJobManager(
+    'prediction:run_prediction',
+    max_workers=int(os.environ.get('PREDICTION_WORKERS', 2)),
+    start_method=os.environ.get('PREDICTION_START_METHOD', 'spawn')
+)
+
+@app.route('/predict/jobs', methods=['POST'])
+@requires_prediction
+def submit_prediction_job():
+    """提交预测任务，立即返回任务ID，客户端随后轮询状态并获取结果"""
+    request_data = request.get_json(silent=True)
+    try:
+        graph_data, graph_hash, weight_preferences = parse_prediction_request(request_data)
+    except GraphReferenceError as e:
+        return graph_reference_error_response(e)
+    
+    prediction = prediction_module()
+    key = prediction.prediction_key(graph_data, weight_preferences, graph_hash=graph_hash)
+    try:
+        job_id, deduplicated = PREDICTION_JOBS.submit(
+            key, graph_data, weight_preferences, registry_key=key
+        )
+    except JobSubmitError as e:
+        return jsonify({'error': f'预测任务无法提交: {e}'}), 503
+    app.logger.info(f"预测任务 {job_id} 已提交 (复用进行中任务: {deduplicated})")
+    
+    response = PREDICTION_JOBS.status(job_id)
+    response['deduplicated'] = deduplicated
+    response['stages'] = prediction.PREDICTION_STAGES
+    return jsonify(response), 202
+
+@app.route('/predict/jobs/<job_id>', methods=['GET'])
+@requires_prediction
+def get_prediction_job(job_id):
+    """查询任务状态及当前阶段进度"""
+    status = PREDICTION_JOBS.status(job_id)
+    if status is None:
+        return jsonify({'error': f'Unknown job: {job_id}'}), 404
+    # 任务存在说明提交时已经导入过预测流水线
+    status['stages'] = prediction_module().PREDICTION_STAGES
+    return jsonify(status)
+
+@app.route('/predict/jobs/<job_id>/result', methods=['GET'])
+@requires_prediction
+def get_prediction_job_result(job_id):
+    """获取任务结果：未完成返回 202，失败返回 500"""
+    job = PREDICTION_JOBS.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job: {job_id}'}), 404
+    if job.status == STATUS_FAILED:
+        return jsonify({'error': f'服务器错误: {job.error}'}), 500
+    if job.status != STATUS_DONE:
+        return jsonify(PREDICTION_JOBS.status(job_id)), 202
+    return jsonify(job.result)
+
 # --- 全局变量 ---
 # 用于一次性加载和存储图数据，避免每次请求都重新加载文件
-FULL_NETWORKX_GRAPH = None
-NODE_ID_MAP = {} # 用于通过节点名称快速查找ID
+FULL_NETWORKX_GRAPH = None # networkx MultiDiGraph；GRAPH_ENGINE="csr" 时为只读的 CSRGraph
+NAME_INDEX = None # 节点名称搜索索引（完全/前缀/子串匹配），用于通过名称快速查找ID
+GRAPH_VERSION = None # 已加载图数据的内容哈希，用于校验客户端引用的图版本
+GRAPH_INDEXES = None # 流派/年份/节点类型/边类型索引，随图一起在启动时构建，增量更新时同步维护
+GRAPH_LOCK = ReadWriteLock() # 增量更新 (/api/graph/ingest) 持有写锁，读取图与索引的请求持有读锁
+
+def reads_graph(view):
+    """路由装饰器：在图的读锁内执行视图函数"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with GRAPH_LOCK.read():
+            return view(*args, **kwargs)
+    return wrapper
 
 # --- 数据加载与图构建 (在应用启动时执行一次) ---
-def load_graph_data(filename="public/graph_processed.json"):
+def load_graph_data(filename=os.path.join(BASE_DIR, 'public', 'graph_processed.json')):
     """
-    从JSON文件加载数据并构建一个NetworkX图。
+    从二进制快照（若存在且与源文件一致）或JSON文件加载数据并构建一个NetworkX图。
     这个函数只在服务器启动时运行一次。
     """
-    global FULL_NETWORKX_GRAPH, NODE_ID_MAP
+    global FULL_NETWORKX_GRAPH, NAME_INDEX, GRAPH_VERSION, GRAPH_INDEXES
     if FULL_NETWORKX_GRAPH is not None:
         return
 
-    app.logger.info(f"开始从 {filename} 加载并构建图...")
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 使用MultiDiGraph因为它支持平行边和有向边
-        G = nx.MultiDiGraph()
-        
-        # 创建一个从节点小写名称到ID的映射，用于快速、不区分大小写的搜索
-        temp_node_map = {}
-
-        # 添加节点
-        for node_data in data.get('nodes', []):
-            node_id = node_data['id']
-            # 将所有属性解包作为节点属性
-            G.add_node(node_id, **node_data)
-            temp_node_map[node_data['name'].lower()] = node_id
-
-        # 添加边 (注意：JSON文件中的键是 'links')
-        for edge_data in data.get('links', []):
-            source_id = edge_data.get('source')
-            target_id = edge_data.get('target')
-            if G.has_node(source_id) and G.has_node(target_id):
-                G.add_edge(source_id, target_id, **edge_data)
-
+        # 优先从二进制快照（内存映射）加载；快照不存在或与源文件不一致时回退到 JSON
+        snapshot_path = os.environ.get('GRAPH_SNAPSHOT_PATH') or default_snapshot_path(filename)
+        snapshot = None
+        try:
+            snapshot = open_snapshot(snapshot_path, source_path=filename)
+        except (OSError, ValueError) as e:
+            app.logger.warning(f"无法读取图快照 {snapshot_path}: {e}")
+
+        if snapshot is not None:
+            app.logger.info(f"开始从快照 {snapshot_path} 加载图 (引擎: {GRAPH_ENGINE})...")
+            # CSR 引擎直接使用快照的内存映射数组，无需重建 MultiDiGraph
+            G = CSRGraph.from_snapshot(snapshot) if GRAPH_ENGINE == 'csr' else snapshot.to_networkx()
+            version = snapshot.version
+        else:
+            app.logger.info(f"开始从 {filename} 加载并构建图 (引擎: {GRAPH_ENGINE})...")
+            with open(filename, 'rb') as f:
+                raw = f.read()
+            G, _ = build_graph_from_processed_data(json.loads(raw))
+            if GRAPH_ENGINE == 'csr':
+                G = CSRGraph.from_networkx(G)
+            version = source_version(raw)
+
+        GRAPH_INDEXES = GraphIndexes(G)
+        # 名称索引用于快速、不区分大小写的搜索
+        NAME_INDEX = NameIndex(
+            (node_id, d.get('name'), d.get('Node Type')) for node_id, d in G.nodes(data=True)
+        )
         FULL_NETWORKX_GRAPH = G
-        NODE_ID_MAP = temp_node_map
+        GRAPH_VERSION = version
         app.logger.info(f"图加载完成。节点数: {G.number_of_nodes()}, 边数: {G.number_of_edges()}")
+        LAYOUT_CACHE.clear()
+        warm_layout_cache()
     except FileNotFoundError:
         app.logger.error(f"错误: 数据文件 {filename} 未找到！")
     except json.JSONDecodeError:
@@ -1167,149 +326,163 @@ def load_graph_data(filename="public/graph_processed.json"):
 # --- 过滤逻辑辅助函数 ---
 
 def find_node_id_by_name(name):
-    """通过名称模糊查找节点ID（大小写不敏感的子字符串匹配）"""
-    if not name:
+    """通过名称查找节点ID（大小写不敏感）：优先完全匹配，否则返回排名最高的前缀/子串匹配"""
+    if not name or NAME_INDEX is None:
         return None
-    lower_name = name.lower()
-    # 优先完全匹配
-    if lower_name in NODE_ID_MAP:
-        return NODE_ID_MAP[lower_name]
-    # 模糊匹配 (查找第一个包含搜索词的节点)
-    for node_name, node_id in NODE_ID_MAP.items():
-        if lower_name in node_name:
-            return node_id
-    return None
-
-def filter_by_genre(graph, genres):
-    """根据一个或多个流派筛选图，并移除因此产生的孤立节点"""
+    return NAME_INDEX.lookup(name)
+
+# 筛选通过 load_graph_data 构建的属性索引 (GRAPH_INDEXES) 计算保留的节点/边，
+# 再在原图上叠加一层惰性视图（nx.subgraph_view），不复制、不修改原图；
+# 只有最终需要序列化的子图才会被物化。
+
+def filter_by_genre(genres):
+    """返回所选流派的作品集合；未指定流派时返回 None（不筛选）"""
     # 如果流派列表为空或无效，则不进行筛选
     if not genres or not isinstance(genres, list):
-        return graph
+        return None
 
     app.logger.info(f"应用流派筛选: {genres}")
-    # 需要移除的节点是那些类型为Song或Album，且其流派不在所选列表中的节点
-    nodes_to_remove = {
-        n for n, d in graph.nodes(data=True)
-        if d.get('Node Type') in ['Song', 'Album'] and d.get('genre') not in genres
-    }
-    
-    graph.remove_nodes_from(nodes_to_remove)
-    # 移除因节点删除而产生的孤立节点
-    graph.remove_nodes_from(list(nx.isolates(graph)))
-    return graph
+    return GRAPH_INDEXES.works_in_genres(genres)
 
-def filter_by_time_range(graph, time_range):
-    """根据时间范围筛选图，并移除因此产生的孤立节点"""
+def parse_time_range(time_range):
+    """返回时间范围 (起始年份, 结束年份)；未指定或格式错误时返回 None（不筛选）"""
     if not time_range or 'start' not in time_range or 'end' not in time_range:
-        return graph
+        return None
 
     try:
         start_year = int(time_range['start'])
         end_year = int(time_range['end'])
         app.logger.info(f"应用时间筛选: {start_year}-{end_year}")
     except (ValueError, TypeError):
-        return graph # 如果年份格式错误，则不筛选
-
-    nodes_to_remove = set()
-    for n, d in graph.nodes(data=True):
-        if d.get('Node Type') in ['Song', 'Album']:
-            release_date_str = d.get('release_date')
-            if release_date_str and release_date_str.isdigit():
-                release_year = int(release_date_str)
-                if not (start_year <= release_year <= end_year):
-                    nodes_to_remove.add(n)
-            else: # 如果没有发布日期或格式不正确，也移除
-                nodes_to_remove.add(n)
-
-    graph.remove_nodes_from(nodes_to_remove)
-    graph.remove_nodes_from(list(nx.isolates(graph)))
-    return graph
-
-def filter_by_types(graph, node_types, edge_types):
-    """根据节点和边的类型筛选图。保留孤立节点。"""
+        return None # 如果年份格式错误，则不筛选
+    return start_year, end_year
+
+def filter_by_types(visible_nodes, node_types, edge_types):
+    """
+    在已保留的节点集合上再按节点类型筛选（visible_nodes 为 None 表示全部节点），
+    并返回 (节点集合, 保留的边类型)。类型筛选保留孤立节点。
+    """
     if not node_types and not edge_types:
-        return graph
-    
+        return visible_nodes, None
+
     app.logger.info(f"应用类型筛选: 节点={node_types}, 边={edge_types}")
-    
-    # 如果有节点类型筛选，先处理节点
+
     if node_types:
-        nodes_to_keep = {
-            n for n, d in graph.nodes(data=True)
-            if d.get('Node Type') in node_types
-        }
-        # 创建一个只包含所需节点的子图。这会自动处理边的连接关系。
-        graph = graph.subgraph(nodes_to_keep).copy()
-
-    # 在可能已经缩小的图上，再处理边类型
-    if edge_types:
-        edges_to_remove = [
-            (u, v, k) for u, v, k, d in graph.edges(data=True, keys=True)
-            if d.get('Edge Type') not in edge_types
-        ]
-        graph.remove_edges_from(edges_to_remove)
-        # 注意：这里我们不移除孤立节点，以满足需求3
+        typed_nodes = GRAPH_INDEXES.nodes_of_types(node_types)
+        visible_nodes = typed_nodes if visible_nodes is None else visible_nodes & typed_nodes
+
+    # 注意：这里我们不移除孤立节点，以满足需求3
+    return visible_nodes, edge_types or None
+
+def apply_graph_filters(graph, filters):
+    """按顺序应用流派、时间范围、节点/边类型筛选，返回原图上的视图"""
+    # 1 & 2. 按流派、时间范围筛选作品，并移除因此产生的孤立节点
+    # （先后删除两批作品再删孤立节点，等价于一次性删除两者之外的作品再删孤立节点）
+    genres = filters.get('genre')
+    genres = genres if genres and isinstance(genres, list) else None
+    year_range = parse_time_range(filters.get('timeRange'))
+    if year_range is not None:
+        # 没有发布日期或格式不正确的作品不在年份分区中，因此也会被移除；
+        # 同时选择了流派时只合并这些流派的年份分区
+        if genres:
+            app.logger.info(f"应用流派筛选: {genres}")
+        visible_nodes = GRAPH_INDEXES.nodes_in_year_range(*year_range, genres=genres)
+    elif genres:
+        visible_nodes = GRAPH_INDEXES.nodes_with_works(filter_by_genre(genres))
+    else:
+        visible_nodes = None
 
-    return graph
+    # 3. 按节点/边类型筛选
+    visible_nodes, edge_types = filter_by_types(visible_nodes, filters.get('nodeTypes'), filters.get('edgeTypes'))
 
-def get_subgraph_for_node(graph, center_node_id, hop_level=1):
+    if visible_nodes is None and edge_types is None:
+        return graph
+    if isinstance(graph, CSRGraph):
+        # CSR 引擎按边类型数组直接生成边掩码
+        return graph.subgraph_view(nodes=visible_nodes, edge_types=edge_types)
+    visible_edges = GRAPH_INDEXES.edges_of_types(edge_types) if edge_types is not None else None
+    return nx.subgraph_view(
+        graph,
+        # 用普通的成员判断而非 nx.filters.show_nodes：后者在节点较少时按集合顺序遍历，会打乱原图的节点顺序
+        filter_node=visible_nodes.__contains__ if visible_nodes is not None else nx.filters.no_filter,
+        filter_edge=nx.filters.show_multiedges(visible_edges) if visible_edges is not None else nx.filters.no_filter
+    )
+
+def get_subgraph_for_node(graph, center_node_id, hop_level=1, direction='both', edge_types=None,
+                          max_nodes=None, rank_by='degree'):
     """
-    获取中心节点及其N跳邻居组成的子图。
-    hop_level=1: 一跳邻居
-    hop_level=2: 二跳邻居
+    获取中心节点及其N跳邻居组成的子图（逐层 BFS，见 ego_expansion）。
+    direction: 'both' / 'out' / 'in'；edge_types: 只沿这些类型的边扩展；
+    max_nodes: 节点预算，超出时按 rank_by（'degree' 或 'influence'）截断。
+    返回 (子图, {节点ID: 跳数}, 是否被截断)。
     """
     if center_node_id is None or not graph.has_node(center_node_id):
-        return nx.MultiDiGraph()  # 返回一个空图
-
-    app.logger.info(f"为节点ID {center_node_id} 构建 {hop_level}-跳子图")
-
-    # 从中心节点开始
-    nodes_to_include = {center_node_id}
+        return nx.MultiDiGraph(), {}, False  # 返回一个空图
 
-    # 一跳邻居
-    one_hop_neighbors = set(graph.predecessors(center_node_id)) | set(graph.successors(center_node_id))
-    nodes_to_include.update(one_hop_neighbors)
+    app.logger.info(f"为节点ID {center_node_id} 构建 {hop_level}-跳子图 (方向: {direction}, 预算: {max_nodes})")
 
-    # 如果需要二跳，继续扩展
-    if hop_level == 2:
-        two_hop_neighbors = set()
-        for neighbor_id in one_hop_neighbors:
-            # 添加每个一跳邻居的邻居
-            two_hop_neighbors.update(set(graph.predecessors(neighbor_id)))
-            two_hop_neighbors.update(set(graph.successors(neighbor_id)))
-        
-        # 从二跳邻居中移除已经在一跳���中心节点集合中的节点
-        two_hop_neighbors -= nodes_to_include
-        nodes_to_include.update(two_hop_neighbors)
+    hops, truncated = expand_ego(
+        graph, center_node_id, hop_level, direction=direction, edge_types=edge_types,
+        max_nodes=max_nodes, rank_by=rank_by, node_order=GRAPH_INDEXES.node_order
+    )
+    if truncated:
+        app.logger.info(f"子图超出节点预算，已截断为 {len(hops)} 个节点")
+
+    # 使用 .subgraph() 方法高效地创建子图，它会自动包含这些节点间的所有边；
+    # 返回的是视图，序列化时直接从原图流式读取，无需再复制一份
+    return graph.subgraph(hops), hops, truncated
+
+def graph_json_encoder():
+    """与 jsonify 输出一致的 JSON 编码器：紧凑分隔符，沿用 app.json 的键排序、ASCII 转义和默认转换设置"""
+    return json.JSONEncoder(
+        sort_keys=app.json.sort_keys,
+        ensure_ascii=app.json.ensure_ascii,
+        default=app.json.default,
+        separators=(',', ':')
+    )
 
-    # 使用 .subgraph() 方法高效地创建子图，它会自动包含这些节点间的所有边
-    subgraph = graph.subgraph(nodes_to_include).copy()
-                
-    return subgraph
+def iter_graph_for_d3(graph, highlighted_nodes=None, node_attrs=None, graph_attrs=None):
+    """
+    将NetworkX图对象流式编码为D3.js兼容的JSON（与 nx.node_link_data 的 'links' 格式一致），逐块产出字节串。
+    为指定的节点添加 'highlight' 属性；node_attrs / graph_attrs 为附加的节点属性（如跳数）和图属性。
+    """
+    return iter_node_link_json(
+        graph, graph_json_encoder(), highlighted_nodes=highlighted_nodes, node_attrs=node_attrs, graph_attrs=graph_attrs
+    )
 
-def format_graph_for_d3(graph, highlighted_nodes=None):
+def encode_graph_for_d3(graph, highlighted_nodes=None, node_attrs=None, graph_attrs=None):
     """
-    将NetworkX图对象转换为D3.js兼容的JSON格式。
-    新增功能：为指定的节点添加 'highlight' 属性。
+    与 iter_graph_for_d3 相同，但返回完整的字节串。各块依次写入同一个缓冲区，
+    内存中只保留一份响应体（b''.join 会先把所有块收集成列表，再复制出结果）。
     """
-    if highlighted_nodes is None:
-        highlighted_nodes = set()
+    buffer = io.BytesIO()
+    for chunk in iter_graph_for_d3(graph, highlighted_nodes, node_attrs=node_attrs, graph_attrs=graph_attrs):
+        buffer.write(chunk)
+    return buffer.getvalue()
+
+def wants_binary_graph():
+    """客户端在 Accept 头中显式列出二进制图格式（graph_binary.MIMETYPE）时返回 True"""
+    return any(
+        mimetype == GRAPH_BINARY_MIMETYPE and quality > 0
+        for mimetype, quality in request.accept_mimetypes
+    )
 
-    if graph is None:
-        return {"nodes": [], "links": []}
-    
-    graph_data = nx.node_link_data(graph)
-    
-    # 为需要高亮的节点添加属性
-    for node in graph_data.get('nodes', []):
-        if node['id'] in highlighted_nodes:
-            node['highlight'] = True
-            
-    return graph_data
+def graph_response_for_d3(graph, highlighted_nodes=None):
+    """
+    按 Accept 头返回二进制图格式或 JSON（逐块编码，不在内存中构建完整的中间字典）。
+    响应体在调用时（即视图持有的读锁内）编码完毕，发送给客户端时不再读取图。
+    """
+    if wants_binary_graph():
+        response = app.response_class(encode_graph_binary(graph, highlighted_nodes), mimetype=GRAPH_BINARY_MIMETYPE)
+    else:
+        response = app.response_class(encode_graph_for_d3(graph, highlighted_nodes), mimetype='application/json')
+    response.vary.add('Accept')
+    return response
 
 
 # --- 新增：桑基图交互的API端点 ---
 @app.route('/api/filter-for-sankey', methods=['POST'])
+@reads_graph
 def filter_for_sankey():
     """
     专门处理来自桑基图点击事件的过滤请求。
@@ -1326,8 +499,9 @@ def filter_for_sankey():
     subgraph = nx.MultiDiGraph()
     highlighted_nodes = set()
 
-    INFLUENCE_EDGE_TYPES = {'InStyleOf', 'InterpolatesFrom', 'CoverOf', 'LyricalReferenceTo', 'DirectlySamples'}
-    CREATION_EDGE_TYPES = {'PerformerOf', 'ComposerOf', 'ProducerOf', 'LyricistOf'}
+    # 所有分支都直接读取 GRAPH_INDEXES 中按流派分桶的影响力/创作边，开销只与匹配的边数相关
+    G = FULL_NETWORKX_GRAPH
+    work_ids = GRAPH_INDEXES.work_ids
 
     # --- 1. Outward: Oceanus Folk -> Genre ---
     if filter_type == 'outward_oceanus_to_genre':
@@ -1335,23 +509,14 @@ def filter_for_sankey():
         if not target_genre:
             return jsonify({"error": "Missing 'genre' parameter"}), 400
 
-        target_genre_works = {n for n, d in FULL_NETWORKX_GRAPH.nodes(data=True) if d.get('genre') == target_genre and d.get('Node Type') in ['Song', 'Album']}
-        oceanus_works = {n for n, d in FULL_NETWORKX_GRAPH.nodes(data=True) if d.get('genre') == 'Oceanus Folk' and d.get('Node Type') in ['Song', 'Album']}
-        
-        nodes_to_add = set()
-        edges_to_add = []
-        for u, v, data in FULL_NETWORKX_GRAPH.edges(data=True):
-            # 修正: 当用户在“Outward Influence”视图中点击 Oceanus Folk -> 其他流派时，
-            # 我们实际上想展示从“其他流派”到“Oceanus Folk”的影响力。
-            # 因此，源(u)应该是目标流派的作品，目标(v)应该是Oceanus Folk的作品。
-            if u in target_genre_works and v in oceanus_works and data.get('Edge Type') in INFLUENCE_EDGE_TYPES:
-                nodes_to_add.add(u)
-                nodes_to_add.add(v)
-                edges_to_add.append((u, v, data))
-        
-        if nodes_to_add:
-            subgraph.add_nodes_from((n, FULL_NETWORKX_GRAPH.nodes[n]) for n in nodes_to_add)
-            subgraph.add_edges_from(edges_to_add)
+        # 修正: 当用户在“Outward Influence”视图中点击 Oceanus Folk -> 其他流派时，
+        # 我们实际上想展示从“其他流派”到“Oceanus Folk”的影响力。
+        # 因此，源(u)应该是目标流派的作品，目标(v)应该是Oceanus Folk的作品。
+        for u, v, key in GRAPH_INDEXES.influence_by_genre_pair.get((target_genre, 'Oceanus Folk'), []):
+            if u in work_ids and v in work_ids:
+                subgraph.add_node(u, **G.nodes[u])
+                subgraph.add_node(v, **G.nodes[v])
+                subgraph.add_edge(u, v, **G.get_edge_data(u, v, key))
 
     # --- 2. Outward: Genre -> Artist (修正后) ---
     elif filter_type == 'outward_genre_to_artist':
@@ -1361,29 +526,25 @@ def filter_for_sankey():
             return jsonify({"error": "Missing 'genre' or 'artist_id' parameter"}), 400
 
         # artist_id = find_node_id_by_name(artist_name) # <-- 不再需要名称查找
-        if not FULL_NETWORKX_GRAPH.has_node(artist_id):
+        if not G.has_node(artist_id):
             return jsonify({"nodes": [], "links": []})
 
         # 添加艺术家本人到子图
-        subgraph.add_node(artist_id, **FULL_NETWORKX_GRAPH.nodes[artist_id])
+        subgraph.add_node(artist_id, **G.nodes[artist_id])
         
         # 修正: 同时检查两个方向的创作关系边
         # 场景 A: 艺术家 -> 作品 (例如: MemberOf)
-        for u, v, data in FULL_NETWORKX_GRAPH.out_edges(artist_id, data=True):
-            if data.get('Edge Type') in CREATION_EDGE_TYPES:
-                work_node = FULL_NETWORKX_GRAPH.nodes[v]
-                if work_node.get('Node Type') in ['Song', 'Album'] and work_node.get('genre') == genre:
-                    subgraph.add_node(v, **work_node)
-                    subgraph.add_edge(u, v, **data)
+        for v, key in GRAPH_INDEXES.creation_out.get(artist_id, {}).get(genre, []):
+            if v in work_ids:
+                subgraph.add_node(v, **G.nodes[v])
+                subgraph.add_edge(artist_id, v, **G.get_edge_data(artist_id, v, key))
 
         # 场景 B: 作品 -> 艺术家 (例如: PerformerOf)
         # 这是更常见的情况，但为了完整性，我们检查两个方向
-        for u, v, data in FULL_NETWORKX_GRAPH.in_edges(artist_id, data=True):
-            if data.get('Edge Type') in CREATION_EDGE_TYPES:
-                work_node = FULL_NETWORKX_GRAPH.nodes[u]
-                if work_node.get('Node Type') in ['Song', 'Album'] and work_node.get('genre') == genre:
-                    subgraph.add_node(u, **work_node)
-                    subgraph.add_edge(u, v, **data)
+        for u, key in GRAPH_INDEXES.creation_in.get(artist_id, {}).get(genre, []):
+            if u in work_ids:
+                subgraph.add_node(u, **G.nodes[u])
+                subgraph.add_edge(u, artist_id, **G.get_edge_data(u, artist_id, key))
 
     # --- 3. Inward: Genre -> Artist (修正后) ---
     elif filter_type == 'inward_genre_to_artist':
@@ -1397,24 +558,21 @@ def filter_for_sankey():
             return jsonify({"nodes": [], "links": []})
 
         # 添加艺术家本人到子图
-        subgraph.add_node(artist_id, **FULL_NETWORKX_GRAPH.nodes[artist_id])
+        subgraph.add_node(artist_id, **G.nodes[artist_id])
 
         # 遍历并添加艺术家的所有作品和创作边
-        for u_artist, v_work, creation_data in FULL_NETWORKX_GRAPH.out_edges(artist_id, data=True):
-            if creation_data.get('Edge Type') in CREATION_EDGE_TYPES:
-                work_node = FULL_NETWORKX_GRAPH.nodes[v_work]
-                if work_node.get('Node Type') in ['Song', 'Album']:
-                    subgraph.add_node(v_work, **work_node)
-                    subgraph.add_edge(u_artist, v_work, **creation_data)
-                    
-                    # 检查该作品是否受目标流派启发
-                    for u_work, v_inspiration, influence_data in FULL_NETWORKX_GRAPH.out_edges(v_work, data=True):
-                        if influence_data.get('Edge Type') in INFLUENCE_EDGE_TYPES:
-                            inspiration_node = FULL_NETWORKX_GRAPH.nodes[v_inspiration]
-                            if inspiration_node.get('genre') == genre:
-                                # 添加灵感来源节点和影响力边
-                                subgraph.add_node(v_inspiration, **inspiration_node)
-                                subgraph.add_edge(u_work, v_inspiration, **influence_data)
+        for works in GRAPH_INDEXES.creation_out.get(artist_id, {}).values():
+            for v_work, key in works:
+                if v_work not in work_ids:
+                    continue
+                subgraph.add_node(v_work, **G.nodes[v_work])
+                subgraph.add_edge(artist_id, v_work, **G.get_edge_data(artist_id, v_work, key))
+
+                # 检查该作品是否受目标流派启发：只取指向该流派的影响力出边
+                for v_inspiration, influence_key in GRAPH_INDEXES.influence_out.get(v_work, {}).get(genre, []):
+                    # 添加灵感来源节点和影响力边
+                    subgraph.add_node(v_inspiration, **G.nodes[v_inspiration])
+                    subgraph.add_edge(v_work, v_inspiration, **G.get_edge_data(v_work, v_inspiration, influence_key))
 
     # --- 4. Inward: Artist -> Oceanus Folk ---
     elif filter_type == 'inward_artist_to_oceanus':
@@ -1426,106 +584,416 @@ def filter_for_sankey():
         if not artist_id:
             return jsonify({"nodes": [], "links": []})
 
-        subgraph.add_node(artist_id, **FULL_NETWORKX_GRAPH.nodes[artist_id])
+        subgraph.add_node(artist_id, **G.nodes[artist_id])
         
-        oceanus_works_by_artist = {v for u, v, d in FULL_NETWORKX_GRAPH.out_edges(artist_id, data=True) if d.get('Edge Type') in CREATION_EDGE_TYPES and FULL_NETWORKX_GRAPH.nodes[v].get('genre') == 'Oceanus Folk'}
+        oceanus_works_by_artist = {
+            v for v, _ in GRAPH_INDEXES.creation_out.get(artist_id, {}).get('Oceanus Folk', [])
+        }
 
         for work_id in oceanus_works_by_artist:
-            subgraph.add_node(work_id, **FULL_NETWORKX_GRAPH.nodes[work_id])
+            subgraph.add_node(work_id, **G.nodes[work_id])
             # 添加创作边
-            for u, v, data in FULL_NETWORKX_GRAPH.out_edges(artist_id, data=True):
-                if v == work_id:
-                    subgraph.add_edge(u, v, **data)
-
-            # 检查并添加灵感来源
-            for u_work, v_inspiration, influence_data in FULL_NETWORKX_GRAPH.out_edges(work_id, data=True):
-                if influence_data.get('Edge Type') in INFLUENCE_EDGE_TYPES:
-                    inspiration_node = FULL_NETWORKX_GRAPH.nodes[v_inspiration]
-                    if inspiration_node.get('genre') != 'Oceanus Folk':
-                        highlighted_nodes.add(work_id)
-                        subgraph.add_node(v_inspiration, **inspiration_node)
-                        subgraph.add_edge(u_work, v_inspiration, **influence_data)
+            for data in G.get_edge_data(artist_id, work_id).values():
+                subgraph.add_edge(artist_id, work_id, **data)
+
+            # 检查并添加灵感来源（流派不是 Oceanus Folk 的影响力目标）
+            for inspiration_genre, inspirations in GRAPH_INDEXES.influence_out.get(work_id, {}).items():
+                if inspiration_genre == 'Oceanus Folk':
+                    continue
+                for v_inspiration, influence_key in inspirations:
+                    highlighted_nodes.add(work_id)
+                    subgraph.add_node(v_inspiration, **G.nodes[v_inspiration])
+                    subgraph.add_edge(work_id, v_inspiration, **G.get_edge_data(work_id, v_inspiration, influence_key))
     else:
         return jsonify({"error": f"Unknown filter type: {filter_type}"}), 400
 
-    return jsonify(format_graph_for_d3(subgraph, highlighted_nodes=highlighted_nodes))
+    return graph_response_for_d3(subgraph, highlighted_nodes=highlighted_nodes)
 
 
 # --- API 路由 ---
 
+# 元数据响应按图版本缓存：预先序列化并 gzip 压缩，带强 ETag
+_META_RESPONSE_CACHE = {}  # 'version' -> 图版本, 'body'/'gzip' -> 响应体, 'etag' -> ETag
+
+def _get_meta_response_cache():
+    """返回当前图版本对应的元数据缓存，版本变化时重新生成"""
+    cache = _META_RESPONSE_CACHE
+    if cache.get('version') == GRAPH_VERSION and 'body' in cache:
+        return cache
+
+    body = app.json.dumps({
+        "node_types": sorted(GRAPH_INDEXES.nodes_by_type),
+        "edge_types": sorted(GRAPH_INDEXES.edges_by_type),
+        "genres": GRAPH_INDEXES.genres,
+        "node_names": NAME_INDEX.sorted_names(),
+        "version": GRAPH_VERSION,
+    }, separators=(",", ":")).encode('utf-8') + b"\n"
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    cache = {
+        'version': GRAPH_VERSION,
+        'body': body,
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+        'etag': f"meta-{digest}",
+    }
+    _META_RESPONSE_CACHE.clear()
+    _META_RESPONSE_CACHE.update(cache)
+    return cache
+
 @app.route('/api/graph/meta', methods=['GET'])
+@reads_graph
 def get_graph_meta():
     """提供图的元数据，用于前端筛选器的动态填充"""
     if FULL_NETWORKX_GRAPH is None:
         return jsonify({"error": "Graph data is not loaded yet."}), 500
 
-    node_types = sorted(list(set(d['Node Type'] for _, d in FULL_NETWORKX_GRAPH.nodes(data=True) if 'Node Type' in d)))
-    edge_types = sorted(list(set(d['Edge Type'] for _, _, d in FULL_NETWORKX_GRAPH.edges(data=True) if 'Edge Type' in d)))
-    genres = sorted(list(set(d['genre'] for _, d in FULL_NETWORKX_GRAPH.nodes(data=True) if d.get('genre'))))
-    node_names = sorted([d['name'] for _, d in FULL_NETWORKX_GRAPH.nodes(data=True)])
+    cache = _get_meta_response_cache()
+    use_gzip = 'gzip' in request.accept_encodings
+    # gzip 与未压缩是同一资源的两种表示，分别使用不同的强 ETag；任一 ETag 都视为未修改
+    etag = cache['etag'] + '-gzip' if use_gzip else cache['etag']
+
+    if request.if_none_match.contains(cache['etag']) or request.if_none_match.contains(cache['etag'] + '-gzip'):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(cache['gzip'] if use_gzip else cache['body'], mimetype='application/json')
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+
+@app.route('/api/graph/search', methods=['GET'])
+@reads_graph
+def search_graph_nodes():
+    """节点名称自动补全：?q=查询词&limit=数量，返回按相关度排序的候选节点"""
+    if NAME_INDEX is None:
+        return jsonify({"error": "Graph data is not loaded yet."}), 500
+
+    query = request.args.get('q', '').strip()
+    try:
+        limit = int(request.args.get('limit', SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "'limit' must be an integer"}), 400
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
 
     return jsonify({
-        "node_types": node_types,
-        "edge_types": edge_types,
-        "genres": genres,
-        "node_names": node_names,
+        "query": query,
+        "results": NAME_INDEX.search(query, limit=limit)
     })
 
 
-@app.route('/api/graph/layout', methods=['POST'])
-def get_graph_layout():
+# --- 按年份分片的数据 ---
+# data_preprocessor.py（默认模式与 --streaming 均会生成）的每年一个分片 + 清单；
+# 客户端可先取清单，再按需请求所需年份（前端目前通过 /api/graph/layout 在服务端按时间筛选，不直接使用分片）
+YEAR_SHARDS = YearShards(os.environ.get('YEAR_SHARDS_DIR', os.path.join(BASE_DIR, 'public', 'graph_by_year')))
+YEAR_SHARDS_MISSING_ERROR = "Yearly shards not found; run data_preprocessor.py first."
+
+def _revalidated(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/graph/years/manifest', methods=['GET'])
+def get_year_manifest():
+    """年份分片清单：年份、节点/边数、字节数与内容哈希，带强 ETag"""
+    try:
+        manifest, raw = YEAR_SHARDS.manifest()
+    except FileNotFoundError:
+        return jsonify({"error": YEAR_SHARDS_MISSING_ERROR}), 404
+    etag = f"manifest-{manifest['version']}"
+    if request.if_none_match.contains(etag):
+        return _revalidated(app.response_class(status=304), etag)
+    return _revalidated(app.response_class(raw, mimetype='application/json'), etag)
+
+@app.route('/api/graph/years', methods=['GET'])
+def get_year_shards():
     """
-    核心API：根据前端请求动态筛选和构建力导向图。
+    以 NDJSON 流式返回请求的年份分片，每行 {"year", "links", "nodes"}。
+    ?years=1990,1991 指定年份，或 ?start=&end= 指定闭区间（均省略时返回全部年份）；
+    ?attributes=1 时把节点ID替换为已加载图中的节点属性（与 /api/graph/layout 的节点格式一致）。
     """
-    if FULL_NETWORKX_GRAPH is None:
-        return jsonify({"error": "Graph data is not available."}), 500
-    
-    # 复制完整的图，确保每次请求都在原始数据上操作
-    graph = FULL_NETWORKX_GRAPH.copy()
-    
-    request_data = request.json or {}
+    try:
+        start = int(request.args['start']) if request.args.get('start') else None
+        end = int(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({"error": "'start' and 'end' must be integers"}), 400
+    years = [year for year in request.args.get('years', '').split(',') if year] or None
+    with_attributes = request.args.get('attributes') in ('1', 'true')
+    if with_attributes and FULL_NETWORKX_GRAPH is None:
+        return jsonify({"error": "Graph data is not loaded yet."}), 500
+
+    try:
+        entries = YEAR_SHARDS.select(years=years, start=start, end=end)
+    except FileNotFoundError:
+        return jsonify({"error": YEAR_SHARDS_MISSING_ERROR}), 404
+    except KeyError as e:
+        return jsonify({"error": f"Unknown years: {e.args[0]}"}), 404
+
+    etag = YEAR_SHARDS.etag(entries, extra=f"attributes:{GRAPH_VERSION}" if with_attributes else '')
+    if request.if_none_match.contains(etag):
+        return _revalidated(app.response_class(status=304), etag)
+    chunks = _iter_year_shards_with_attributes(entries) if with_attributes else YEAR_SHARDS.iter_ndjson(entries)
+    return _revalidated(app.response_class(chunks, mimetype='application/x-ndjson'), etag)
+
+def _iter_year_shards_with_attributes(entries):
+    """逐年解析分片并附上节点属性；每个年份单独持有读锁，不阻塞期间到来的增量更新太久"""
+    encode = graph_json_encoder().encode
+    for entry in entries:
+        shard = YEAR_SHARDS.load(entry)
+        with GRAPH_LOCK.read():
+            nodes = FULL_NETWORKX_GRAPH.nodes
+            shard['nodes'] = [
+                {**nodes[node_id], 'id': node_id} if node_id in nodes else {'id': node_id}
+                for node_id in shard['nodes']
+            ]
+        yield (encode({'year': entry['year'], **shard}) + '\n').encode('utf-8')
+
+
+# --- 布局响应缓存 ---
+# 以规范化后的请求（排序去重的流派/类型列表、解析为节点ID的中心节点、图版本）为键，
+# 缓存已序列化的响应体；重新加载图时清空。
+LAYOUT_CACHE = LRUResponseCache(max_entries=int(os.environ.get('LAYOUT_CACHE_SIZE', 128)))
+LAYOUT_CACHE_MAX_ENTRY_BYTES = int(os.environ.get('LAYOUT_CACHE_MAX_ENTRY_BYTES', 8 * 1024 * 1024))
+DEFAULT_CENTER_NODE_NAME = "Sailor Shift"
+# 中心子图的最大跳数；未指定 maxNodes 时使用的默认节点预算（不设置则不限制）
+LAYOUT_MAX_HOP_LEVEL = int(os.environ.get('LAYOUT_MAX_HOP_LEVEL', 6))
+LAYOUT_DEFAULT_MAX_NODES = int(os.environ['LAYOUT_DEFAULT_MAX_NODES']) if os.environ.get('LAYOUT_DEFAULT_MAX_NODES') else None
+# 加载图后预先缓存的请求：后端默认视图，以及前端初始化/重置视图时发送的请求（见 graphStore.resetView）
+WARM_LAYOUT_REQUESTS = [
+    {},
+    {
+        "centerNodeName": DEFAULT_CENTER_NODE_NAME,
+        "hopLevel": 1,
+        "maxNodes": 1500,
+        "filters": {"nodeTypes": None, "edgeTypes": None, "genre": None, "timeRange": {"start": 1981, "end": 2040}},
+    },
+]
+
+class LayoutRequestError(ValueError):
+    pass
+
+def _canonical_values(values):
+    """类型筛选列表：排序去重；单个字符串视为只含一项的列表"""
+    if not values:
+        return None
+    if isinstance(values, str):
+        values = [values]
+    try:
+        return sorted(set(values), key=lambda v: (type(v).__name__, str(v)))
+    except TypeError:
+        raise LayoutRequestError("Filter values must be strings")
+
+def _positive_int(value, name):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise LayoutRequestError(f"'{name}' must be an integer")
+    if value < 1:
+        raise LayoutRequestError(f"'{name}' must be at least 1")
+    return value
+
+def _hop_level(value):
+    """hopLevel 无法解析为整数或小于 1 时退回默认的一跳，超过 LAYOUT_MAX_HOP_LEVEL 时按上限处理"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return 1
+    return min(max(value, 1), LAYOUT_MAX_HOP_LEVEL)
+
+def canonicalize_layout_request(request_data):
+    """
+    把 /api/graph/layout 的请求规范化，返回字典:
+    center_name / center_id（未指定中心节点时均为 None）、hop_level（1 到 LAYOUT_MAX_HOP_LEVEL）、
+    direction / expand_edge_types / max_nodes / rank_by（中心子图的扩展方式）、filters（只含生效的筛选条件）
+    """
+    if not isinstance(request_data, dict):
+        raise LayoutRequestError("Request body must be an object")
     center_node_name = request_data.get("centerNodeName")
-    # 从请求中获取hopLevel，如果未提供则默认为1
-    hop_level = request_data.get("hopLevel", 1)
+    # 从请求中获取hopLevel，如果未提供或无效则默认为1
+    hop_level = _hop_level(request_data.get("hopLevel", 1))
+    direction = request_data.get("direction") or 'both'
+    if direction not in DIRECTIONS:
+        raise LayoutRequestError(f"'direction' must be one of {list(DIRECTIONS)}")
+    rank_by = request_data.get("rankBy") or 'degree'
+    if rank_by not in RANKINGS:
+        raise LayoutRequestError(f"'rankBy' must be one of {list(RANKINGS)}")
+    max_nodes = request_data.get("maxNodes")
+    max_nodes = _positive_int(max_nodes, 'maxNodes') if max_nodes is not None else LAYOUT_DEFAULT_MAX_NODES
     filters = request_data.get("filters", {})
+    if not isinstance(filters, dict):
+        raise LayoutRequestError("'filters' must be an object")
 
     # 如果是初始/重置请求 (没有指定中心节点或指定为Sailor Shift且无其他筛选)
     is_initial_request = not center_node_name and not filters
-    is_reset_request = center_node_name == "Sailor Shift" and not filters
+    is_reset_request = center_node_name == DEFAULT_CENTER_NODE_NAME and not filters
     if is_initial_request or is_reset_request:
-        center_node_name = "Sailor Shift"
-
-    # --- 组合逻辑：按顺序应用筛选 ---
-    # 1. 按流派筛选
-    graph = filter_by_genre(graph, filters.get('genre'))
-
-    # 2. 按时间范围筛选
-    graph = filter_by_time_range(graph, filters.get('timeRange'))
+        center_node_name = DEFAULT_CENTER_NODE_NAME
+
+    canonical_filters = {}
+    genres = filters.get('genre')
+    if genres and isinstance(genres, list):
+        canonical_filters['genre'] = _canonical_values(genres)
+    time_range = filters.get('timeRange')
+    if isinstance(time_range, dict) and 'start' in time_range and 'end' in time_range:
+        try:
+            canonical_filters['timeRange'] = {'start': int(time_range['start']), 'end': int(time_range['end'])}
+        except (ValueError, TypeError):
+            pass # 如果年份格式错误，则不筛选
+    for name in ('nodeTypes', 'edgeTypes'):
+        values = _canonical_values(filters.get(name))
+        if values:
+            canonical_filters[name] = values
+
+    center_node_id = find_node_id_by_name(center_node_name) if center_node_name else None
+    return {
+        'center_name': center_node_name or None,
+        'center_id': center_node_id,
+        'hop_level': hop_level,
+        'direction': direction,
+        'expand_edge_types': _canonical_values(request_data.get("expandEdgeTypes")),
+        'max_nodes': max_nodes,
+        'rank_by': rank_by,
+        'filters': canonical_filters,
+    }
 
-    # 3. 按节点/边类型筛选
-    graph = filter_by_types(graph, filters.get('nodeTypes'), filters.get('edgeTypes'))
+def layout_cache_key(layout, binary=False):
+    return json.dumps({
+        'version': GRAPH_VERSION,
+        'format': 'binary' if binary else 'json',
+        'center': [layout['center_name'] is not None, layout['center_id']],
+        'ego': [
+            layout['hop_level'], layout['direction'], layout['expand_edge_types'], layout['max_nodes'], layout['rank_by']
+        ] if layout['center_id'] is not None else None,
+        'filters': layout['filters'],
+    }, sort_keys=True)
+
+def build_graph_layout(layout):
+    """
+    按规范化请求筛选图并构建中心节点子图（原图上的视图）。
+    返回 (图, 附加节点属性 {节点ID: {'hop': 跳数}}, 附加图属性)。
+    """
+    # --- 组合逻辑：按顺序应用筛选（筛选在原图的惰性视图上进行，不复制整张图） ---
+    graph = apply_graph_filters(FULL_NETWORKX_GRAPH, layout['filters'])
 
     # --- 处理居中和最终图的构建 ---
-    final_graph = None
-    if center_node_name:
-        center_node_id = find_node_id_by_name(center_node_name)
-        
+    if layout['center_name']:
+        center_node_id = layout['center_id']
         if center_node_id is not None and graph.has_node(center_node_id):
             # 如果找到了节点，并且该节点在过滤后的图中依然存在
-            # 传递 hop_level 参数
-            final_graph = get_subgraph_for_node(graph, center_node_id, hop_level)
-        else:
-            # 如果搜索的节点不存在或已被过滤掉，返回一个空图
-            app.logger.warning(f"中心节点 '{center_node_name}' 在过滤后的图中未找到。返回空图。")
-            final_graph = nx.MultiDiGraph()
-    else:
-        # 如果没有指定中心节点，则返回整个筛选后的图
-        final_graph = graph
-    
-    # 格式化为D3兼容的JSON并返回
-    response_json = format_graph_for_d3(final_graph)
-    app.logger.info(f"请求处理完毕，返回 {len(response_json['nodes'])} 个节点和 {len(response_json['links'])} 条边。")
-    return jsonify(response_json)
+            final_graph, hops, truncated = get_subgraph_for_node(
+                graph, center_node_id, layout['hop_level'], direction=layout['direction'],
+                edge_types=layout['expand_edge_types'], max_nodes=layout['max_nodes'], rank_by=layout['rank_by']
+            )
+            # 每个节点带上与中心节点的跳数；图属性中记录中心节点以及是否因节点预算被截断
+            node_attrs = {node_id: {'hop': hop} for node_id, hop in hops.items()}
+            graph_attrs = {'center': center_node_id, 'hopLevel': layout['hop_level'], 'truncated': truncated}
+            return final_graph, node_attrs, graph_attrs
+        # 如果搜索的节点不存在或已被过滤掉，返回一个空图
+        app.logger.warning(f"中心节点 '{layout['center_name']}' 在过滤后的图中未找到。返回空图。")
+        return nx.MultiDiGraph(), None, None
+
+    # 如果没有指定中心节点，则返回整个筛选后的图
+    return graph, None, None
+
+def _encode_layout(layout, binary):
+    """
+    在图的读锁内筛选、构建子图并把响应体编码为一个完整的字节串，随后立即释放读锁。
+    响应发送给客户端时不再持有锁，慢客户端不会阻塞增量更新（以及排在写者之后的新读者）。
+    """
+    with GRAPH_LOCK.read():
+        graph, node_attrs, graph_attrs = build_graph_layout(layout)
+        if binary:
+            return encode_graph_binary(graph, node_attrs=node_attrs, graph_attrs=graph_attrs)
+        return encode_graph_for_d3(graph, node_attrs=node_attrs, graph_attrs=graph_attrs)
+
+def graph_layout_body(layout, binary=False):
+    """
+    返回布局响应体（字节串），优先从缓存读取；第二个返回值表示是否命中缓存。
+    binary=True 时返回二进制图格式。未命中时同一个字节串直接写入缓存（超过单条上限的响应不缓存）。
+    """
+    key = layout_cache_key(layout, binary)
+    body = LAYOUT_CACHE.get(key)
+    if body is not None:
+        return body, True
+    body = _encode_layout(layout, binary)
+    if len(body) <= LAYOUT_CACHE_MAX_ENTRY_BYTES:
+        LAYOUT_CACHE.put(key, body)
+    app.logger.info(f"请求处理完毕，返回 {len(body)} 字节。")
+    return body, False
+
+def warm_layout_cache():
+    """预先缓存默认视图，使首屏和“重置视图”直接命中缓存"""
+    for request_data in WARM_LAYOUT_REQUESTS:
+        graph_layout_body(canonicalize_layout_request(request_data))
+
+@app.route('/api/graph/layout', methods=['POST'])
+def get_graph_layout():
+    """
+    核心API：根据前端请求动态筛选和构建力导向图。
+    """
+    if FULL_NETWORKX_GRAPH is None:
+        return jsonify({"error": "Graph data is not available."}), 500
+
+    try:
+        with GRAPH_LOCK.read():
+            layout = canonicalize_layout_request(request.json or {})
+    except LayoutRequestError as e:
+        return jsonify({"error": str(e)}), 400
+
+    binary = wants_binary_graph()
+    body, cache_hit = graph_layout_body(layout, binary)
+    response = app.response_class(body, mimetype=GRAPH_BINARY_MIMETYPE if binary else 'application/json')
+    response.headers['X-Cache'] = 'HIT' if cache_hit else 'MISS'
+    response.vary.add('Accept')
+    return response
+
+@app.route('/api/graph/layout/cache', methods=['GET'])
+def get_graph_layout_cache_stats():
+    """布局响应缓存的命中/未命中统计"""
+    return jsonify(dict(LAYOUT_CACHE.stats(), version=GRAPH_VERSION))
+
+
+# --- 增量更新 ---
+
+@app.route('/api/graph/ingest', methods=['POST'])
+def ingest_graph_batch():
+    """
+    对内存中的图应用一批节点/边的新增、修改、删除（格式见 graph_ingest），无需重新加载。
+    可选的 "version" 字段为客户端期望的当前图版本，不一致时返回 409。
+    成功后图版本前进一步，布局/元数据/graphRef 缓存随版本失效。
+    只作用于当前进程：多进程部署时应由单一写入进程负责更新（GRAPH_INGEST=0 时关闭）。
+    """
+    global GRAPH_VERSION
+    if FULL_NETWORKX_GRAPH is None:
+        return jsonify({"error": "Graph data is not available."}), 500
+    if not GRAPH_INGEST_ENABLED:
+        return jsonify({"error": "Graph ingestion is disabled (GRAPH_INGEST=0)."}), 409
+    if isinstance(FULL_NETWORKX_GRAPH, CSRGraph):
+        return jsonify({"error": "The CSR graph engine is read-only; use GRAPH_ENGINE=networkx to ingest updates."}), 409
+
+    batch = request.get_json(silent=True)
+    with GRAPH_LOCK.write():
+        expected_version = batch.get('version') if isinstance(batch, dict) else None
+        if expected_version and expected_version != GRAPH_VERSION:
+            return jsonify({"error": "Graph version mismatch", "current_version": GRAPH_VERSION}), 409
+        try:
+            summary = apply_batch(FULL_NETWORKX_GRAPH, GRAPH_INDEXES, NAME_INDEX, batch)
+        except IngestError as e:
+            return jsonify({"error": str(e), "current_version": GRAPH_VERSION}), e.status
+        previous_version = GRAPH_VERSION
+        GRAPH_VERSION = next_graph_version(previous_version, batch)
+        LAYOUT_CACHE.clear()
+        _RESOLVED_GRAPH_CACHE.clear()
+    app.logger.info(
+        f"已应用增量更新 {previous_version} -> {GRAPH_VERSION}。"
+        f"节点数: {FULL_NETWORKX_GRAPH.number_of_nodes()}, 边数: {FULL_NETWORKX_GRAPH.number_of_edges()}"
+    )
+    warm_layout_cache()
+    return jsonify(dict(summary, version=GRAPH_VERSION, previous_version=previous_version))
     
 if __name__ == '__main__':
     # 在第一次请求前加载数据
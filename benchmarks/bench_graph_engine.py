@@ -0,0 +1,117 @@
+# benchmarks/bench_graph_engine.py
+"""
+图引擎基准测试：networkx MultiDiGraph 与只读 CSRGraph 的内存占用与查询耗时对比。
+
+分别测量:
+- 内存:  tracemalloc 统计的图对象（networkx 由 JSON 构建；CSR 由快照内存映射打开，另列出 from_networkx 构建的结果）
+- 查询:  /api/graph/layout 各筛选用例（筛选 + 中心子图 + 流式 JSON 编码，不经过响应缓存）
+并校验两种引擎输出的节点与边内容一致（含取值类型：测试数据额外带有浮点属性，其中一部分是整数值，
+如 3.0 必须仍输出为 3.0 而不是 3）。
+
+用法:
+    python benchmarks/bench_graph_engine.py --data public/graph_processed.json [--scale 8]
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+from bench_extract_features import best_of  # noqa: E402
+from bench_graph_transport import CASES, write_scaled_processed_data  # noqa: E402
+from csr_graph import CSRGraph  # noqa: E402
+from graph_indexes import GraphIndexes  # noqa: E402
+from graph_snapshot import GraphSnapshot, build_graph_from_processed_data, write_snapshot_from_file  # noqa: E402
+
+
+def traced(func):
+    """返回 (结果, func 执行后仍保留的内存字节数)"""
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def add_float_attributes(filename):
+    """给节点与边加上浮点属性（一半取值为整数值的浮点数），用于校验 float64 列不会被还原成 int"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for i, node in enumerate(data['nodes']):
+        node['score'] = i % 8 / 2
+    for i, link in enumerate(data['links']):
+        link['weight'] = float(i % 3) + (0.25 if i % 2 else 0.0)
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def render_layout(request_data):
+    layout = app.canonicalize_layout_request(request_data)
+    graph, node_attrs, graph_attrs = app.build_graph_layout(layout)
+    return b''.join(app.iter_graph_for_d3(graph, node_attrs=node_attrs, graph_attrs=graph_attrs))
+
+
+def normalized(body):
+    graph = json.loads(body)
+    graph['nodes'].sort(key=lambda node: node['id'])
+    graph['links'].sort(key=lambda link: (link['source'], link['target'], link['key']))
+    # 重新序列化后比较，区分 3 与 3.0
+    return json.dumps(graph, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.path.join(ROOT, 'public', 'graph_processed.json'))
+    parser.add_argument('--scale', type=int, default=1, help='将图复制多少份')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    data_file = write_scaled_processed_data(args.data, args.scale)
+    add_float_attributes(data_file)
+    snapshot_dir = tempfile.mkdtemp()
+    snapshot_path = os.path.join(snapshot_dir, 'graph.snapshot')
+    try:
+        write_snapshot_from_file(data_file, snapshot_path)
+        with open(data_file, 'rb') as f:
+            data = json.loads(f.read())
+        networkx_graph, networkx_bytes = traced(lambda: build_graph_from_processed_data(data)[0])
+        csr_graph, csr_bytes = traced(lambda: CSRGraph.from_snapshot(GraphSnapshot(snapshot_path)))
+        _, csr_heap_bytes = traced(lambda: CSRGraph.from_networkx(networkx_graph))
+        del data
+
+        print(f"图规模: {networkx_graph.number_of_nodes()} 节点, {networkx_graph.number_of_edges()} 边 (scale={args.scale})")
+        print(f"内存: networkx {networkx_bytes / 1e6:.2f}MB, csr(快照) {csr_bytes / 1e6:.2f}MB, "
+              f"csr(from_networkx) {csr_heap_bytes / 1e6:.2f}MB")
+
+        results = {}
+        for engine, graph in (('networkx', networkx_graph), ('csr', csr_graph)):
+            app.FULL_NETWORKX_GRAPH = graph
+            app.GRAPH_INDEXES = GraphIndexes(graph)
+            app.NAME_INDEX = app.NameIndex(
+                (node_id, d.get('name'), d.get('Node Type')) for node_id, d in graph.nodes(data=True)
+            )
+            for name, payload in CASES.items():
+                elapsed, body = best_of(lambda: render_layout(payload), args.repeat)
+                results[engine, name] = (elapsed, normalized(body))
+
+        print(f"{'case':10} {'networkx':>10} {'csr':>10}")
+        for name in CASES:
+            networkx_time, expected = results['networkx', name]
+            csr_time, actual = results['csr', name]
+            assert expected == actual, f"{name}: 两种引擎的输出不一致"
+            print(f"{name:10} {networkx_time * 1000:8.2f}ms {csr_time * 1000:8.2f}ms")
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        os.remove(data_file)
+
+
+if __name__ == '__main__':
+    main()
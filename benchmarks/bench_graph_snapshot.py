@@ -0,0 +1,72 @@
+# benchmarks/bench_graph_snapshot.py
+"""
+图加载基准测试：解析 graph_processed.json 构建图 与 从二进制快照 (graph_snapshot) 加载 的耗时对比。
+
+分别测量:
+- json:      读取 JSON 文件 + json.loads + 逐条 add_node/add_edge
+- open:      打开快照（meta.json + 内存映射各 .npy 数组）
+- networkx:  打开快照并重建 MultiDiGraph
+并校验两种方式得到的图（节点顺序、邻接顺序、边键、属性）完全一致。
+
+用法:
+    python benchmarks/bench_graph_snapshot.py --data public/graph_processed.json [--scale 8]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_extract_features import best_of  # noqa: E402
+from bench_graph_transport import write_scaled_processed_data  # noqa: E402
+from graph_snapshot import GraphSnapshot, build_graph_from_processed_data, write_snapshot_from_file  # noqa: E402
+
+
+def load_json_graph(filename):
+    with open(filename, 'rb') as f:
+        return build_graph_from_processed_data(json.loads(f.read()))[0]
+
+
+def assert_same_graph(expected, actual):
+    assert list(expected.nodes(data=True)) == list(actual.nodes(data=True)), "节点不一致"
+    for node_id in expected:
+        assert list(expected._succ[node_id].items()) == list(actual._succ[node_id].items()), f"出边不一致: {node_id}"
+        assert list(expected._pred[node_id].items()) == list(actual._pred[node_id].items()), f"入边不一致: {node_id}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.path.join(ROOT, 'public', 'graph_processed.json'))
+    parser.add_argument('--scale', type=int, default=1, help='将图复制多少份')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    data_file = write_scaled_processed_data(args.data, args.scale) if args.scale > 1 else args.data
+    snapshot_dir = tempfile.mkdtemp()
+    snapshot_path = os.path.join(snapshot_dir, 'graph.snapshot')
+    try:
+        nodes, edges, version = write_snapshot_from_file(data_file, snapshot_path)
+        snapshot_bytes = sum(entry.stat().st_size for entry in os.scandir(snapshot_path))
+        print(f"图规模: {nodes} 节点, {edges} 边 (scale={args.scale}, version={version})")
+        print(f"JSON: {os.path.getsize(data_file)} 字节, 快照: {snapshot_bytes} 字节")
+
+        json_time, expected = best_of(lambda: load_json_graph(data_file), args.repeat)
+        open_time, _ = best_of(lambda: GraphSnapshot(snapshot_path), args.repeat)
+        networkx_time, actual = best_of(lambda: GraphSnapshot(snapshot_path).to_networkx(), args.repeat)
+        assert_same_graph(expected, actual)
+
+        print(f"{'json':10} {json_time * 1000:9.2f}ms")
+        print(f"{'open':10} {open_time * 1000:9.2f}ms")
+        print(f"{'networkx':10} {networkx_time * 1000:9.2f}ms")
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        if data_file != args.data:
+            os.remove(data_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+// benchmarks/bench_graph_transport.mjs
+// 浏览器端解码耗时对比：JSON.parse 与 decodeGraphBinary（在 Node 中运行）。
+// 先运行 python benchmarks/bench_graph_transport.py --out <目录> 生成响应体，然后:
+//     node benchmarks/bench_graph_transport.mjs <目录> [重复次数]
+import { readFileSync, readdirSync } from 'node:fs';
+import { join } from 'node:path';
+import { isDeepStrictEqual } from 'node:util';
+import { decodeGraphBinary } from '../src/services/graphBinary.js';
+
+const dir = process.argv[2];
+const repeat = Number(process.argv[3] || 20);
+if (!dir) {
+  console.error('用法: node benchmarks/bench_graph_transport.mjs <目录> [重复次数]');
+  process.exit(1);
+}
+
+function bestOf(fn) {
+  let best = Infinity;
+  let result;
+  for (let i = 0; i < repeat; i++) {
+    const start = performance.now();
+    result = fn();
+    best = Math.min(best, performance.now() - start);
+  }
+  return [best, result];
+}
+
+console.log(`${'case'.padEnd(10)} ${'json(KB)'.padStart(9)} ${'bin(KB)'.padStart(9)} ${'JSON.parse'.padStart(11)} ${'binary'.padStart(9)}`);
+for (const file of readdirSync(dir).filter(name => name.endsWith('.json')).sort()) {
+  const name = file.slice(0, -'.json'.length);
+  const jsonBytes = readFileSync(join(dir, file));
+  const binaryBytes = readFileSync(join(dir, `${name}.bin`));
+
+  const [jsonTime, graph] = bestOf(() => JSON.parse(new TextDecoder().decode(jsonBytes)));
+  const [binaryTime, decoded] = bestOf(() => decodeGraphBinary(binaryBytes));
+  if (!isDeepStrictEqual(decoded, graph)) {
+    throw new Error(`${name}: 二进制格式解码结果与 JSON 不一致`);
+  }
+
+  console.log(
+    `${name.padEnd(10)} ${(jsonBytes.length / 1024).toFixed(1).padStart(9)} ${(binaryBytes.length / 1024).toFixed(1).padStart(9)} ` +
+    `${jsonTime.toFixed(2).padStart(9)}ms ${binaryTime.toFixed(2).padStart(7)}ms`
+  );
+}
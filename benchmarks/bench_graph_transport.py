@@ -0,0 +1,95 @@
+# benchmarks/bench_graph_transport.py
+"""
+图数据传输格式基准测试：D3 JSON 与二进制格式 (graph_binary) 的体积与解码耗时对比。
+
+通过 Flask 测试客户端请求 /api/graph/layout（分别使用默认 Accept 和二进制 Accept 头），
+校验两种格式解码结果完全一致，并输出原始/gzip 体积以及 Python 端的解码耗时。
+指定 --out 时把响应体写入该目录，供 bench_graph_transport.mjs 测量浏览器端（Node）的解码耗时。
+
+用法:
+    python benchmarks/bench_graph_transport.py --data public/graph_processed.json [--scale 4] [--out /tmp/transport]
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+from bench_extract_features import best_of  # noqa: E402
+from graph_binary import MIMETYPE, decode_graph_binary  # noqa: E402
+
+CASES = {
+    'full': {'filters': {'timeRange': {'start': 1900, 'end': 2100}}},
+    'genre': {'filters': {'genre': ['Oceanus Folk', 'Dream Pop', 'Indie Folk']}},
+    'ego_2hop': {'centerNodeName': 'Sailor Shift', 'hopLevel': 2},
+    'ego_1hop': {'centerNodeName': 'Sailor Shift', 'hopLevel': 1},
+}
+
+
+def write_scaled_processed_data(filename, scale):
+    """读取 graph_processed.json 格式（nodes/links）的数据，复制 scale 份写入临时文件"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    offset = max(node['id'] for node in data['nodes']) + 1
+    nodes, links = [], []
+    for i in range(scale):
+        # 只有第一份保留原名称，保证中心节点名称唯一
+        suffix = f" #{i}" if i else ""
+        nodes.extend(dict(node, id=node['id'] + i * offset, name=node['name'] + suffix) for node in data['nodes'])
+        links.extend(dict(link, source=link['source'] + i * offset, target=link['target'] + i * offset) for link in data['links'])
+    fd, path = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'nodes': nodes, 'links': links}, f)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.path.join(ROOT, 'public', 'graph_processed.json'))
+    parser.add_argument('--scale', type=int, default=1, help='将图复制多少份')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', help='把响应体写入该目录，供 bench_graph_transport.mjs 使用')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    data_file = write_scaled_processed_data(args.data, args.scale) if args.scale > 1 else args.data
+    try:
+        app.load_graph_data(data_file)
+    finally:
+        if data_file != args.data:
+            os.remove(data_file)
+    G = app.FULL_NETWORKX_GRAPH
+    print(f"图规模: {G.number_of_nodes()} 节点, {G.number_of_edges()} 边 (scale={args.scale})")
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+
+    client = app.app.test_client()
+    print(f"{'case':10} {'nodes':>7} {'links':>7} {'json':>10} {'binary':>10} {'json.gz':>9} {'binary.gz':>9} "
+          f"{'json.loads':>11} {'binary解码':>10}")
+    for name, payload in CASES.items():
+        json_body = client.post('/api/graph/layout', json=payload).get_data()
+        binary_body = client.post('/api/graph/layout', json=payload, headers={'Accept': MIMETYPE}).get_data()
+
+        json_time, graph = best_of(lambda: json.loads(json_body), args.repeat)
+        binary_time, decoded = best_of(lambda: decode_graph_binary(binary_body), args.repeat)
+        assert decoded == graph, f"{name}: 二进制格式解码结果与 JSON 不一致"
+
+        print(f"{name:10} {len(graph['nodes']):7d} {len(graph['links']):7d} {len(json_body):10d} {len(binary_body):10d} "
+              f"{len(gzip.compress(json_body)):9d} {len(gzip.compress(binary_body)):9d} "
+              f"{json_time * 1000:9.2f}ms {binary_time * 1000:8.2f}ms")
+
+        if args.out:
+            with open(os.path.join(args.out, f'{name}.json'), 'wb') as f:
+                f.write(json_body)
+            with open(os.path.join(args.out, f'{name}.bin'), 'wb') as f:
+                f.write(binary_body)
+
+
+if __name__ == '__main__':
+    main()
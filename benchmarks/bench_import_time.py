@@ -0,0 +1,73 @@
+# benchmarks/bench_import_time.py
+"""
+服务启动开销基准测试：在全新的子进程中分别测量各运行模式的导入耗时与常驻内存。
+
+分别测量:
+- query:        APP_MODE=query，import app（从不导入预测流水线）
+- full:         import app（预测流水线延迟到第一次 /predict 时导入）
+- full+predict: import app 后立即导入预测流水线，即第一次 /predict 前的总开销
+- prediction:   单独 import prediction（异步预测任务工作进程的启动开销）
+指定 --data 时额外测量 load_graph_data 的耗时。每种模式重复 --repeat 次取最小耗时，内存为进程峰值 RSS。
+
+用法:
+    python benchmarks/bench_import_time.py [--repeat 5] [--data public/graph_processed.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'query': ({'APP_MODE': 'query'}, 'import app'),
+    'full': ({'APP_MODE': 'full'}, 'import app'),
+    'full+predict': ({'APP_MODE': 'full'}, 'import app; app.prediction_module()'),
+    'prediction': ({}, 'import prediction'),
+}
+
+# 子进程中执行：计时并输出 JSON（耗时、加载图耗时、峰值 RSS、是否导入了 torch）
+CHILD = """
+import json, logging, resource, sys, time
+start = time.perf_counter()
+{statement}
+import_time = time.perf_counter() - start
+load_time = None
+if {data!r} and 'app' in sys.modules:
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    app.load_graph_data({data!r})
+    load_time = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'import': import_time, 'load': load_time, 'rss_kb': rss, 'torch': 'torch' in sys.modules}}))
+"""
+
+
+def measure(env_overrides, statement, data):
+    env = dict(os.environ, **env_overrides)
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD.format(statement=statement, data=data)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--data', default=None, help='同时测量加载该图数据文件的耗时')
+    args = parser.parse_args()
+    data = os.path.abspath(args.data) if args.data else None
+
+    print(f"{'mode':14} {'import':>9} {'load_graph':>11} {'峰值RSS':>10} {'torch':>6}")
+    for name, (env_overrides, statement) in MODES.items():
+        runs = [measure(env_overrides, statement, data) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run['import'])
+        load = min(run['load'] for run in runs) if best['load'] is not None else None
+        load_column = f"{load * 1000:9.1f}ms" if load is not None else f"{'-':>11}"
+        print(f"{name:14} {best['import'] * 1000:7.1f}ms {load_column} {best['rss_kb'] / 1024:8.1f}MB {str(best['torch']):>6}")
+
+
+if __name__ == '__main__':
+    main()
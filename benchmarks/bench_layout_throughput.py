@@ -0,0 +1,166 @@
+# benchmarks/bench_layout_throughput.py
+"""
+多进程服务吞吐量基准测试：以不同的工作进程数启动 gunicorn（gunicorn.conf.py + wsgi.py，preload 共享图），
+由多个客户端进程并发请求 /api/graph/layout，统计吞吐量与延迟随核数的扩展情况。
+
+默认关闭布局响应缓存 (LAYOUT_CACHE_SIZE=0)，每个请求都完整执行筛选、中心子图与 JSON 编码。
+Linux 下同时读取各工作进程的 /proc/<pid>/smaps_rollup，报告总 PSS 与每个工作进程的私有内存，
+用于观察 fork 后写时复制共享的效果。
+
+用法:
+    python benchmarks/bench_layout_throughput.py --data public/graph_processed.json [--workers 1,2,4] [--duration 10]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def wait_until_ready(port, process, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn 已退出 (returncode={process.returncode})")
+        try:
+            if request(port, 'GET', '/api/graph/meta') == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError("gunicorn 启动超时")
+
+
+def client_loop(port, bodies, duration, offset):
+    """客户端进程：在 duration 秒内轮流发送各用例的请求，返回每个请求的延迟（秒）"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+    i = offset
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        status = request(port, 'POST', '/api/graph/layout', bodies[i % len(bodies)])
+        if status != 200:
+            raise RuntimeError(f"HTTP {status}")
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    return latencies
+
+
+def worker_memory(master_pid):
+    """返回 (工作进程 PSS 总和, 每个工作进程私有内存的平均值)，单位字节；无法读取时返回 None"""
+    try:
+        with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+            pids = [int(pid) for pid in f.read().split()]
+        pss = private = 0
+        for pid in pids:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                fields = dict(line.split(':', 1) for line in f if ':' in line and not line.startswith(' '))
+            kb = {name: int(value.split()[0]) for name, value in fields.items() if value.strip().endswith('kB')}
+            pss += kb.get('Pss', 0) * 1024
+            private += (kb.get('Private_Clean', 0) + kb.get('Private_Dirty', 0)) * 1024
+        return pss, private / len(pids)
+    except (OSError, ValueError, ZeroDivisionError):
+        return None
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(workers, clients, data_file, duration, bodies, env_overrides):
+    port = free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), GRAPH_DATA_PATH=data_file, **env_overrides)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--log-level', 'warning', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(port, process)
+        # 预热：每个用例先请求一轮
+        for body in bodies:
+            request(port, 'POST', '/api/graph/layout', body)
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(clients) as pool:
+            start = time.perf_counter()
+            results = pool.starmap(client_loop, [(port, bodies, duration, i) for i in range(clients)])
+            elapsed = time.perf_counter() - start
+        memory = worker_memory(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    latencies = [latency for result in results for latency in result]
+    return len(latencies) / elapsed, latencies, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.path.join(ROOT, 'public', 'graph_processed.json'))
+    parser.add_argument('--scale', type=int, default=1, help='将图复制多少份')
+    parser.add_argument('--workers', default=None, help='逗号分隔的工作进程数列表（默认 1,2,4,... 直到 CPU 核数）')
+    parser.add_argument('--clients-per-worker', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10, help='每种配置的压测时长（秒）')
+    parser.add_argument('--engine', choices=('networkx', 'csr'), default='networkx')
+    parser.add_argument('--cache', action='store_true', help='保留布局响应缓存（默认关闭以测量完整处理开销）')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from bench_graph_transport import CASES, write_scaled_processed_data
+
+    cpus = multiprocessing.cpu_count()
+    if args.workers:
+        worker_counts = [int(n) for n in args.workers.split(',')]
+    else:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cpus:
+            worker_counts.append(worker_counts[-1] * 2)
+    env_overrides = {'GRAPH_ENGINE': args.engine}
+    if not args.cache:
+        env_overrides['LAYOUT_CACHE_SIZE'] = '0'
+    bodies = [json.dumps(payload) for payload in CASES.values()]
+
+    data_file = write_scaled_processed_data(args.data, args.scale) if args.scale > 1 else os.path.abspath(args.data)
+    try:
+        print(f"CPU 核数: {cpus}, 引擎: {args.engine}, 缓存: {'开' if args.cache else '关'}, 用例: {', '.join(CASES)}")
+        print(f"{'workers':>7} {'clients':>7} {'req/s':>9} {'加速比':>7} {'p50':>9} {'p95':>9} {'PSS总和':>10} {'私有/进程':>10}")
+        baseline = None
+        for workers in worker_counts:
+            clients = workers * args.clients_per_worker
+            throughput, latencies, memory = run(workers, clients, data_file, args.duration, bodies, env_overrides)
+            baseline = baseline or throughput
+            memory_columns = (
+                f"{memory[0] / 1e6:8.1f}MB {memory[1] / 1e6:8.1f}MB" if memory else f"{'-':>10} {'-':>10}"
+            )
+            print(f"{workers:>7} {clients:>7} {throughput:9.1f} {throughput / baseline:6.2f}x "
+                  f"{percentile(latencies, 0.5) * 1000:7.1f}ms {percentile(latencies, 0.95) * 1000:7.1f}ms {memory_columns}")
+    finally:
+        if data_file != os.path.abspath(args.data):
+            os.remove(data_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_prepare_hetero.py
+"""
+prepare_hetero_graph_data 回归基准测试（只计时构建 HeteroData 这一阶段）。
+
+对比旧版基于 list.index / `in list` 的逐边构建方式与当前基于查找表的
+向量化实现，并校验生成的 edge_index 完全一致。
+
+用法:
+    python benchmarks/bench_prepare_hetero.py [--scale 4] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+
+import torch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import prediction  # noqa: E402
+from bench_extract_features import best_of, load_scaled_graph_data  # noqa: E402
+
+EDGE_INDEX_NAMES = [
+    'artist_collaborates_artist_edge_index',
+    'work_influences_work_edge_index',
+    'artist_creates_work_edge_index',
+    'work_created_by_artist_edge_index'
+]
+
+
+def legacy_edge_indexes(G, artist_nodes, work_nodes):
+    """旧实现：每条边都在列表中做成员判断和 index 查找，O(E x N)"""
+    result = {}
+
+    collab_edges = []
+    for src, tgt, edge_data in G.edges(data=True):
+        if (edge_data['relationship'] == 'MemberOf' and
+                src in artist_nodes and tgt in artist_nodes):
+            src_idx = artist_nodes.index(src)
+            tgt_idx = artist_nodes.index(tgt)
+            collab_edges.append([src_idx, tgt_idx])
+            collab_edges.append([tgt_idx, src_idx])
+    if collab_edges:
+        result[EDGE_INDEX_NAMES[0]] = torch.tensor(collab_edges, dtype=torch.long).t().contiguous()
+
+    influence_edges = []
+    influence_relations = [
+        'InStyleOf', 'CoverOf', 'DirectlySamples',
+        'InterpolatesFrom', 'LyricalReferenceTo'
+    ]
+    for src, tgt, edge_data in G.edges(data=True):
+        if (edge_data['relationship'] in influence_relations and
+                src in work_nodes and tgt in work_nodes):
+            influence_edges.append([work_nodes.index(src), work_nodes.index(tgt)])
+    if influence_edges:
+        result[EDGE_INDEX_NAMES[1]] = torch.tensor(influence_edges, dtype=torch.long).t().contiguous()
+
+    creates_edges = []
+    created_by_edges = []
+    for src, tgt, edge_data in G.edges(data=True):
+        if (edge_data['relationship'] in ['PerformerOf', 'ComposerOf', 'LyricistOf'] and
+                src in artist_nodes and tgt in work_nodes):
+            artist_idx = artist_nodes.index(src)
+            work_idx = work_nodes.index(tgt)
+            creates_edges.append([artist_idx, work_idx])
+            created_by_edges.append([work_idx, artist_idx])
+    if creates_edges:
+        result[EDGE_INDEX_NAMES[2]] = torch.tensor(creates_edges, dtype=torch.long).t().contiguous()
+        result[EDGE_INDEX_NAMES[3]] = torch.tensor(created_by_edges, dtype=torch.long).t().contiguous()
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.path.join(ROOT, 'public', 'Oceanus.json'))
+    parser.add_argument('--scale', type=int, default=1, help='将图复制多少份')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    data = load_scaled_graph_data(args.data, args.scale)
+    G, node_mapping, _ = prediction.build_knowledge_graph(data)
+    print(f"图规模: {G.number_of_nodes()} 节点, {G.number_of_edges()} 边 (scale={args.scale})")
+
+    artist_features_dict = prediction.extract_artist_features(G, node_mapping, None)
+    weights = [0.125] * 8
+
+    hetero_time, hetero_data = best_of(
+        lambda: prediction.prepare_hetero_graph_data(G, artist_features_dict, node_mapping, weights), args.repeat
+    )
+
+    artist_nodes = list(hetero_data['artist'].node_id)
+    work_nodes = list(hetero_data['work'].node_id)
+    legacy_time, legacy = best_of(lambda: legacy_edge_indexes(G, artist_nodes, work_nodes), args.repeat)
+
+    for name in EDGE_INDEX_NAMES:
+        assert hasattr(hetero_data, name) == (name in legacy), f"{name} 是否存在不一致"
+        if name in legacy:
+            assert torch.equal(getattr(hetero_data, name), legacy[name]), f"{name} 内容不一致"
+
+    print(f"艺术家节点: {len(artist_nodes)}, 作品节点: {len(work_nodes)}")
+    print(f"旧版逐边构建 edge_index:         {legacy_time * 1000:9.2f} ms")
+    print(f"prepare_hetero_graph_data 总耗时: {hetero_time * 1000:9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_rescore.py
+"""
+快速重新评分基准测试：调整 weightPreferences 时，完整预测流程 (run_prediction) 与
+快速路径 (run_fast_prediction，缓存特征矩阵与基础模型，只重算标签并微调少量 epoch) 的耗时对比。
+
+分别测量（对一组随机的偏好排序）:
+- full:  run_prediction（每次使用独立的空模型注册表，即权重优化 + 完整训练）
+- cold:  第一次为该图构建快速评分缓存（特征、网格搜索输入、SHAP、基础模型）
+- fast:  缓存命中后的 run_fast_prediction
+并校验快速路径选出的权重与 optimize_weights 一致，报告两者前五名艺术家的重合数量。
+
+用法:
+    python benchmarks/bench_rescore.py [--scale 4] [--orders 10] [--epochs 20]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import prediction  # noqa: E402
+from bench_extract_features import load_scaled_graph_data  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+
+def timed(func):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+    return time.perf_counter() - start, result
+
+
+def top_ids(report):
+    return {artist['id'] for artist in report['top_artists']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.path.join(ROOT, 'public', 'Oceanus.json'))
+    parser.add_argument('--scale', type=int, default=1, help='将图复制多少份')
+    parser.add_argument('--orders', type=int, default=10, help='随机偏好排序的数量')
+    parser.add_argument('--epochs', type=int, default=prediction.FAST_FINE_TUNE_EPOCHS, help='快速路径的微调 epoch 数')
+    args = parser.parse_args()
+
+    graph_data = load_scaled_graph_data(args.data, args.scale)
+    rng = random.Random(0)
+    orders = [rng.sample(prediction.DEFAULT_WEIGHT_PREFS, len(prediction.DEFAULT_WEIGHT_PREFS)) for _ in range(args.orders)]
+    registry_dir = tempfile.mkdtemp()
+    prediction.MODEL_REGISTRY = ModelRegistry(registry_dir)
+    try:
+        print(f"图规模: {len(graph_data['nodes'])} 节点, {len(graph_data['edges'])} 边 (scale={args.scale})")
+        cold_time, context = timed(lambda: prediction.scoring_context(graph_data))
+        print(f"cold: {cold_time * 1000:.1f}ms（构建缓存，含基础模型训练）")
+
+        full_times, fast_times, overlaps = [], [], []
+        for order in orders:
+            with contextlib.redirect_stdout(io.StringIO()):
+                expected_weights = prediction.optimize_weights(context.artist_features_dict, order)
+                assert context.select_weights(order) == expected_weights, f"{order}: 权重选择不一致"
+            fast_time, fast_report = timed(lambda: prediction.run_fast_prediction(graph_data, order, epochs=args.epochs))
+            # 完整流程每次使用空的注册表，避免命中缓存
+            prediction.MODEL_REGISTRY = ModelRegistry(tempfile.mkdtemp(dir=registry_dir))
+            full_time, full_report = timed(lambda: prediction.run_prediction(graph_data, order))
+            fast_times.append(fast_time)
+            full_times.append(full_time)
+            overlaps.append(len(top_ids(fast_report) & top_ids(full_report)))
+
+        mean = lambda values: sum(values) / len(values)
+        print(f"{'full':6} {mean(full_times) * 1000:9.1f}ms / 次")
+        print(f"{'fast':6} {mean(fast_times) * 1000:9.1f}ms / 次 (最大 {max(fast_times) * 1000:.1f}ms, "
+              f"{args.epochs} epoch 微调), 加速比 {mean(full_times) / mean(fast_times):.1f}x")
+        print(f"前五名重合: 平均 {mean(overlaps):.1f} / 5")
+    finally:
+        shutil.rmtree(registry_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_time_filter.py
+"""
+时间筛选基准测试：拖动时间范围时，逐个遍历作品邻居 (nodes_with_works) 与合并年份分区
+(GraphIndexes.nodes_in_year_range) 计算可见节点的耗时对比，并测量完整的 /api/graph/layout 请求。
+
+分别测量（对一组随机年份区间取平均，结果逐一校验一致）:
+- scan:       works_in_year_range + nodes_with_works
+- partitions: nodes_in_year_range（首次构建分区的耗时单独列出）
+- layout:     前端拖动时间范围时发送的请求（以 Sailor Shift 为中心 / 无中心全图），不经过响应缓存
+
+用法:
+    python benchmarks/bench_time_filter.py --data public/graph_processed.json [--scale 8] [--ranges 50]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+from bench_graph_transport import write_scaled_processed_data  # noqa: E402
+
+
+def mean_time(func, items):
+    start = time.perf_counter()
+    results = [func(item) for item in items]
+    return (time.perf_counter() - start) / len(items), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.path.join(ROOT, 'public', 'graph_processed.json'))
+    parser.add_argument('--scale', type=int, default=1, help='将图复制多少份')
+    parser.add_argument('--ranges', type=int, default=50, help='随机年份区间的数量')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    data_file = write_scaled_processed_data(args.data, args.scale) if args.scale > 1 else args.data
+    try:
+        app.load_graph_data(data_file)
+    finally:
+        if data_file != args.data:
+            os.remove(data_file)
+    G, indexes = app.FULL_NETWORKX_GRAPH, app.GRAPH_INDEXES
+    print(f"图规模: {G.number_of_nodes()} 节点, {G.number_of_edges()} 边 (scale={args.scale})")
+
+    rng = random.Random(0)
+    first, last = indexes.work_years[0], indexes.work_years[-1]
+    ranges = [tuple(sorted((rng.randint(first, last), rng.randint(first, last)))) for _ in range(args.ranges)]
+    genre_ranges = [(start, end, rng.sample(indexes.genres, 3)) for start, end in ranges]
+
+    indexes._year_partitions = None
+    start = time.perf_counter()
+    indexes.year_partitions()
+    build_time = time.perf_counter() - start
+
+    cases = {
+        'time': (
+            lambda r: indexes.nodes_with_works(indexes.works_in_year_range(*r)),
+            lambda r: indexes.nodes_in_year_range(*r),
+            ranges,
+        ),
+        'time+genre': (
+            lambda r: indexes.nodes_with_works(indexes.works_in_year_range(r[0], r[1]) & indexes.works_in_genres(r[2])),
+            lambda r: indexes.nodes_in_year_range(r[0], r[1], r[2]),
+            genre_ranges,
+        ),
+    }
+    print(f"分区构建: {build_time * 1000:.2f}ms")
+    print(f"{'case':12} {'scan':>10} {'partitions':>11} {'加速比':>7}")
+    for name, (scan, merge, items) in cases.items():
+        scan_time, expected = mean_time(scan, items)
+        merge_time, actual = mean_time(merge, items)
+        assert expected == actual, f"{name}: 两种方式的结果不一致"
+        print(f"{name:12} {scan_time * 1000:8.3f}ms {merge_time * 1000:9.3f}ms {scan_time / merge_time:6.1f}x")
+
+    app.LAYOUT_CACHE.max_entries = 0
+    client = app.app.test_client()
+    for name, center in (('layout/ego', app.DEFAULT_CENTER_NODE_NAME), ('layout/full', None)):
+        payloads = [
+            {'centerNodeName': center, 'hopLevel': 1, 'maxNodes': 1500, 'filters': {'timeRange': {'start': s, 'end': e}}}
+            for s, e in ranges
+        ]
+        elapsed, _ = mean_time(lambda payload: client.post('/api/graph/layout', json=payload).get_data(), payloads)
+        print(f"{name:12} {elapsed * 1000:8.2f}ms / 请求")
+
+
+if __name__ == '__main__':
+    main()
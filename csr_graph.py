@@ -0,0 +1,476 @@
+# csr_graph.py
+"""
+只读的 CSR 图引擎，可替代静态的 FULL_NETWORKX_GRAPH 服务查询接口。
+
+- 邻接: 出/入边各一组 CSR 数组（offsets + 边号），组内顺序与 networkx 的邻接遍历一致；
+  edge_src / edge_dst 为每条边的源/目标节点下标
+- 属性: 每个节点/边属性一列（编码方式与 graph_binary 相同：整数/布尔为数值数组，
+  低基数字符串为字典编码，其余为指向共享字符串表的下标），只在访问时解码
+- 视图: subgraph / subgraph_view 返回共享底层数组的视图，只额外保存节点/边掩码
+- 邻域扩展: hop_layers 以整层前沿为单位批量展开邻居（可限定方向与边类型）
+
+对外提供与 networkx MultiDiGraph 兼容的只读子集（nodes / edges / successors / predecessors /
+has_node / get_edge_data / subgraph 等），图的序列化、属性索引与各查询接口无需区分引擎。
+节点与边的遍历顺序与同一数据构建的 MultiDiGraph 相同。
+"""
+import json
+
+import numpy as np
+
+from graph_binary import MISSING, StringTable, decode_column, encode_column, rows_to_columns
+
+# 按批解码属性行，避免一次性为整张图构建全部属性字典
+BATCH_SIZE = 4096
+
+
+class _Column:
+    """一列节点/边属性：列描述 + 取值数组 + 可选的存在标记"""
+
+    def __init__(self, name, descriptor, array, present, strings):
+        self.name = name
+        self.descriptor = descriptor
+        self.array = array
+        self.present = present
+        self.strings = strings
+
+    @classmethod
+    def encode(cls, name, values, table):
+        descriptor, array, present = encode_column(values, table.string_id)
+        return cls(name, descriptor, array, present, table.strings)
+
+    def values(self, positions):
+        """positions 处的取值列表（缺失为 MISSING）"""
+        present = self.present[positions] if self.present is not None else None
+        return decode_column(self.descriptor, self.array[positions], present, self.strings)
+
+    def value(self, position):
+        if self.present is not None and not self.present[position]:
+            return MISSING
+        raw = self.array[position].item()
+        kind = self.descriptor['kind']
+        if kind in ('dict8', 'dict16'):
+            return self.descriptor['dictionary'][raw]
+        if kind == 'str':
+            return self.strings[raw]
+        if kind == 'json':
+            return json.loads(self.strings[raw])
+        if kind == 'bool':
+            return bool(raw)
+        return raw
+
+    def mask_of(self, wanted):
+        """取值属于 wanted 的行的布尔掩码"""
+        kind = self.descriptor['kind']
+        if kind in ('dict8', 'dict16'):
+            dictionary = self.descriptor['dictionary']
+            codes = [i for i, value in enumerate(dictionary) if value in wanted]
+            mask = np.isin(self.array, codes)
+        else:
+            mask = np.fromiter(
+                (value is not MISSING and value in wanted for value in self.values(slice(None))),
+                dtype=bool, count=len(self.array)
+            )
+        if self.present is not None:
+            mask &= self.present.astype(bool)
+        return mask
+
+
+def _rows(columns, positions):
+    """positions 处的属性字典列表"""
+    rows = [{} for _ in range(len(positions))]
+    for column in columns:
+        name = column.name
+        for row, value in zip(rows, column.values(positions)):
+            if value is not MISSING:
+                row[name] = value
+    return rows
+
+
+def _gather(offsets, edges, positions):
+    """positions 中各节点的 CSR 分组依次拼接后的边号"""
+    starts = offsets[positions]
+    counts = offsets[positions + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return edges[:0]
+    shifts = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return edges[np.arange(total) + shifts]
+
+
+class CSRNodeView:
+    """仿 networkx NodeView：可迭代、可按节点ID取属性，也可调用 nodes(data=True)"""
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __iter__(self):
+        return iter(self._graph)
+
+    def __len__(self):
+        return len(self._graph)
+
+    def __contains__(self, node_id):
+        return self._graph.has_node(node_id)
+
+    def __getitem__(self, node_id):
+        graph = self._graph
+        position = graph._position(node_id)
+        attrs = {}
+        for column in graph._node_columns:
+            value = column.value(position)
+            if value is not MISSING:
+                attrs[column.name] = value
+        return attrs
+
+    def __call__(self, data=False, default=None):
+        """data=True 时产出 (节点ID, 属性字典)；data 为属性名时产出 (节点ID, 属性值或 default)"""
+        graph = self._graph
+        if data is False:
+            return iter(graph)
+        if data is True:
+            return graph._iter_nodes_with_data()
+        return graph._iter_node_attribute(data, default)
+
+
+class CSRGraph:
+    """
+    不可变的有向多重图。通过 from_networkx / from_snapshot 构建；
+    视图与原图共享全部数组，只在 _node_mask / _edge_mask 中记录可见的节点和边。
+    """
+
+    def __init__(self, node_ids, node_columns, edge_src, edge_dst, edge_key, edge_columns,
+                 out_offsets, out_edges, in_offsets, in_edges, graph=None):
+        self.graph = dict(graph or {})
+        self._node_ids = node_ids
+        self._node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+        self._node_columns = node_columns
+        self._edge_src = edge_src
+        self._edge_dst = edge_dst
+        self._edge_key = edge_key
+        self._edge_columns = edge_columns
+        self._out_offsets = out_offsets
+        self._out_edges = out_edges
+        self._in_offsets = in_offsets
+        self._in_edges = in_edges
+        self._node_mask = None
+        self._edge_mask = None
+        self._neighbor_lists = None
+        self._positions = None
+        self._edge_positions = None
+
+    # --- 构建 ---
+
+    @classmethod
+    def from_networkx(cls, G):
+        """由 MultiDiGraph 构建；边号为 G.edges() 的遍历顺序"""
+        node_ids = list(G)
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        table = StringTable()
+        node_columns = [
+            _Column.encode(name, values, table)
+            for name, values in rows_to_columns([attrs for _, attrs in G.nodes(data=True)]).items()
+        ]
+
+        edges = list(G.edges(keys=True, data=True))
+        edge_src = np.fromiter((index[u] for u, _, _, _ in edges), dtype=np.int32, count=len(edges))
+        edge_dst = np.fromiter((index[v] for _, v, _, _ in edges), dtype=np.int32, count=len(edges))
+        edge_key = _Column.encode(None, [key for _, _, key, _ in edges], table)
+        edge_columns = [
+            _Column.encode(name, values, table)
+            for name, values in rows_to_columns([attrs for _, _, _, attrs in edges]).items()
+        ]
+
+        edge_position = {(u, v, key): i for i, (u, v, key, _) in enumerate(edges)}
+        in_edges = np.fromiter(
+            (edge_position[edge] for edge in G.in_edges(keys=True)), dtype=np.int32, count=len(edges)
+        )
+        return cls(
+            node_ids, node_columns, edge_src, edge_dst, edge_key, edge_columns,
+            _offsets(edge_src, len(node_ids)), np.arange(len(edges), dtype=np.int32),
+            _offsets(edge_dst, len(node_ids)), in_edges,
+            graph=G.graph
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """直接使用快照的内存映射数组（graph_snapshot.GraphSnapshot），不复制邻接与属性数据"""
+        meta = snapshot.meta
+
+        def column(descriptor):
+            present = snapshot.array(descriptor['present_file']) if 'present_file' in descriptor else None
+            return _Column(descriptor['name'], descriptor, snapshot.array(descriptor['file']), present, snapshot.strings)
+
+        return cls(
+            snapshot.node_keys,
+            [column(descriptor) for descriptor in meta['node_columns']],
+            snapshot.edge_src, snapshot.edge_dst,
+            column(meta['edge_key']),
+            [column(descriptor) for descriptor in meta['edge_columns']],
+            snapshot.out_offsets, snapshot.out_edges, snapshot.in_offsets, snapshot.in_edges,
+            graph=meta['graph']
+        )
+
+    def _view(self, node_mask, edge_mask):
+        view = object.__new__(CSRGraph)
+        view.__dict__.update(self.__dict__)
+        view._node_mask = node_mask
+        view._edge_mask = edge_mask
+        view._positions = None
+        view._edge_positions = None
+        return view
+
+    # --- networkx 兼容的只读接口 ---
+
+    def is_directed(self):
+        return True
+
+    def is_multigraph(self):
+        return True
+
+    @property
+    def nodes(self):
+        return CSRNodeView(self)
+
+    def _position(self, node_id):
+        position = self._node_index.get(node_id)
+        if position is None or (self._node_mask is not None and not self._node_mask[position]):
+            raise KeyError(node_id)
+        return position
+
+    def has_node(self, node_id):
+        position = self._node_index.get(node_id)
+        return position is not None and (self._node_mask is None or bool(self._node_mask[position]))
+
+    __contains__ = has_node
+
+    def node_positions(self):
+        """可见节点的下标（按节点顺序）"""
+        if self._positions is None:
+            if self._node_mask is None:
+                self._positions = np.arange(len(self._node_ids))
+            else:
+                self._positions = np.flatnonzero(self._node_mask)
+        return self._positions
+
+    def edge_positions(self):
+        """可见边的边号（按 networkx 的 edges() 遍历顺序）"""
+        if self._edge_positions is None:
+            edges = self._out_edges
+            if self._node_mask is not None or self._edge_mask is not None:
+                edges = edges[self._edge_visible(edges)]
+            self._edge_positions = edges
+        return self._edge_positions
+
+    def _edge_visible(self, edges, edge_mask=None):
+        """edges 中可见的边（edge_mask 为额外叠加的边掩码）"""
+        keep = np.ones(len(edges), dtype=bool)
+        if self._node_mask is not None:
+            keep &= self._node_mask[self._edge_src[edges]]
+            keep &= self._node_mask[self._edge_dst[edges]]
+        if self._edge_mask is not None:
+            keep &= self._edge_mask[edges]
+        if edge_mask is not None:
+            keep &= edge_mask[edges]
+        return keep
+
+    def _visible_counts(self, offsets, edges, positions):
+        """positions 中各节点在 CSR 分组内的可见边数"""
+        group = _gather(offsets, edges, positions)
+        owner = np.repeat(np.arange(len(positions)), offsets[positions + 1] - offsets[positions])
+        return np.bincount(owner[self._edge_visible(group)], minlength=len(positions))
+
+    def __iter__(self):
+        if self._node_mask is None:
+            return iter(self._node_ids)
+        node_ids = self._node_ids
+        return (node_ids[i] for i in self.node_positions().tolist())
+
+    def __len__(self):
+        return len(self.node_positions())
+
+    def number_of_nodes(self):
+        return len(self)
+
+    def number_of_edges(self):
+        return len(self.edge_positions())
+
+    def _iter_node_attribute(self, name, default):
+        nodes = list(self)
+        for column in self._node_columns:
+            if column.name == name:
+                values = column.values(self.node_positions())
+                return zip(nodes, (default if value is MISSING else value for value in values))
+        return ((node_id, default) for node_id in nodes)
+
+    def _iter_nodes_with_data(self):
+        node_ids = self._node_ids
+        positions = self.node_positions()
+        for start in range(0, len(positions), BATCH_SIZE):
+            batch = positions[start:start + BATCH_SIZE]
+            yield from zip((node_ids[i] for i in batch.tolist()), _rows(self._node_columns, batch))
+
+    def _iter_edges(self, edges, keys, data):
+        node_ids = self._node_ids
+        for start in range(0, len(edges), BATCH_SIZE):
+            batch = edges[start:start + BATCH_SIZE]
+            columns = [
+                [node_ids[i] for i in self._edge_src[batch].tolist()],
+                [node_ids[i] for i in self._edge_dst[batch].tolist()],
+            ]
+            if keys:
+                columns.append(self._edge_key.values(batch))
+            if data:
+                columns.append(_rows(self._edge_columns, batch))
+            yield from zip(*columns)
+
+    def edges(self, keys=False, data=False):
+        """按 networkx 的顺序遍历边：(u, v[, key][, data])"""
+        return self._iter_edges(self.edge_positions(), keys, data)
+
+    def in_edges(self, keys=False, data=False):
+        """按 networkx 的顺序遍历入边（按目标节点分组）"""
+        edges = _gather(self._in_offsets, self._in_edges, self.node_positions())
+        if self._node_mask is not None or self._edge_mask is not None:
+            edges = edges[self._edge_visible(edges)]
+        return self._iter_edges(edges, keys, data)
+
+    def _build_neighbor_lists(self):
+        """原图的邻居ID列表（Python 列表，按 CSR 顺序），用于无掩码时的快速邻居查询"""
+        if self._neighbor_lists is None:
+            node_ids = self._node_ids
+            self._neighbor_lists = (
+                self._out_offsets.tolist(),
+                [node_ids[i] for i in self._edge_dst[self._out_edges].tolist()],
+                self._in_offsets.tolist(),
+                [node_ids[i] for i in self._edge_src[self._in_edges].tolist()],
+            )
+        return self._neighbor_lists
+
+    def _neighbors(self, node_id, outgoing):
+        position = self._position(node_id)
+        if self._node_mask is None and self._edge_mask is None:
+            out_offsets, out_ids, in_offsets, in_ids = self._build_neighbor_lists()
+            offsets, ids = (out_offsets, out_ids) if outgoing else (in_offsets, in_ids)
+            return iter(dict.fromkeys(ids[offsets[position]:offsets[position + 1]]))
+
+        offsets, edges, ends = (
+            (self._out_offsets, self._out_edges, self._edge_dst) if outgoing
+            else (self._in_offsets, self._in_edges, self._edge_src)
+        )
+        group = edges[offsets[position]:offsets[position + 1]]
+        group = group[self._edge_visible(group)]
+        node_ids = self._node_ids
+        return iter(dict.fromkeys(node_ids[i] for i in ends[group].tolist()))
+
+    def successors(self, node_id):
+        return self._neighbors(node_id, outgoing=True)
+
+    def predecessors(self, node_id):
+        return self._neighbors(node_id, outgoing=False)
+
+    def get_edge_data(self, u, v, key=None, default=None):
+        """与 MultiDiGraph.get_edge_data 相同：key 为 None 时返回 {key: 属性}，否则返回该边的属性"""
+        if not self.has_node(u) or not self.has_node(v):
+            return default
+        position, target = self._node_index[u], self._node_index[v]
+        group = self._out_edges[self._out_offsets[position]:self._out_offsets[position + 1]]
+        group = group[self._edge_dst[group] == target]
+        if self._edge_mask is not None:
+            group = group[self._edge_mask[group]]
+        keydict = {}
+        for edge in group.tolist():
+            edge_key = self._edge_key.value(edge)
+            if key is None or edge_key == key:
+                attrs = {}
+                for column in self._edge_columns:
+                    value = column.value(edge)
+                    if value is not MISSING:
+                        attrs[column.name] = value
+                if key is not None:
+                    return attrs
+                keydict[edge_key] = attrs
+        return keydict if keydict else default
+
+    # --- 视图 ---
+
+    def _mask_of_nodes(self, nodes):
+        mask = np.zeros(len(self._node_ids), dtype=bool)
+        index = self._node_index
+        mask[[index[n] for n in nodes if n in index]] = True
+        if self._node_mask is not None:
+            mask &= self._node_mask
+        return mask
+
+    def subgraph(self, nodes):
+        """nodes 的导出子图视图（保留原图的节点顺序）"""
+        return self._view(self._mask_of_nodes(nodes), self._edge_mask)
+
+    def edge_type_mask(self, edge_types):
+        """'Edge Type' 属于 edge_types 的边的掩码"""
+        for column in self._edge_columns:
+            if column.name == 'Edge Type':
+                return column.mask_of(set(edge_types))
+        return np.zeros(len(self._edge_src), dtype=bool)
+
+    def subgraph_view(self, nodes=None, edge_types=None):
+        """只保留 nodes 中的节点（None 表示不筛选）以及类型属于 edge_types 的边（None 表示不筛选）"""
+        node_mask = self._node_mask if nodes is None else self._mask_of_nodes(nodes)
+        edge_mask = self._edge_mask
+        if edge_types is not None:
+            type_mask = self.edge_type_mask(edge_types)
+            edge_mask = type_mask if edge_mask is None else edge_mask & type_mask
+        return self._view(node_mask, edge_mask)
+
+    def degree(self, nbunch=None):
+        """
+        与 MultiDiGraph.degree 相同（出度 + 入度，只计可见边）：
+        nbunch 为单个节点时返回整数，否则返回 [(节点, 度数)]
+        """
+        try:
+            single = nbunch is not None and self.has_node(nbunch)
+        except TypeError:
+            single = False
+        if single:
+            nodes = [nbunch]
+        elif nbunch is None:
+            nodes = list(self)
+        else:
+            nodes = [node_id for node_id in nbunch if self.has_node(node_id)]
+        positions = np.array([self._node_index[node_id] for node_id in nodes], dtype=np.int64)
+        counts = (
+            self._visible_counts(self._out_offsets, self._out_edges, positions)
+            + self._visible_counts(self._in_offsets, self._in_edges, positions)
+        ).tolist()
+        return counts[0] if single else list(zip(nodes, counts))
+
+    def hop_layers(self, center, max_hops, direction='both', edge_types=None):
+        """
+        逐层产出与 center 相距 0..max_hops 跳的可见节点ID列表（每层按节点顺序）。
+        direction: 'both' 忽略方向，'out' 只沿出边，'in' 只沿入边；edge_types 不为 None 时只沿这些类型的边扩展。
+        """
+        edge_mask = self.edge_type_mask(edge_types) if edge_types is not None else None
+        seen = np.zeros(len(self._node_ids), dtype=bool)
+        frontier = np.array([self._position(center)], dtype=np.int64)
+        seen[frontier] = True
+        yield [center]
+
+        node_ids = self._node_ids
+        for _ in range(max_hops):
+            neighbors = []
+            if direction in ('both', 'out'):
+                group = _gather(self._out_offsets, self._out_edges, frontier)
+                neighbors.append(self._edge_dst[group[self._edge_visible(group, edge_mask)]])
+            if direction in ('both', 'in'):
+                group = _gather(self._in_offsets, self._in_edges, frontier)
+                neighbors.append(self._edge_src[group[self._edge_visible(group, edge_mask)]])
+            neighbors = np.concatenate(neighbors)
+            frontier = np.unique(neighbors[~seen[neighbors]]).astype(np.int64)
+            if len(frontier) == 0:
+                return
+            seen[frontier] = True
+            yield [node_ids[i] for i in frontier.tolist()]
+
+def _offsets(index, count):
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(index, minlength=count), out=offsets[1:])
+    return offsets
@@ -1,23 +1,57 @@
 
+import argparse
+import hashlib
 import json
+import re
+import shutil
+import tempfile
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import os
 
+from graph_snapshot import default_snapshot_path, open_snapshot, write_snapshot_from_file
+
+WORK_NODE_TYPES = ('Song', 'Album')
+
 def preprocess_graph_data():
     """
     Processes the original graph data based on the actual field names found in MC1_graph.json.
     The new logic associates links with years based on the release_date of their source nodes.
+    Besides graph_by_year.json it writes the per-year shards and manifest served by /api/graph/years.
+    If neither input changed since the last run and the outputs are untouched, nothing is recomputed;
+    otherwise only outputs whose content changed are rewritten.
     """
     # --- Configuration ---
     original_graph_file = os.path.join('public', 'MC1_graph.json')
     processed_graph_file = os.path.join('public', 'graph_processed.json')
     output_yearly_file = os.path.join('public', 'graph_by_year.json')
     output_options_file = os.path.join('public', 'filter_options.json')
+    manifest_file = os.path.join(SHARDS_DIR, SHARD_MANIFEST)
+    state_file = os.path.join('public', '.graph_by_year.full.state.json')
+    output_files = (output_yearly_file, output_options_file, manifest_file)
     
     print("Starting data preprocessing with corrected logic...")
     print(f"Original graph file: {os.path.abspath(original_graph_file)}")
     print(f"Processed graph file: {os.path.abspath(processed_graph_file)}")
 
+    # --- Skip everything if the inputs and outputs are as the last run left them ---
+    previous = _load_state(state_file)
+    try:
+        inputs = {
+            path: _input_fingerprint(path, previous.get('inputs', {}).get(path))
+            for path in (original_graph_file, processed_graph_file)
+        }
+    except FileNotFoundError:
+        inputs = None # Reported by the loaders below
+    previous_hashes = {path: entry.get('sha256') for path, entry in previous.get('inputs', {}).items()}
+    if inputs and {path: entry['sha256'] for path, entry in inputs.items()} == previous_hashes and all(
+        os.path.exists(path) and previous.get('outputs', {}).get(path) == _stat_signature(path)
+        for path in output_files
+    ):
+        print("Input files unchanged since the last run, leaving all outputs as is.")
+        return
+
     # --- Load Original Data ---
     try:
         with open(original_graph_file, 'r', encoding='utf-8') as f:
@@ -117,6 +151,12 @@ def preprocess_graph_data():
                             node_copy['influence_score'] = influence_scores_map[node_copy['id']]
                     graph_by_year[year_str]["nodes"][node_copy['id']] = node_copy
 
+    # Per-year shards hold node ids only (same format as the streaming mode)
+    shards = {
+        year: {"links": part["links"], "nodes": list(part["nodes"])}
+        for year, part in graph_by_year.items()
+    }
+
     # Convert the nodes dictionary back to a list for each year
     for year in graph_by_year:
         graph_by_year[year]["nodes"] = list(graph_by_year[year]["nodes"].values())
@@ -130,20 +170,532 @@ def preprocess_graph_data():
     
     print("Data chunking complete.")
 
-    # --- Save Processed Data to Files ---
+    # --- Save Processed Data to Files (only those whose content changed) ---
     try:
-        with open(output_yearly_file, 'w', encoding='utf-8') as f:
-            json.dump(graph_by_year, f, indent=2)
-        print(f"Successfully saved yearly data to {os.path.abspath(output_yearly_file)}")
+        if _write_if_changed(output_yearly_file, json.dumps(graph_by_year, indent=2)):
+            print(f"Successfully saved yearly data to {os.path.abspath(output_yearly_file)}")
+        else:
+            print(f"Yearly data unchanged, leaving {os.path.abspath(output_yearly_file)} as is.")
 
-        with open(output_options_file, 'w', encoding='utf-8') as f:
-            json.dump(filter_options, f, indent=2)
-        print(f"Successfully saved filter options to {os.path.abspath(output_options_file)}")
+        if _write_if_changed(output_options_file, json.dumps(filter_options, indent=2)):
+            print(f"Successfully saved filter options to {os.path.abspath(output_options_file)}")
 
+        write_year_shards(shards)
     except IOError as e:
         print(f"Error writing to output file: {e}")
+        return
+
+    _write_atomic(state_file, json.dumps({
+        'version': STATE_VERSION,
+        'inputs': inputs,
+        'outputs': {path: _stat_signature(path) for path in output_files},
+    }, separators=(',', ':')))
 
     print("Preprocessing finished successfully!")
 
+# --- Streaming mode ---
+# Memory stays bounded by the per-node year table (a few bytes per node) and the node id sets of
+# the years being built (one per worker), instead of growing with graph size x number of years.
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _JsonStream:
+    """Incremental reader over a JSON document: decodes one value at a time with raw_decode."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop the consumed prefix so the buffer never holds more than about one chunk
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos} of the current buffer")
+        self.pos += 1
+
+    def value(self):
+        while True:
+            self.peek()
+            try:
+                obj, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A value that ends exactly at the buffer end may be truncated (e.g. a number)
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def items(self):
+        """Yields the elements of the array starting at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or ']' but found {separator!r}")
+
+
+def iter_json_array(filename, key, chunk_size=1 << 20):
+    """
+    Streams the elements of the top-level array `key` of a JSON object file.
+    Other top-level arrays are skipped element by element, so only one element is in memory at a time.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.expect('{')
+        while stream.peek() != '}':
+            name = stream.value()
+            stream.expect(':')
+            if stream.peek() == '[':
+                if name == key:
+                    yield from stream.items()
+                    return
+                for _ in stream.items():
+                    pass
+            else:
+                stream.value()
+            if stream.peek() == ',':
+                stream.pos += 1
+
+
+class _NodeYearTable:
+    """
+    Per-node facts needed to assign links to years: whether the node is a Song/Album and the
+    first four characters of its release_date. Non-negative integer ids are stored in compact arrays
+    (3 bytes per node); any other id falls back to a dict.
+    """
+    ABSENT, OTHER, WORK = 0, 1, 2
+    MAX_ARRAY_ID = 1 << 26
+
+    def __init__(self):
+        self.kinds = array('b')
+        self.years = array('H')
+        self.year_strings = [None]
+        self.year_index = {None: 0}
+        self.fallback = {}
+
+    def add(self, node):
+        node_id = node['id']
+        kind = self.WORK if node.get('Node Type') in WORK_NODE_TYPES else self.OTHER
+        year = str(node['release_date'])[:4] if 'release_date' in node else None
+        year_id = self.year_index.get(year)
+        if year_id is None:
+            year_id = self.year_index[year] = len(self.year_strings)
+            self.year_strings.append(year)
+        if isinstance(node_id, int) and not isinstance(node_id, bool) and 0 <= node_id < self.MAX_ARRAY_ID:
+            if node_id >= len(self.kinds):
+                grow = node_id + 1 - len(self.kinds)
+                self.kinds.extend(bytes(grow))
+                self.years.extend(array('H', bytes(2 * grow)))
+            self.kinds[node_id] = kind
+            self.years[node_id] = year_id
+        else:
+            self.fallback[node_id] = (kind, year_id)
+
+    def get(self, node_id):
+        """Returns (kind, release year string or None)."""
+        if isinstance(node_id, int) and not isinstance(node_id, bool) and 0 <= node_id < len(self.kinds):
+            return self.kinds[node_id], self.year_strings[self.years[node_id]]
+        kind, year_id = self.fallback.get(node_id, (self.ABSENT, 0))
+        return kind, self.year_strings[year_id]
+
+
+def link_year(source, target):
+    """Same rules as preprocess_graph_data: Song/Album source, then Song/Album target, then source."""
+    (source_kind, source_year), (target_kind, target_year) = source, target
+    if source_kind == _NodeYearTable.WORK and source_year is not None:
+        return source_year
+    if target_kind == _NodeYearTable.WORK and target_year is not None:
+        return target_year
+    return source_year
+
+
+# --- Incremental state and per-year shards ---
+# The state file records the input fingerprint and, per year, a hash of the links assigned to it.
+# Each year's partition is its own compact shard file (public/graph_by_year/<year>.json) listed in
+# manifest.json, so unchanged years are never recomputed and unchanged outputs are never rewritten
+# (their mtimes, and any ETags derived from them, stay valid). The server streams shards on demand.
+STATE_VERSION = 2
+SHARD_MANIFEST = 'manifest.json'
+SHARDS_DIR = os.path.join('public', 'graph_by_year')
+_SHARD_NAME = re.compile(r'[0-9A-Za-z_-]+')
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stat_signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _input_fingerprint(path, previous=None):
+    """Size, mtime and content hash of an input file; the hash is reused when size and mtime match `previous`."""
+    signature = _stat_signature(path)
+    if previous and {k: previous.get(k) for k in signature} == signature:
+        return dict(signature, sha256=previous['sha256'])
+    return dict(signature, sha256=_file_sha256(path))
+
+
+def _load_state(state_file):
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return state if state.get('version') == STATE_VERSION else {}
+
+
+def _write_atomic(path, text):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _write_if_changed(path, text):
+    """Writes text to path unless the file already holds exactly that content. Returns True if written."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    _write_atomic(path, text)
+    return True
+
+
+def _shard_file_name(year_str):
+    """Shard file name for a year; years that are not safe file names are named by their hash."""
+    if _SHARD_NAME.fullmatch(year_str):
+        return f'{year_str}.json'
+    return 'year-' + hashlib.sha256(year_str.encode('utf-8')).hexdigest()[:16] + '.json'
+
+
+def _write_year_partition(spool_path, part_path):
+    """
+    Builds one year's partition from its spooled links: {"links": [...], "nodes": [ids in first-seen order]}.
+    Runs in a worker process; returns the shard's manifest fields (link/node counts, size, content hash).
+    """
+    node_ids = {}
+    link_count = 0
+    tmp_path = part_path + '.tmp'
+    with open(spool_path, 'r', encoding='utf-8') as spool, open(tmp_path, 'w', encoding='utf-8') as out:
+        out.write('{"links":[')
+        for line in spool:
+            link = json.loads(line)
+            node_ids.setdefault(link['source'])
+            node_ids.setdefault(link['target'])
+            out.write((',' if link_count else '') + line.rstrip('\n'))
+            link_count += 1
+        out.write('],"nodes":' + json.dumps(list(node_ids), separators=(',', ':')) + '}')
+    os.replace(tmp_path, part_path)
+    return {'links': link_count, 'nodes': len(node_ids), 'bytes': os.path.getsize(part_path), 'sha256': _file_sha256(part_path)}
+
+
+def _write_year_partitions(tasks, jobs):
+    """Runs _write_year_partition for each (year, spool, part) task, in a process pool when jobs > 1."""
+    if jobs <= 1 or len(tasks) <= 1:
+        return {year: _write_year_partition(spool, part) for year, spool, part in tasks}
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        futures = {year: executor.submit(_write_year_partition, spool, part) for year, spool, part in tasks}
+        return {year: future.result() for year, future in futures.items()}
+
+
+def _assemble_yearly_file(output_file, output_format, years, parts_dir):
+    """Concatenates the per-year shards ({year: state entry}) into graph_by_year.ndjson / graph_by_year.ids.json."""
+    tmp_path = output_file + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        if output_format == 'json':
+            out.write('{')
+        for i, year_str in enumerate(sorted(years)):
+            with open(os.path.join(parts_dir, years[year_str]['file']), 'r', encoding='utf-8') as part:
+                part.read(1) # Opening brace; re-emitted below with the year in front
+                if output_format == 'ndjson':
+                    out.write('{"year":' + json.dumps(year_str) + ',')
+                else:
+                    out.write((',' if i else '') + json.dumps(year_str) + ':{')
+                shutil.copyfileobj(part, out)
+            if output_format == 'ndjson':
+                out.write('\n')
+        if output_format == 'json':
+            out.write('}')
+    os.replace(tmp_path, output_file)
+
+
+def write_year_shards(shards, shards_dir=SHARDS_DIR):
+    """
+    Writes in-memory year partitions ({year: {"links", "nodes": [ids]}}) as shards plus manifest.json,
+    byte-identical to what the streaming mode produces. Unchanged shards are left alone and shards of
+    years that no longer exist are removed.
+    """
+    os.makedirs(shards_dir, exist_ok=True)
+    years = {}
+    written = 0
+    for year_str, shard in shards.items():
+        file_name = _shard_file_name(year_str)
+        path = os.path.join(shards_dir, file_name)
+        written += _write_if_changed(path, json.dumps(shard, separators=(',', ':')))
+        years[year_str] = {'file': file_name, 'links': len(shard['links']), 'nodes': len(shard['nodes']),
+                           'bytes': os.path.getsize(path), 'sha256': _file_sha256(path)}
+    current = {entry['file'] for entry in years.values()} | {SHARD_MANIFEST}
+    for name in os.listdir(shards_dir):
+        if name.endswith('.json') and name not in current:
+            os.remove(os.path.join(shards_dir, name))
+    manifest_file = os.path.join(shards_dir, SHARD_MANIFEST)
+    _write_if_changed(manifest_file, json.dumps(_shard_manifest(years), separators=(',', ':')))
+    print(f"Successfully saved {written} changed of {len(years)} year shards and the manifest to {os.path.abspath(shards_dir)}")
+
+
+def _shard_manifest(years):
+    """manifest.json: the shards in year order with their sizes and content hashes"""
+    entries = [dict(year=year_str, file=years[year_str]['file'],
+                    **{field: years[year_str][field] for field in ('nodes', 'links', 'bytes', 'sha256')})
+               for year_str in sorted(years)]
+    version = hashlib.sha256(''.join(entry['year'] + ':' + entry['sha256'] + '\n' for entry in entries).encode('utf-8'))
+    return {'version': version.hexdigest()[:16], 'nodes': 'ids', 'years': entries}
+
+
+def preprocess_graph_data_streaming(output_format='shards', chunk_size=1 << 20, jobs=None, force=False):
+    """
+    Constant-memory, incremental variant of preprocess_graph_data for large graphs.
+
+    Pass 1 streams the nodes array into a compact per-node year table (and collects filter options),
+    then streams the links array, appending each link as one compact JSON line to a spool file for its year
+    and hashing each year's links as they go by.
+    Pass 2 rebuilds only the years whose link hash differs from the previous run, in a process pool of
+    `jobs` workers: each year becomes a compact shard in public/graph_by_year/ listing its links and the
+    ids of the nodes they touch, and public/graph_by_year/manifest.json lists the shards with their
+    node/link counts, byte sizes and content hashes. Node attributes (including influence scores) are not
+    copied per year; they live in graph_processed.json.
+    If MC1_graph.json itself is unchanged, both passes are skipped. `force` ignores the previous state.
+
+    output_format 'shards' writes only the shards and the manifest. 'ndjson' additionally writes
+    graph_by_year.ndjson, one {"year", "links", "nodes"} object per line; 'json' a compact
+    graph_by_year.ids.json object keyed by year. Both list node ids only, so they never take the name of
+    the default mode's graph_by_year.json, whose years hold full node objects.
+    """
+    original_graph_file = os.path.join('public', 'MC1_graph.json')
+    output_yearly_file = os.path.join('public', 'graph_by_year.ndjson' if output_format == 'ndjson' else 'graph_by_year.ids.json')
+    output_options_file = os.path.join('public', 'filter_options.json')
+    state_file = os.path.join('public', '.graph_by_year.state.json')
+    parts_dir = SHARDS_DIR
+    jobs = jobs or os.cpu_count() or 1
+
+    print("Starting streaming data preprocessing...")
+    print(f"Original graph file: {os.path.abspath(original_graph_file)}")
+
+    previous = {} if force else _load_state(state_file)
+    previous_years = previous.get('years', {})
+    previous_input = previous.get('input', {})
+    try:
+        input_fingerprint = _input_fingerprint(original_graph_file, previous_input)
+    except FileNotFoundError:
+        print(f"Error: Original graph file not found at {os.path.abspath(original_graph_file)}")
+        return
+    input_unchanged = (
+        input_fingerprint['sha256'] == previous_input.get('sha256')
+        and all(os.path.exists(os.path.join(parts_dir, entry['file'])) for entry in previous_years.values())
+    )
+    os.makedirs(parts_dir, exist_ok=True)
+
+    if input_unchanged:
+        print("Original graph file unchanged since the last run, reusing all year partitions.")
+        years = previous_years
+        filter_options = previous['filterOptions']
+    else:
+        nodes = _NodeYearTable()
+        all_genres = set()
+        all_node_types = set()
+        all_edge_types = set()
+        spool_dir = tempfile.mkdtemp(prefix='.graph_by_year-', dir='public')
+        spools = {}
+        digests = {}
+        try:
+            # --- Pass 1: nodes, then links spooled and hashed by year ---
+            try:
+                node_count = 0
+                for node in iter_json_array(original_graph_file, 'nodes', chunk_size):
+                    nodes.add(node)
+                    node_count += 1
+                    if 'genre' in node and node['genre']:
+                        all_genres.add(node['genre'])
+                    if 'Node Type' in node:
+                        all_node_types.add(node['Node Type'])
+                print(f"Indexed {node_count} nodes.")
+
+                link_count = 0
+                for link in iter_json_array(original_graph_file, 'links', chunk_size):
+                    if 'Edge Type' in link:
+                        all_edge_types.add(link['Edge Type'])
+                    source = nodes.get(link['source'])
+                    target = nodes.get(link['target'])
+                    if source[0] == _NodeYearTable.ABSENT or target[0] == _NodeYearTable.ABSENT:
+                        continue # Skip invalid links
+                    year_str = link_year(source, target)
+                    if not year_str:
+                        continue
+                    spool = spools.get(year_str)
+                    if spool is None:
+                        spool = spools[year_str] = open(os.path.join(spool_dir, f'{len(spools)}.ndjson'), 'w', encoding='utf-8')
+                        digests[year_str] = hashlib.sha256()
+                    line = json.dumps(link, separators=(',', ':')) + '\n'
+                    spool.write(line)
+                    digests[year_str].update(line.encode('utf-8'))
+                    link_count += 1
+                print(f"Spooled {link_count} links into {len(spools)} years.")
+            except (json.JSONDecodeError, ValueError) as e:
+                print(f"Error: Could not decode JSON from {original_graph_file}: {e}")
+                return
+            for spool in spools.values():
+                spool.close()
+            del nodes
+
+            # --- Pass 2: rebuild the changed years ---
+            years = {year_str: {'hash': digest.hexdigest(), 'file': _shard_file_name(year_str)}
+                     for year_str, digest in digests.items()}
+            tasks = []
+            for year_str in sorted(years):
+                part_path = os.path.join(parts_dir, years[year_str]['file'])
+                old = previous_years.get(year_str)
+                if old and old['hash'] == years[year_str]['hash'] and os.path.exists(part_path):
+                    years[year_str] = old
+                else:
+                    tasks.append((year_str, spools[year_str].name, part_path))
+            print(f"{len(tasks)} of {len(years)} years changed, rebuilding them with {min(jobs, max(len(tasks), 1))} worker(s)...")
+            for year_str, fields in _write_year_partitions(tasks, jobs).items():
+                years[year_str].update(fields)
+        finally:
+            for spool in spools.values():
+                spool.close()
+            shutil.rmtree(spool_dir, ignore_errors=True)
+
+        for year_str in set(previous_years) - set(years):
+            print(f"Removing partition of year {year_str} (no links left).")
+            try:
+                os.remove(os.path.join(parts_dir, previous_years[year_str]['file']))
+            except FileNotFoundError:
+                pass
+
+        filter_options = {
+            "genres": sorted(all_genres),
+            "nodeTypes": sorted(all_node_types),
+            "edgeTypes": sorted(all_edge_types)
+        }
+
+    # --- Outputs: rewritten only when their content changes ---
+    manifest_file = os.path.join(parts_dir, SHARD_MANIFEST)
+    if _write_if_changed(manifest_file, json.dumps(_shard_manifest(years), separators=(',', ':'))):
+        print(f"Successfully saved shard manifest ({len(years)} years) to {os.path.abspath(manifest_file)}")
+    else:
+        print(f"Yearly shards unchanged, leaving {os.path.abspath(manifest_file)} as is.")
+
+    outputs = previous.get('outputs', {})
+    if output_format != 'shards':
+        yearly_name = os.path.basename(output_yearly_file)
+        yearly_up_to_date = (
+            years == previous_years
+            and os.path.exists(output_yearly_file)
+            and outputs.get(yearly_name) == _stat_signature(output_yearly_file)
+        )
+        if yearly_up_to_date:
+            print(f"Yearly data unchanged, leaving {os.path.abspath(output_yearly_file)} as is.")
+        else:
+            _assemble_yearly_file(output_yearly_file, output_format, years, parts_dir)
+            print(f"Successfully saved yearly data to {os.path.abspath(output_yearly_file)}")
+        outputs[yearly_name] = _stat_signature(output_yearly_file)
+
+    try:
+        if _write_if_changed(output_options_file, json.dumps(filter_options, indent=2)):
+            print(f"Successfully saved filter options to {os.path.abspath(output_options_file)}")
+    except IOError as e:
+        print(f"Error writing to output file: {e}")
+
+    _write_atomic(state_file, json.dumps({
+        'version': STATE_VERSION,
+        'input': input_fingerprint,
+        'years': years,
+        'filterOptions': filter_options,
+        'outputs': outputs,
+    }, separators=(',', ':')))
+    print("Streaming preprocessing finished successfully!")
+
+def build_graph_snapshot(force=False):
+    """
+    Writes a binary snapshot of graph_processed.json (CSR adjacency, columnar attributes,
+    interned strings) that the server memory-maps at startup instead of parsing the JSON.
+    An existing snapshot that matches the current graph_processed.json is left alone unless `force` is set.
+    """
+    processed_graph_file = os.path.join('public', 'graph_processed.json')
+    snapshot_path = default_snapshot_path(processed_graph_file)
+
+    if not force and os.path.exists(processed_graph_file) and open_snapshot(snapshot_path, processed_graph_file):
+        print(f"Snapshot is up to date, leaving {os.path.abspath(snapshot_path)} as is.")
+        return
+    print("Building binary graph snapshot...")
+    try:
+        nodes, edges, version = write_snapshot_from_file(processed_graph_file, snapshot_path)
+    except FileNotFoundError:
+        print(f"Error: Processed graph file not found at {os.path.abspath(processed_graph_file)}")
+        return
+    except json.JSONDecodeError:
+        print(f"Error: Could not decode JSON from {processed_graph_file}")
+        return
+    print(f"Successfully saved snapshot ({nodes} nodes, {edges} edges, version {version}) to {os.path.abspath(snapshot_path)}")
+
 if __name__ == '__main__':
-    preprocess_graph_data()
+    parser = argparse.ArgumentParser(description="Preprocess MC1_graph.json for the frontend and the server.")
+    parser.add_argument('--streaming', action='store_true',
+                        help="constant-memory mode for large graphs (writes per-year node id sets instead of node copies)")
+    parser.add_argument('--format', choices=('shards', 'ndjson', 'json'), default='shards',
+                        help="streaming output besides the per-year shards in public/graph_by_year/: nothing (shards), "
+                             "newline-delimited graph_by_year.ndjson or compact graph_by_year.ids.json (node ids only)")
+    parser.add_argument('--chunk-size', type=int, default=1 << 20, help="streaming read size in characters")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="streaming: worker processes for rebuilding changed years (default: CPU count)")
+    parser.add_argument('--force', action='store_true',
+                        help="ignore the previous run's state and rebuild every year and the snapshot")
+    args = parser.parse_args()
+
+    if args.streaming:
+        preprocess_graph_data_streaming(args.format, args.chunk_size, args.jobs, args.force)
+    else:
+        preprocess_graph_data()
+    build_graph_snapshot(args.force)
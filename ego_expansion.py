@@ -0,0 +1,90 @@
+# ego_expansion.py
+"""
+中心节点的 k 跳邻域扩展（逐层 BFS，适用于 networkx 图/视图与 CSRGraph）。
+
+- 方向: 'both' 忽略边的方向，'out' 只沿出边，'in' 只沿入边
+- 边类型: 只沿指定类型的边扩展；返回的导出子图仍包含保留节点之间的全部可见边
+- 节点预算: 按层保留节点。某一层放不下时，按度数或影响力评分从高到低选取剩余名额（同分按节点顺序），
+  并停止继续扩展，因此每个保留的节点都经由更近的保留节点连回中心节点
+"""
+from csr_graph import CSRGraph
+
+DIRECTIONS = ('both', 'out', 'in')
+RANKINGS = ('degree', 'influence')
+
+
+def _networkx_neighbors(graph, node_id, direction, edge_types):
+    adjacencies = []
+    if direction in ('both', 'out'):
+        adjacencies.append(graph.succ[node_id])
+    if direction in ('both', 'in'):
+        adjacencies.append(graph.pred[node_id])
+    for adjacency in adjacencies:
+        for neighbor, keydict in adjacency.items():
+            if edge_types is None or any(data.get('Edge Type') in edge_types for data in keydict.values()):
+                yield neighbor
+
+
+def iter_hop_layers(graph, center, max_hops, direction='both', edge_types=None, node_order=None):
+    """
+    逐层产出与 center 相距 0..max_hops 跳的节点ID列表。
+    node_order ({节点ID: 序号}) 用于把 networkx 图每一层按节点顺序排列，使结果与 CSRGraph 一致。
+    """
+    edge_types = set(edge_types) if edge_types is not None else None
+    if isinstance(graph, CSRGraph):
+        yield from graph.hop_layers(center, max_hops, direction, edge_types)
+        return
+
+    seen = {center}
+    layer = [center]
+    yield layer
+    for _ in range(max_hops):
+        next_layer = []
+        for node_id in layer:
+            for neighbor in _networkx_neighbors(graph, node_id, direction, edge_types):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    next_layer.append(neighbor)
+        if not next_layer:
+            return
+        if node_order is not None:
+            next_layer.sort(key=node_order.__getitem__)
+        yield next_layer
+        layer = next_layer
+
+
+def _scores(graph, nodes, rank_by):
+    if rank_by == 'influence':
+        values = dict(graph.subgraph(nodes).nodes(data='influence_score', default=0))
+        return [
+            values[node_id] if isinstance(values[node_id], (int, float)) else 0
+            for node_id in nodes
+        ]
+    degrees = dict(graph.degree(nodes))
+    return [degrees[node_id] for node_id in nodes]
+
+
+def _top_ranked(graph, nodes, count, rank_by):
+    """按评分选出 count 个节点，保持它们在 nodes 中的顺序"""
+    scores = _scores(graph, nodes, rank_by)
+    chosen = sorted(range(len(nodes)), key=lambda i: -scores[i])[:count]
+    return [nodes[i] for i in sorted(chosen)]
+
+
+def expand_ego(graph, center, max_hops, direction='both', edge_types=None, max_nodes=None,
+               rank_by='degree', node_order=None):
+    """
+    返回 (跳数字典 {节点ID: 与中心的距离}，按层排列；是否因 max_nodes 截断)。
+    max_nodes 为 None 时不限制节点数；中心节点总是保留。
+    """
+    hops = {}
+    truncated = False
+    for hop, layer in enumerate(iter_hop_layers(graph, center, max_hops, direction, edge_types, node_order)):
+        if max_nodes is not None and len(hops) + len(layer) > max_nodes:
+            layer = _top_ranked(graph, layer, max(max_nodes - len(hops), 0), rank_by)
+            truncated = True
+        for node_id in layer:
+            hops[node_id] = hop
+        if truncated:
+            break
+    return hops, truncated
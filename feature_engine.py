@@ -0,0 +1,427 @@
+# feature_engine.py
+"""
+列式（向量化）艺术家特征提取引擎。
+
+把 build_knowledge_graph 构建的 MultiDiGraph 一次性转换为 NumPy 数组
+（节点类型编码、年份、notable 标记、流派编码，以及按关系类型拆分的边数组），
+然后用 bincount / 分组运算一次算出全部艺术家特征，结果与 prediction.extract_features 一致。
+"""
+import numpy as np
+
+# 与 extract_features 返回字典的键顺序保持一致
+ARTIST_FEATURE_NAMES = [
+    'oceanus_works',
+    'oceanus_notable',
+    'oceanus_recent',
+    'total_works',
+    'total_notable',
+    'recent_activity',
+    'collab_diversity',
+    'influence_score',
+    'creative_depth',
+    'label_weight',
+    'years_active',
+    'last_release_year',
+    'composer_count',
+    'lyricist_count',
+    'producer_count',
+    'oceanus_ratio',
+    'interpolation_count',
+    'lyrical_references',
+    'collaboration_score',
+    'band_members'
+]
+
+# 以整数形式输出的特征
+INT_FEATURES = {
+    'oceanus_works', 'oceanus_notable', 'oceanus_recent', 'total_works', 'total_notable',
+    'recent_activity', 'collab_diversity', 'years_active', 'last_release_year',
+    'composer_count', 'lyricist_count', 'producer_count', 'interpolation_count',
+    'lyrical_references', 'collaboration_score', 'band_members'
+}
+
+WORK_TYPES = ('Song', 'Album')
+CREATION_RELATIONS = ('PerformerOf', 'ComposerOf', 'LyricistOf')
+INFLUENCE_RELATIONS = ('InStyleOf', 'CoverOf', 'DirectlySamples', 'InterpolatesFrom', 'LyricalReferenceTo')
+LABEL_RELATIONS = ('RecordedBy', 'DistributedBy')
+
+
+class GraphColumns:
+    """MultiDiGraph 的列式快照：节点属性列 + 按关系类型拆分的边数组"""
+
+    def __init__(self, G):
+        self.node_ids = list(G.nodes())
+        self.id_to_index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        n = len(self.node_ids)
+
+        self.type_names = []
+        self.genre_names = []
+        type_codes = {}
+        genre_codes = {}
+
+        node_type = np.empty(n, dtype=np.int32)
+        year = np.zeros(n, dtype=np.int64)
+        has_year = np.zeros(n, dtype=bool)
+        notable = np.zeros(n, dtype=bool)
+        genre = np.empty(n, dtype=np.int32)
+        self.names = []
+
+        # 只解析一次 release_date
+        for i, (_, data) in enumerate(G.nodes(data=True)):
+            t = data.get('Node Type', '')
+            if t not in type_codes:
+                type_codes[t] = len(self.type_names)
+                self.type_names.append(t)
+            node_type[i] = type_codes[t]
+
+            g = data.get('genre', '')
+            if g not in genre_codes:
+                genre_codes[g] = len(self.genre_names)
+                self.genre_names.append(g)
+            genre[i] = genre_codes[g]
+
+            release_date = data.get('release_date')
+            if release_date and release_date.isdigit():
+                year[i] = int(release_date)
+                has_year[i] = True
+
+            notable[i] = bool(data.get('notable', False))
+            self.names.append(data.get('name'))
+
+        self.node_type = node_type
+        self.year = year
+        self.has_year = has_year
+        self.notable = notable
+        self.genre = genre
+        self.type_codes = type_codes
+
+        # 边数组：按 G.edges 的遍历顺序，再按关系类型拆分
+        src, dst, rel = [], [], []
+        rel_codes = {}
+        self.relation_names = []
+        index = self.id_to_index
+        for u, v, data in G.edges(data=True):
+            r = data.get('relationship', '')
+            if r not in rel_codes:
+                rel_codes[r] = len(self.relation_names)
+                self.relation_names.append(r)
+            src.append(index[u])
+            dst.append(index[v])
+            rel.append(rel_codes[r])
+
+        self.edge_src = np.asarray(src, dtype=np.int64)
+        self.edge_dst = np.asarray(dst, dtype=np.int64)
+        self.edge_rel = np.asarray(rel, dtype=np.int32)
+        self.edges_by_relation = {}
+        for r, code in rel_codes.items():
+            mask = self.edge_rel == code
+            self.edges_by_relation[r] = (self.edge_src[mask], self.edge_dst[mask])
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    def type_mask(self, *type_names):
+        codes = [self.type_codes[t] for t in type_names if t in self.type_codes]
+        return np.isin(self.node_type, codes)
+
+    def genre_contains(self, text):
+        """流派字符串包含 text 的节点（与 `text in genre` 语义一致）"""
+        flags = np.array([text in g if isinstance(g, str) else False for g in self.genre_names], dtype=bool)
+        return flags[self.genre] if len(flags) else np.zeros(self.num_nodes, dtype=bool)
+
+    def edges(self, *relations):
+        """返回若干关系类型的 (src, dst) 边数组（保持原始遍历顺序）"""
+        parts = [self.edges_by_relation[r] for r in relations if r in self.edges_by_relation]
+        if not parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        if len(parts) == 1:
+            return parts[0]
+        mask = np.isin(self.edge_rel, [self.relation_names.index(r) for r in relations if r in self.edges_by_relation])
+        return self.edge_src[mask], self.edge_dst[mask]
+
+
+def get_graph_columns(G):
+    """获取图的列式快照，结果缓存在 G.graph 中，每个图只构建一次"""
+    columns = G.graph.get('_columns')
+    if columns is None:
+        columns = GraphColumns(G)
+        G.graph['_columns'] = columns
+    return columns
+
+
+def _unique_pairs(a, b, n):
+    """去重 (a, b) 整数对，返回排序后的两列"""
+    keys = np.unique(a * n + b)
+    return keys // n, keys % n
+
+
+def _expand_by_group(group_of_left, left_values, group_sorted, right_values):
+    """
+    按组做笛卡尔连接：对 left 中每个元素，与 right 中同组的所有元素配对。
+    group_sorted 必须已排序，right_values 与其对齐。
+    """
+    starts = np.searchsorted(group_sorted, group_of_left, side='left')
+    ends = np.searchsorted(group_sorted, group_of_left, side='right')
+    counts = ends - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    left = np.repeat(left_values, counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    right = right_values[np.repeat(starts, counts) + offsets]
+    return left, right
+
+
+def compute_label_weights(columns, work_valid, pair_artist, pair_work, current_year):
+    """向量化计算唱片公司权重，返回 {唱片公司名称: 权重}（含 'Other'）"""
+    n = columns.num_nodes
+    is_work = columns.type_mask(*WORK_TYPES)
+    is_label = columns.type_mask('RecordLabel')
+
+    src, dst = columns.edges(*LABEL_RELATIONS)
+    keep = is_work[src] & is_label[dst]
+    wl_work, wl_label = _unique_pairs(src[keep], dst[keep], n)
+    valid = work_valid[wl_work]
+    wl_work, wl_label = wl_work[valid], wl_label[valid]
+
+    year = np.where(columns.has_year, columns.year, 0)
+    recent = (year > current_year - 3) & (year <= current_year)
+    total_works = np.bincount(wl_label, minlength=n)
+    notable_works = np.bincount(wl_label, weights=columns.notable[wl_work], minlength=n)
+    recent_works = np.bincount(wl_label, weights=recent[wl_work], minlength=n)
+
+    # 艺术家 -> 唱片公司（通过作品间接关联）去重后计数
+    order = np.argsort(pair_work, kind='stable')
+    label_of, artist_of = _expand_by_group(wl_work, wl_label, pair_work[order], pair_artist[order])
+    artist_count = np.zeros(n)
+    if len(label_of):
+        al_label, _ = _unique_pairs(label_of, artist_of, n)
+        artist_count = np.bincount(al_label, minlength=n).astype(float)
+
+    # 与原实现相同的唱片公司遍历顺序（同名唱片公司以最后出现者为准）
+    labels_by_work = {}
+    for w, l in zip(wl_work.tolist(), wl_label.tolist()):
+        labels_by_work.setdefault(w, set()).add(columns.node_ids[l])
+    ordered = {}
+    for w in sorted(labels_by_work):
+        for label_id in labels_by_work[w]:
+            ordered.setdefault(columns.id_to_index[label_id], None)
+    for row in np.flatnonzero(is_label).tolist():
+        ordered.setdefault(row, None)
+    label_rows = np.asarray(list(ordered), dtype=np.int64)
+
+    weights = {}
+    if len(label_rows):
+        max_artist = max(1, artist_count[label_rows].max())
+        max_works = max(1, total_works[label_rows].max())
+        max_notable = max(1, notable_works[label_rows].max())
+        max_recent = max(1, recent_works[label_rows].max())
+        composite = (
+            0.3 * (artist_count[label_rows] / max_artist) +
+            0.2 * (total_works[label_rows] / max_works) +
+            0.3 * (notable_works[label_rows] / max_notable) +
+            0.2 * (recent_works[label_rows] / max_recent)
+        )
+        composite = np.clip(composite, 0.4, 0.95)
+        for row, weight in zip(label_rows, composite):
+            name = columns.names[row]
+            weights[name if name is not None else f"Label_{columns.node_ids[row]}"] = float(weight)
+    weights["Other"] = 0.5
+    return weights
+
+
+class ArtistFeatureMatrix:
+    """艺术家特征矩阵：matrix[行, 列]，id_to_row 为艺术家ID到行号的映射"""
+
+    def __init__(self, matrix, artist_ids, feature_names, int_zero_mask=None):
+        self.matrix = matrix
+        self.artist_ids = artist_ids
+        self.id_to_row = {artist_id: i for i, artist_id in enumerate(artist_ids)}
+        self.feature_names = feature_names
+        self.column = {name: j for j, name in enumerate(feature_names)}
+        # 原实现中分母为零时比值特征是整数 0，这里记录下来以保持输出完全一致
+        self.int_zero_mask = int_zero_mask or {}
+
+    def __len__(self):
+        return len(self.artist_ids)
+
+    def get(self, artist_id, feature):
+        return self.matrix[self.id_to_row[artist_id], self.column[feature]]
+
+    def to_features_dict(self):
+        """以 extract_features 的 artist_features_dict 形状返回特征"""
+        columns = []
+        for j, name in enumerate(self.feature_names):
+            values = self.matrix[:, j]
+            if name in INT_FEATURES:
+                col = values.astype(np.int64).tolist()
+            else:
+                col = values.tolist()
+                zero_mask = self.int_zero_mask.get(name)
+                if zero_mask is not None:
+                    col = [0 if z else v for v, z in zip(col, zero_mask.tolist())]
+            columns.append(col)
+
+        names = self.feature_names
+        return {
+            artist_id: dict(zip(names, row))
+            for artist_id, row in zip(self.artist_ids, zip(*columns))
+        }
+
+
+def extract_features_columnar(G, current_year=2040):
+    """列式引擎：计算所有 Person 节点的特征，返回 ArtistFeatureMatrix"""
+    columns = get_graph_columns(G)
+    n = columns.num_nodes
+
+    is_work = columns.type_mask(*WORK_TYPES)
+    future = columns.has_year & (columns.year > current_year)
+    work_valid = is_work & ~future
+    year = np.where(columns.has_year, columns.year, 0)
+    notable = columns.notable
+    oceanus = columns.genre_contains('Oceanus Folk')
+
+    # 艺术家-作品参与关系（去重），以及作曲/作词角色标记
+    src, dst = columns.edges(*CREATION_RELATIONS)
+    keep = work_valid[dst]
+    pair_artist, pair_work = _unique_pairs(src[keep], dst[keep], n)
+    pair_keys = pair_artist * n + pair_work
+
+    def role_flags(relation):
+        r_src, r_dst = columns.edges(relation)
+        return np.isin(pair_keys, r_src * n + r_dst)
+
+    composer = role_flags('ComposerOf')
+    lyricist = role_flags('LyricistOf')
+
+    def per_artist(weights=None):
+        return np.bincount(pair_artist, weights=weights, minlength=n)
+
+    w_notable = notable[pair_work]
+    w_oceanus = oceanus[pair_work]
+    w_year = year[pair_work]
+    w_recent = (w_year > current_year - 3) & (w_year <= current_year)
+
+    total_works = per_artist()
+    total_notable = per_artist(w_notable)
+    oceanus_works = per_artist(w_oceanus)
+    oceanus_notable = per_artist(w_oceanus & w_notable)
+    oceanus_recent = per_artist(w_oceanus & w_recent)
+    composer_count = per_artist(composer)
+    lyricist_count = per_artist(lyricist)
+
+    # 活跃年份
+    dated = w_year > 0
+    latest = np.zeros(n, dtype=np.int64)
+    earliest = np.full(n, current_year, dtype=np.int64)
+    np.maximum.at(latest, pair_artist[dated], w_year[dated])
+    np.minimum.at(earliest, pair_artist[dated], w_year[dated])
+    active = latest > 0
+    years_active = np.where(active, np.minimum(latest, current_year) - np.minimum(earliest, current_year), 0)
+    recent_activity = np.where(active, current_year - latest, current_year)
+    last_release_year = np.where(active, latest, 0)
+
+    # 协作强度：同一作品的其他参与者数量之和；协作多样性：去重后的合作者数
+    participants_per_work = np.bincount(pair_work, minlength=n)
+    collaboration_score = per_artist(participants_per_work[pair_work] - 1)
+    order = np.argsort(pair_work, kind='stable')
+    left, right = _expand_by_group(pair_work, pair_artist, pair_work[order], pair_artist[order])
+    distinct = left != right
+    collab_diversity = np.zeros(n)
+    if distinct.any():
+        co_artist, _ = _unique_pairs(left[distinct], right[distinct], n)
+        collab_diversity = np.bincount(co_artist, minlength=n)
+
+    # 影响力相关边
+    i_src, i_dst = columns.edges(*INFLUENCE_RELATIONS)
+    infl_in = np.bincount(i_dst, minlength=n)
+    infl_out = np.bincount(i_src, minlength=n)
+    interp_src, _ = columns.edges('InterpolatesFrom')
+    lyr_src, _ = columns.edges('LyricalReferenceTo')
+    interp_out = np.bincount(interp_src, minlength=n)
+    lyr_out = np.bincount(lyr_src, minlength=n)
+
+    interpolation_count = per_artist(interp_out[pair_work])
+    lyrical_references = per_artist(lyr_out[pair_work])
+    influence_score = (
+        per_artist(infl_in[pair_work] * 0.5 + infl_out[pair_work] * 1.0) +
+        infl_in * 2.0 +
+        total_notable * 0.5 +
+        oceanus_notable * 1.0
+    )
+
+    p_src, _ = columns.edges('ProducerOf')
+    producer_count = np.bincount(p_src, minlength=n)
+
+    m_src, m_dst = columns.edges('MemberOf')
+    band_members = ((np.bincount(m_src, minlength=n) + np.bincount(m_dst, minlength=n)) > 0).astype(np.int64)
+
+    has_works = total_works > 0
+    denom = np.maximum(1, total_works)
+    creative_depth = np.where(
+        has_works,
+        (composer_count + lyricist_count + interpolation_count + lyrical_references) / denom,
+        0.0
+    )
+    oceanus_ratio = np.where(has_works, oceanus_works / denom, 0.0)
+
+    # 唱片公司权重：沿用原实现，按作品入边中的 RecordedBy/DistributedBy 关联名称
+    label_weights = compute_label_weights(columns, work_valid, pair_artist, pair_work, current_year)
+    l_src, l_dst = columns.edges(*LABEL_RELATIONS)
+    labelled = np.zeros(n, dtype=bool)
+    labelled[l_dst] = True
+    label_weight = np.zeros(n)
+    has_labels = np.zeros(n, dtype=bool)
+    linked = labelled[pair_work]
+    if linked.any():
+        name_codes = {}
+        codes = np.array([
+            name_codes.setdefault(
+                columns.names[w] if columns.names[w] is not None else "Other", len(name_codes)
+            )
+            for w in pair_work[linked]
+        ], dtype=np.int64)
+        code_weights = np.array([label_weights.get(name, label_weights['Other']) for name in name_codes])
+        a_rows, a_codes = _unique_pairs(pair_artist[linked], codes, max(len(name_codes), 1))
+        sums = np.bincount(a_rows, weights=code_weights[a_codes], minlength=n)
+        counts = np.bincount(a_rows, minlength=n)
+        has_labels = counts > 0
+        label_weight = np.where(has_labels, sums / np.maximum(1, counts), 0.0)
+
+    person_rows = np.flatnonzero(columns.type_mask('Person'))
+    values = {
+        'oceanus_works': oceanus_works,
+        'oceanus_notable': oceanus_notable,
+        'oceanus_recent': oceanus_recent,
+        'total_works': total_works,
+        'total_notable': total_notable,
+        'recent_activity': recent_activity,
+        'collab_diversity': collab_diversity,
+        'influence_score': influence_score,
+        'creative_depth': creative_depth,
+        'label_weight': label_weight,
+        'years_active': years_active,
+        'last_release_year': last_release_year,
+        'composer_count': composer_count,
+        'lyricist_count': lyricist_count,
+        'producer_count': producer_count,
+        'oceanus_ratio': oceanus_ratio,
+        'interpolation_count': interpolation_count,
+        'lyrical_references': lyrical_references,
+        'collaboration_score': collaboration_score,
+        'band_members': band_members
+    }
+    matrix = np.column_stack([
+        np.asarray(values[name], dtype=float)[person_rows] for name in ARTIST_FEATURE_NAMES
+    ]) if len(person_rows) else np.zeros((0, len(ARTIST_FEATURE_NAMES)))
+
+    int_zero_mask = {
+        'creative_depth': ~has_works[person_rows],
+        'oceanus_ratio': ~has_works[person_rows],
+        'label_weight': ~has_labels[person_rows]
+    }
+    artist_ids = [columns.node_ids[i] for i in person_rows]
+    return ArtistFeatureMatrix(matrix, artist_ids, list(ARTIST_FEATURE_NAMES), int_zero_mask)
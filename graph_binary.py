@@ -0,0 +1,229 @@
+# graph_binary.py
+"""
+紧凑的二进制图传输格式（D3 node-link JSON 的可选替代）。
+
+布局（小端序）:
+    'MC1G' | uint32 头部长度 | 头部 JSON (UTF-8) | 填充到 8 字节对齐 | 各列数据（每列 8 字节对齐）
+
+头部 JSON 记录 directed / multigraph / graph、节点数与边数、共享字符串表 strings，
+以及节点列 nodes 和边列 links 的描述。每列对应一个属性键:
+    kind    'int32' | 'float64' | 'bool' | 'dict8' | 'dict16' | 'str' | 'json'
+    offset  数据区内的字节偏移（相对于头部之后的数据区起点）
+    present 可选，Uint8 存在标记数组的偏移；缺省表示所有行都有该属性
+
+- 低基数字符串列（如 'Node Type'、'Edge Type'、genre）按列做字典编码，码值为 Uint8/Uint16；
+- 高基数字符串列（如 name）为指向共享字符串表的 Int32 下标；
+- source / target / id / key 等整数列为 Int32 数组，全部为浮点数的列为 Float64 数组；
+  列类型即取值的类型标记，float64 列解码为 float（3.0 不会变成 3）；
+- 无法归入以上类型的值（null、列表、超出 Int32 的整数、整数与浮点数混合等）以 JSON 文本存入字符串表。
+解码后得到的节点/边对象与 JSON 格式逐项相等。
+"""
+import json
+import struct
+
+import numpy as np
+
+MIMETYPE = 'application/vnd.mc1.graph+binary'
+MAGIC = b'MC1G'
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+MISSING = object()
+_INT32_MIN, _INT32_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def encode_column(values, string_id):
+    """
+    把按行对齐的一列取值（缺失为 MISSING）编码为 (列描述, 取值数组, 存在标记数组或 None)。
+    string_id(text) 把字符串放入共享字符串表并返回其下标。
+    """
+    present = [value is not MISSING for value in values]
+    values_present = [value for value in values if value is not MISSING]
+    column = {}
+
+    if all(isinstance(v, bool) for v in values_present):
+        column['kind'] = 'bool'
+        array = np.array([v is True for v in values], dtype='u1')
+    elif all(_is_int(v) and _INT32_MIN <= v <= _INT32_MAX for v in values_present):
+        column['kind'] = 'int32'
+        array = np.array([v if p else 0 for v, p in zip(values, present)], dtype='<i4')
+    elif all(isinstance(v, float) for v in values_present):
+        column['kind'] = 'float64'
+        array = np.array([v if p else 0.0 for v, p in zip(values, present)], dtype='<f8')
+    elif all(isinstance(v, str) for v in values_present):
+        dictionary = list(dict.fromkeys(values_present))
+        if len(dictionary) <= 0xFFFF and len(dictionary) * 4 <= max(len(values_present), 1):
+            codes = {text: i for i, text in enumerate(dictionary)}
+            column['kind'] = 'dict8' if len(dictionary) <= 0xFF else 'dict16'
+            column['dictionary'] = dictionary
+            array = np.array([codes[v] if p else 0 for v, p in zip(values, present)],
+                             dtype='u1' if column['kind'] == 'dict8' else '<u2')
+        else:
+            column['kind'] = 'str'
+            array = np.array([string_id(v) if p else 0 for v, p in zip(values, present)], dtype='<i4')
+    else:
+        column['kind'] = 'json'
+        array = np.array([
+            string_id(json.dumps(v, sort_keys=True, separators=(',', ':'), default=str)) if p else 0
+            for v, p in zip(values, present)
+        ], dtype='<i4')
+
+    present_array = None if all(present) else np.array(present, dtype='u1')
+    return column, array, present_array
+
+
+def decode_column(column, array, present, strings):
+    """encode_column 的逆过程，返回按行对齐的取值列表（缺失为 MISSING）；strings 支持按下标取值"""
+    kind = column['kind']
+    if kind == 'int32':
+        values = array.tolist()
+    elif kind == 'float64':
+        values = array.tolist()
+    elif kind == 'bool':
+        values = [bool(v) for v in array.tolist()]
+    elif kind in ('dict8', 'dict16'):
+        dictionary = column['dictionary']
+        values = [dictionary[v] for v in array.tolist()]
+    elif kind == 'str':
+        values = [strings[v] for v in array.tolist()]
+    else:
+        values = [json.loads(strings[v]) for v in array.tolist()]
+
+    if present is not None:
+        values = [value if p else MISSING for value, p in zip(values, present.tolist())]
+    return values
+
+
+class StringTable:
+    """共享字符串表（驻留：相同字符串只保存一次）"""
+
+    def __init__(self):
+        self.strings = []
+        self._string_ids = {}
+
+    def string_id(self, text):
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+
+class _Writer:
+    """收集共享字符串表与各列数据块"""
+
+    def __init__(self):
+        self.table = StringTable()
+        self.blocks = []
+        self.size = 0
+
+    def add_block(self, array):
+        data = np.ascontiguousarray(array).tobytes()
+        offset = self.size
+        padding = -len(data) % ALIGNMENT
+        self.blocks.append(data + b'\0' * padding)
+        self.size += len(data) + padding
+        return offset
+
+    def encode_column(self, name, values):
+        column, array, present = encode_column(values, self.table.string_id)
+        column = {'name': name, **column, 'offset': self.add_block(array)}
+        if present is not None:
+            column['present'] = self.add_block(present)
+        return column
+
+
+def rows_to_columns(rows):
+    """把字典行转换为 {键: 按行对齐的值列表}，键按首次出现的顺序排列"""
+    keys = {}
+    for row in rows:
+        for key in row:
+            keys.setdefault(key, None)
+    return {key: [row.get(key, MISSING) for row in rows] for key in keys}
+
+
+def encode_graph_binary(graph, highlighted_nodes=None, node_attrs=None, graph_attrs=None):
+    """
+    把图编码为二进制传输格式（bytes），节点与边的内容与 node-link JSON 一致；
+    highlighted_nodes / node_attrs / graph_attrs 的含义与 graph_json.iter_node_link_json 相同。
+    """
+    highlighted_nodes = highlighted_nodes or ()
+    node_attrs = node_attrs or {}
+    nodes = []
+    for node_id, attrs in graph.nodes(data=True):
+        node = {**attrs, 'id': node_id}
+        if node_id in highlighted_nodes:
+            node['highlight'] = True
+        extra = node_attrs.get(node_id)
+        if extra:
+            node.update(extra)
+        nodes.append(node)
+    if graph.is_multigraph():
+        links = [{**attrs, 'source': u, 'target': v, 'key': key} for u, v, key, attrs in graph.edges(keys=True, data=True)]
+    else:
+        links = [{**attrs, 'source': u, 'target': v} for u, v, attrs in graph.edges(data=True)]
+
+    writer = _Writer()
+    node_columns = [writer.encode_column(name, values) for name, values in rows_to_columns(nodes).items()]
+    link_columns = [writer.encode_column(name, values) for name, values in rows_to_columns(links).items()]
+
+    header = json.dumps({
+        'version': FORMAT_VERSION,
+        'directed': graph.is_directed(),
+        'multigraph': graph.is_multigraph(),
+        'graph': {**graph.graph, **graph_attrs} if graph_attrs else graph.graph,
+        'nodeCount': len(nodes),
+        'linkCount': len(links),
+        'strings': writer.table.strings,
+        'nodes': node_columns,
+        'links': link_columns,
+    }, separators=(',', ':'), default=str).encode('utf-8')
+    preamble = MAGIC + struct.pack('<I', len(header)) + header
+    preamble += b'\0' * (-len(preamble) % ALIGNMENT)
+    return preamble + b''.join(writer.blocks)
+
+
+COLUMN_DTYPES = {'int32': '<i4', 'float64': '<f8', 'bool': 'u1', 'dict8': 'u1', 'dict16': '<u2', 'str': '<i4', 'json': '<i4'}
+
+
+def _decode_column(column, data, count, strings):
+    array = np.frombuffer(data, dtype=COLUMN_DTYPES[column['kind']], count=count, offset=column['offset'])
+    present = None
+    if 'present' in column:
+        present = np.frombuffer(data, dtype='u1', count=count, offset=column['present'])
+    return decode_column(column, array, present, strings)
+
+
+def decode_graph_binary(payload):
+    """解码二进制传输格式，返回与 node-link JSON 相同结构的字典（主要用于测试与基准测试）"""
+    payload = memoryview(payload)
+    if bytes(payload[:4]) != MAGIC:
+        raise ValueError("Not a binary graph payload")
+    (header_length,) = struct.unpack_from('<I', payload, 4)
+    header = json.loads(bytes(payload[8:8 + header_length]))
+    if header['version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary graph version: {header['version']}")
+    data_start = 8 + header_length
+    data_start += -data_start % ALIGNMENT
+    data = payload[data_start:]
+    strings = header['strings']
+
+    def rows(columns, count):
+        result = [{} for _ in range(count)]
+        for column in columns:
+            for row, value in zip(result, _decode_column(column, data, count, strings)):
+                if value is not MISSING:
+                    row[column['name']] = value
+        return result
+
+    return {
+        'directed': header['directed'],
+        'multigraph': header['multigraph'],
+        'graph': header['graph'],
+        'nodes': rows(header['nodes'], header['nodeCount']),
+        'links': rows(header['links'], header['linkCount']),
+    }
@@ -0,0 +1,320 @@
+# graph_indexes.py
+"""
+已加载图的二级索引（启动时构建一次）。
+
+- 流派 -> 作品ID、发布年份 -> 作品ID（按年份排序，支持区间查询）
+- 节点类型 -> 节点ID、边类型 -> 边键 (u, v, key)
+- 桑基图下钻使用的邻接索引：影响力边按 (源流派, 目标流派) 分桶，
+  以及每个作品按目标流派分组的影响力出边、每个艺术家按作品流派分组的创作边
+- 按年份分区的可见节点（YearPartition，首次按时间筛选时构建，图变化后重建）：
+  时间范围（可叠加流派）筛选只需合并范围内各年份预先算好的节点列表
+
+各分桶是以条目为键、值为 None 的 dict（按插入顺序的集合）：保持原图的节点/边遍历顺序，
+因此基于索引的筛选结果与逐个扫描原图的结果顺序一致，增量删除条目也只需 O(1)。
+筛选的开销只与结果规模相关，而不再需要扫描整张图。
+"""
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+WORK_TYPES = ('Song', 'Album')
+INFLUENCE_EDGE_TYPES = frozenset({'InStyleOf', 'InterpolatesFrom', 'CoverOf', 'LyricalReferenceTo', 'DirectlySamples'})
+CREATION_EDGE_TYPES = frozenset({'PerformerOf', 'ComposerOf', 'ProducerOf', 'LyricistOf'})
+
+
+def parse_release_year(value):
+    """release_date 为纯数字字符串时返回年份，否则返回 None"""
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+class GraphIndexes:
+    """
+    MultiDiGraph（或 CSRGraph）的属性索引。启动时整体构建；图发生增量变化时通过
+    add_/remove_node_entries、add_/remove_edge_entries 与 refresh_linked 同步维护（见 graph_ingest）。
+    增量加入的条目追加在各分桶末尾。
+    """
+
+    def __init__(self, G):
+        self.graph = G
+        self.nodes_by_type = {}
+        self.works_by_genre = {}
+        self.edges_by_type = {}
+        self.genres = []
+        self._genre_counts = {}
+        self.work_ids = set()
+        self._work_sets_by_genre = {}
+        # 按年份排序的作品（同一年份内保持加入顺序），支持区间查询
+        self.work_years = []
+        self.works_by_year = []
+        # 节点ID -> 在原图中的序号，用于把集合形式的结果按原图顺序排列
+        self.node_order = {}
+        self._next_order = 0
+        self._node_genre = {}
+
+        # 影响力边: (源流派, 目标流派) -> {(u, v, key)}；作品 -> {目标流派: {(v, key)}}
+        self.influence_by_genre_pair = {}
+        self.influence_out = {}
+        # 创作边: 艺术家 -> {作品流派: {(作品, key)}}，分别记录艺术家为源 (out) 和为目标 (in) 的边
+        self.creation_out = {}
+        self.creation_in = {}
+        # (全部作品的分区, {流派: 该流派作品的分区})，任何增量变化都会使其失效
+        self._year_partitions = None
+
+        # 构建期间只收集 (年份, 作品)，结束后一次稳定排序（同一年份内保持节点顺序）；
+        # 之后的增量加入才逐个二分插入
+        self._dated_works = []
+        for node_id, data in G.nodes(data=True):
+            self.add_node_entries(node_id, data)
+        self._dated_works.sort(key=lambda item: item[0])
+        self.work_years = [year for year, _ in self._dated_works]
+        self.works_by_year = [work for _, work in self._dated_works]
+        self._dated_works = None
+
+        for u, v, key, data in G.edges(keys=True, data=True):
+            self.add_edge_entries(u, v, key, data)
+
+        # 至少与一个非作品节点相连（含自环）的非作品节点：无论作品如何筛选都不会变成孤立节点
+        self.linked_non_works = {n for n in G.nodes() if self._is_linked(n)}
+
+    # --- 增量维护 ---
+
+    def add_node_entries(self, node_id, data):
+        self._year_partitions = None
+        if node_id not in self.node_order:
+            self.node_order[node_id] = self._next_order
+            self._next_order += 1
+        genre = data.get('genre')
+        self._node_genre[node_id] = genre
+        node_type = data.get('Node Type')
+        if node_type is not None:
+            _add_to_bucket(self.nodes_by_type, node_type, node_id)
+        if genre:
+            self._genre_counts[genre] = self._genre_counts.get(genre, 0) + 1
+            if self._genre_counts[genre] == 1:
+                self.genres = sorted(self._genre_counts)
+        if node_type in WORK_TYPES:
+            self.work_ids.add(node_id)
+            _add_to_bucket(self.works_by_genre, genre, node_id)
+            self._work_sets_by_genre.setdefault(genre, set()).add(node_id)
+            year = parse_release_year(data.get('release_date'))
+            if year is not None and self._dated_works is not None:
+                self._dated_works.append((year, node_id))
+            elif year is not None:
+                i = bisect_right(self.work_years, year)
+                self.work_years.insert(i, year)
+                self.works_by_year.insert(i, node_id)
+
+    def remove_node_entries(self, node_id, data, deleted=False):
+        """撤销 add_node_entries；deleted=True 表示节点已从图中删除（同时忘记其顺序）"""
+        self._year_partitions = None
+        genre = data.get('genre')
+        node_type = data.get('Node Type')
+        if node_type is not None:
+            _remove_from_bucket(self.nodes_by_type, node_type, node_id)
+        if genre:
+            self._genre_counts[genre] -= 1
+            if not self._genre_counts[genre]:
+                del self._genre_counts[genre]
+                self.genres = sorted(self._genre_counts)
+        if node_type in WORK_TYPES:
+            self.work_ids.discard(node_id)
+            _remove_from_bucket(self.works_by_genre, genre, node_id)
+            works = self._work_sets_by_genre[genre]
+            works.discard(node_id)
+            if not works:
+                del self._work_sets_by_genre[genre]
+            year = parse_release_year(data.get('release_date'))
+            if year is not None:
+                lo = bisect_left(self.work_years, year)
+                i = self.works_by_year.index(node_id, lo, bisect_right(self.work_years, year))
+                del self.work_years[i]
+                del self.works_by_year[i]
+        if deleted:
+            self._node_genre.pop(node_id, None)
+            self.node_order.pop(node_id, None)
+            self.linked_non_works.discard(node_id)
+
+    def add_edge_entries(self, u, v, key, data):
+        self._year_partitions = None
+        edge_type = data.get('Edge Type')
+        if edge_type is not None:
+            _add_to_bucket(self.edges_by_type, edge_type, (u, v, key))
+        if edge_type in INFLUENCE_EDGE_TYPES:
+            _add_to_bucket(self.influence_by_genre_pair, (self._node_genre[u], self._node_genre[v]), (u, v, key))
+            _add_to_bucket(self.influence_out.setdefault(u, {}), self._node_genre[v], (v, key))
+        elif edge_type in CREATION_EDGE_TYPES:
+            _add_to_bucket(self.creation_out.setdefault(u, {}), self._node_genre[v], (v, key))
+            _add_to_bucket(self.creation_in.setdefault(v, {}), self._node_genre[u], (u, key))
+
+    def remove_edge_entries(self, u, v, key, data):
+        """撤销 add_edge_entries（须在端点的节点条目仍存在时调用）"""
+        self._year_partitions = None
+        edge_type = data.get('Edge Type')
+        if edge_type is not None:
+            _remove_from_bucket(self.edges_by_type, edge_type, (u, v, key))
+        if edge_type in INFLUENCE_EDGE_TYPES:
+            _remove_from_bucket(self.influence_by_genre_pair, (self._node_genre[u], self._node_genre[v]), (u, v, key))
+            _remove_from_nested_bucket(self.influence_out, u, self._node_genre[v], (v, key))
+        elif edge_type in CREATION_EDGE_TYPES:
+            _remove_from_nested_bucket(self.creation_out, u, self._node_genre[v], (v, key))
+            _remove_from_nested_bucket(self.creation_in, v, self._node_genre[u], (u, key))
+
+    def _is_linked(self, node_id):
+        G = self.graph
+        return node_id not in self.work_ids and any(
+            nbr not in self.work_ids for nbr in chain(G.successors(node_id), G.predecessors(node_id))
+        )
+
+    def refresh_linked(self, nodes):
+        """重新计算 nodes（须仍在图中）是否属于 linked_non_works"""
+        self._year_partitions = None
+        for node_id in nodes:
+            if self._is_linked(node_id):
+                self.linked_non_works.add(node_id)
+            else:
+                self.linked_non_works.discard(node_id)
+
+    # --- 查询 ---
+
+    def genre_works(self, genre):
+        """某一流派的全部作品（集合）"""
+        return self._work_sets_by_genre.get(genre, set())
+
+    def works_in_genres(self, genres):
+        return set().union(*(self.genre_works(genre) for genre in genres))
+
+    def works_in_year_range(self, start_year, end_year):
+        """发布年份位于 [start_year, end_year] 的作品"""
+        lo = bisect_left(self.work_years, start_year)
+        hi = bisect_right(self.work_years, end_year)
+        return set(self.works_by_year[lo:hi])
+
+    def nodes_of_types(self, node_types):
+        return set(chain.from_iterable(self.nodes_by_type.get(t, []) for t in node_types))
+
+    def edges_of_types(self, edge_types):
+        """指定类型的全部边键 (u, v, key)"""
+        return set(chain.from_iterable(self.edges_by_type.get(t, []) for t in edge_types))
+
+    def _neighbors(self, node_id):
+        G = self.graph
+        return chain(G.successors(node_id), G.predecessors(node_id))
+
+    def year_partitions(self):
+        """返回 (全部作品的分区, {流派: 分区})，首次调用或图变化后重新构建"""
+        partitions = self._year_partitions
+        if partitions is None:
+            overall = YearPartition()
+            by_genre = {}
+            for year, work in zip(self.work_years, self.works_by_year):
+                others = [nbr for nbr in self._neighbors(work) if nbr not in self.work_ids]
+                overall.append(year, work, others)
+                genre_partition = by_genre.get(self._node_genre[work])
+                if genre_partition is None:
+                    genre_partition = by_genre[self._node_genre[work]] = YearPartition()
+                genre_partition.append(year, work, others)
+            for partition in chain((overall,), by_genre.values()):
+                partition.finish()
+            partitions = self._year_partitions = (overall, by_genre)
+        return partitions
+
+    def nodes_in_year_range(self, start_year, end_year, genres=None):
+        """
+        与 nodes_with_works(发布年份位于 [start_year, end_year]（且属于 genres）的作品) 结果相同，
+        但直接合并各年份分区中预先算好的节点列表，不再逐个遍历作品的邻居。
+        """
+        overall, by_genre = self.year_partitions()
+        if genres is None:
+            partitions = [overall]
+        else:
+            partitions = [by_genre[genre] for genre in set(genres) if genre in by_genre]
+        visible = set(self.linked_non_works)
+        enclosed = []
+        for partition in partitions:
+            lo, hi = partition.span(start_year, end_year)
+            visible.update(partition.nodes[partition.node_offsets[lo]:partition.node_offsets[hi]])
+            enclosed.extend(partition.enclosed[partition.enclosed_offsets[lo]:partition.enclosed_offsets[hi]])
+        if enclosed:
+            # 只与作品相连的作品：仅当它的某个邻居也被选中时才可见
+            works = set()
+            for partition in partitions:
+                lo, hi = partition.span(start_year, end_year)
+                works.update(partition.works[partition.work_offsets[lo]:partition.work_offsets[hi]])
+            visible.update(work for work in enclosed if any(nbr in works for nbr in self._neighbors(work)))
+        return visible
+
+    def nodes_with_works(self, works):
+        """
+        只保留 works 中的作品时图中剩余的节点：等价于删除其余作品后再删除孤立节点，
+        但只遍历保留下来的作品的邻居。
+        """
+        G = self.graph
+        visible = set(self.linked_non_works)
+        for work in works:
+            for nbr in chain(G.successors(work), G.predecessors(work)):
+                if nbr in works:
+                    visible.add(work)
+                elif nbr not in self.work_ids:
+                    visible.add(work)
+                    visible.add(nbr)
+        return visible
+
+
+class YearPartition:
+    """
+    一组作品按发布年份分区后的前缀结构。years 为升序的不同年份；
+    *_offsets[i] 为第 i 个年份在对应扁平列表中的起始位置（末尾多一项总长度），
+    因此任意年份区间都对应每个列表中的一个连续切片。
+    - works: 按年份排列的作品
+    - nodes: 筛选后一定可见的节点：至少有一个非作品邻居的作品，以及这些作品的非作品邻居
+    - enclosed: 只与作品相连的作品，是否可见取决于区间内是否选中了它的邻居
+    """
+
+    def __init__(self):
+        self.years = []
+        self.works, self.work_offsets = [], []
+        self.nodes, self.node_offsets = [], []
+        self.enclosed, self.enclosed_offsets = [], []
+
+    def _mark(self):
+        self.work_offsets.append(len(self.works))
+        self.node_offsets.append(len(self.nodes))
+        self.enclosed_offsets.append(len(self.enclosed))
+
+    def append(self, year, work, others):
+        """按年份升序加入作品及其非作品邻居 others"""
+        if not self.years or self.years[-1] != year:
+            self.years.append(year)
+            self._mark()
+        self.works.append(work)
+        if others:
+            self.nodes.append(work)
+            self.nodes.extend(others)
+        else:
+            self.enclosed.append(work)
+
+    def finish(self):
+        self._mark()
+
+    def span(self, start_year, end_year):
+        """[start_year, end_year] 覆盖的年份下标区间 [lo, hi)"""
+        lo = bisect_left(self.years, start_year)
+        return lo, max(lo, bisect_right(self.years, end_year))
+
+
+def _add_to_bucket(buckets, bucket, item):
+    buckets.setdefault(bucket, {})[item] = None
+
+
+def _remove_from_bucket(buckets, bucket, item):
+    items = buckets[bucket]
+    del items[item]
+    if not items:
+        del buckets[bucket]
+
+
+def _remove_from_nested_bucket(buckets, outer, inner, item):
+    _remove_from_bucket(buckets[outer], inner, item)
+    if not buckets[outer]:
+        del buckets[outer]
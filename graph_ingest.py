@@ -0,0 +1,306 @@
+# graph_ingest.py
+"""
+对内存中的 MultiDiGraph 增量应用节点/边的新增、修改、删除批次，并同步维护二级索引 (GraphIndexes)
+与名称索引 (NameIndex)，无需重新加载整张图。
+
+批次格式（各部分均可省略）:
+    {
+      "nodes": {"add": [{"id": ..., 属性...}], "update": [{"id": ..., 属性...}], "delete": [节点ID]},
+      "links": {"add": [{"source", "target", "key"(可选), 属性...}],
+                "update": [{"source", "target", "key", 属性...}],
+                "delete": [{"source", "target", "key"(可选，省略时删除两点间全部平行边)}]}
+    }
+
+应用顺序: 新增节点 -> 修改节点 -> 新增边 -> 修改边 -> 删除边 -> 删除节点（连同其全部边）。
+整个批次先在模拟状态上校验，全部通过后才修改图，因此出错的批次不会留下部分修改。
+修改属性为合并语义；节点的 id、边的 source/target/key 不可修改。
+"""
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+
+NODE_OPS = ('add', 'update', 'delete')
+LINK_OPS = ('add', 'update', 'delete')
+# 参与索引的属性：取值必须是字符串（或 null）
+INDEXED_NODE_ATTRS = ('Node Type', 'genre', 'release_date')
+NAME_ATTRS = ('name', 'Node Type')
+INDEXED_EDGE_ATTRS = ('Edge Type',)
+
+
+class IngestError(Exception):
+    """批次无法应用时抛出，status 为对应的 HTTP 状态码"""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ReadWriteLock:
+    """
+    读写锁：读者之间并发，写者独占。写者等待期间不再放入新的读者，避免写者饥饿。
+    不可重入：持有读锁时不要再次获取。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+def next_graph_version(version, batch):
+    """由上一个版本与批次内容派生新的图版本"""
+    payload = json.dumps(batch, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(f"{version}:{payload}".encode('utf-8')).hexdigest()[:16]
+
+
+# --- 校验 ---
+
+def _check_id(value, what):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise IngestError(f"{what} must be an integer or a string")
+    return value
+
+
+def _check_attrs(item, indexed, what):
+    if not isinstance(item, dict):
+        raise IngestError(f"{what} must be an object")
+    for name in indexed:
+        value = item.get(name)
+        if value is not None and not isinstance(value, str):
+            raise IngestError(f"{what}: '{name}' must be a string")
+    return item
+
+
+def _ops(batch, section, ops):
+    part = batch.get(section) or {}
+    if not isinstance(part, dict):
+        raise IngestError(f"'{section}' must be an object")
+    unknown = set(part) - set(ops)
+    if unknown:
+        raise IngestError(f"Unknown {section} operations: {sorted(unknown)}")
+    result = {}
+    for op in ops:
+        items = part.get(op) or []
+        if not isinstance(items, list):
+            raise IngestError(f"'{section}.{op}' must be a list")
+        result[op] = items
+    return result
+
+
+class _Simulation:
+    """在不修改图的前提下跟踪批次应用过程中节点与边键的存在性"""
+
+    def __init__(self, G):
+        self.G = G
+        self.added_nodes = set()
+        self.deleted_nodes = set()
+        self._pair_keys = {}
+
+    def has_node(self, node_id):
+        return node_id in self.added_nodes or (node_id in self.G and node_id not in self.deleted_nodes)
+
+    def keys(self, u, v):
+        keys = self._pair_keys.get((u, v))
+        if keys is None:
+            keys = self._pair_keys[u, v] = set(self.G[u][v]) if self.G.has_edge(u, v) else set()
+        return keys
+
+    def add_edge(self, u, v, key):
+        keys = self.keys(u, v)
+        if key is None:
+            # 与 MultiDiGraph.new_edge_key 相同的规则
+            key = len(keys)
+            while key in keys:
+                key += 1
+        keys.add(key)
+
+
+def validate_batch(G, batch):
+    """校验整个批次，返回 (节点操作, 边操作)；任何一项不合法都会抛出 IngestError"""
+    if not isinstance(batch, dict):
+        raise IngestError("Request body must be a JSON object")
+    unknown = set(batch) - {'nodes', 'links', 'version'}
+    if unknown:
+        raise IngestError(f"Unknown fields: {sorted(unknown)}")
+    node_ops = _ops(batch, 'nodes', NODE_OPS)
+    link_ops = _ops(batch, 'links', LINK_OPS)
+    sim = _Simulation(G)
+
+    for item in node_ops['add']:
+        _check_attrs(item, INDEXED_NODE_ATTRS + NAME_ATTRS, 'nodes.add')
+        node_id = _check_id(item.get('id'), 'nodes.add: id')
+        if sim.has_node(node_id):
+            raise IngestError(f"Node already exists: {node_id}", 409)
+        sim.added_nodes.add(node_id)
+
+    for item in node_ops['update']:
+        _check_attrs(item, INDEXED_NODE_ATTRS + NAME_ATTRS, 'nodes.update')
+        node_id = _check_id(item.get('id'), 'nodes.update: id')
+        if not sim.has_node(node_id):
+            raise IngestError(f"Node not found: {node_id}", 404)
+
+    for item in link_ops['add']:
+        _check_attrs(item, INDEXED_EDGE_ATTRS, 'links.add')
+        u = _check_id(item.get('source'), 'links.add: source')
+        v = _check_id(item.get('target'), 'links.add: target')
+        for node_id in (u, v):
+            if not sim.has_node(node_id):
+                raise IngestError(f"Node not found: {node_id}", 404)
+        key = item.get('key')
+        if key is not None:
+            _check_id(key, 'links.add: key')
+            if key in sim.keys(u, v):
+                raise IngestError(f"Link already exists: {u} -> {v} [{key}]", 409)
+        sim.add_edge(u, v, key)
+
+    for op in ('update', 'delete'):
+        for item in link_ops[op]:
+            _check_attrs(item, INDEXED_EDGE_ATTRS, f'links.{op}')
+            u = _check_id(item.get('source'), f'links.{op}: source')
+            v = _check_id(item.get('target'), f'links.{op}: target')
+            key = item.get('key')
+            if key is None and op == 'update':
+                raise IngestError("links.update: key is required")
+            keys = sim.keys(u, v) if sim.has_node(u) and sim.has_node(v) else set()
+            if key is None:
+                if not keys:
+                    raise IngestError(f"Link not found: {u} -> {v}", 404)
+            elif _check_id(key, f'links.{op}: key') not in keys:
+                raise IngestError(f"Link not found: {u} -> {v} [{key}]", 404)
+            if op == 'delete':
+                if key is None:
+                    keys.clear()
+                else:
+                    keys.discard(key)
+
+    for node_id in node_ops['delete']:
+        _check_id(node_id, 'nodes.delete')
+        if not sim.has_node(node_id):
+            raise IngestError(f"Node not found: {node_id}", 404)
+        sim.added_nodes.discard(node_id)
+        sim.deleted_nodes.add(node_id)
+
+    return node_ops, link_ops
+
+
+# --- 应用 ---
+
+def _incident_edges(G, node_id):
+    """节点的全部关联边 (u, v, key, data)，自环只出现一次"""
+    edges = list(G.out_edges(node_id, keys=True, data=True))
+    edges.extend(edge for edge in G.in_edges(node_id, keys=True, data=True) if edge[0] != node_id)
+    return edges
+
+
+def _neighbors(G, node_id):
+    return set(G.successors(node_id)) | set(G.predecessors(node_id))
+
+
+def apply_batch(G, indexes, name_index, batch):
+    """
+    校验并应用一个批次（调用方需持有写锁）。
+    返回摘要: 各操作的数量，以及新增边实际使用的键 (addedLinks)。
+    """
+    node_ops, link_ops = validate_batch(G, batch)
+    affected = set()
+
+    for item in node_ops['add']:
+        node_id = item['id']
+        G.add_node(node_id, **item)
+        data = G.nodes[node_id]
+        indexes.add_node_entries(node_id, data)
+        name_index.add(node_id, data.get('name'), data.get('Node Type'))
+        affected.add(node_id)
+
+    for item in node_ops['update']:
+        node_id = item['id']
+        data = G.nodes[node_id]
+        changes = {name: value for name, value in item.items() if name != 'id'}
+        renamed = any(data.get(name) != changes[name] for name in NAME_ATTRS if name in changes)
+        if any(data.get(name) != changes[name] for name in INDEXED_NODE_ATTRS if name in changes):
+            # 流派/类型变化会改变关联边所在的分桶：先撤销节点与关联边的条目，修改后再加回
+            edges = _incident_edges(G, node_id)
+            for edge in edges:
+                indexes.remove_edge_entries(*edge)
+            indexes.remove_node_entries(node_id, data)
+            data.update(changes)
+            indexes.add_node_entries(node_id, data)
+            for edge in edges:
+                indexes.add_edge_entries(*edge)
+            affected.add(node_id)
+            affected |= _neighbors(G, node_id)
+        else:
+            data.update(changes)
+        if renamed:
+            name_index.update(node_id, data.get('name'), data.get('Node Type'))
+
+    added_links = []
+    for item in link_ops['add']:
+        u, v = item['source'], item['target']
+        key = G.add_edge(u, v, **item)
+        indexes.add_edge_entries(u, v, key, G[u][v][key])
+        added_links.append({'source': u, 'target': v, 'key': key})
+        affected.update((u, v))
+
+    for item in link_ops['update']:
+        u, v, key = item['source'], item['target'], item['key']
+        data = G[u][v][key]
+        changes = {name: value for name, value in item.items() if name != 'key'}
+        if data.get('Edge Type') != changes.get('Edge Type', data.get('Edge Type')):
+            indexes.remove_edge_entries(u, v, key, data)
+            data.update(changes)
+            indexes.add_edge_entries(u, v, key, data)
+        else:
+            data.update(changes)
+
+    for item in link_ops['delete']:
+        u, v, key = item['source'], item['target'], item.get('key')
+        for k in ([key] if key is not None else list(G[u][v])):
+            indexes.remove_edge_entries(u, v, k, G[u][v][k])
+            G.remove_edge(u, v, k)
+        affected.update((u, v))
+
+    for node_id in node_ops['delete']:
+        for edge in _incident_edges(G, node_id):
+            indexes.remove_edge_entries(*edge)
+        affected |= _neighbors(G, node_id)
+        indexes.remove_node_entries(node_id, G.nodes[node_id], deleted=True)
+        name_index.remove(node_id)
+        G.remove_node(node_id)
+
+    indexes.refresh_linked(node_id for node_id in affected if node_id in G)
+    return {
+        'nodes': {op: len(node_ops[op]) for op in NODE_OPS},
+        'links': {op: len(link_ops[op]) for op in LINK_OPS},
+        'addedLinks': added_links,
+    }
@@ -0,0 +1,88 @@
+# graph_json.py
+"""
+流式 node-link JSON 编码。
+
+输出与 nx.node_link_data(graph, edges="links") 再整体序列化的结果逐字节一致，
+但直接从图的节点/边迭代器逐条编码，不构建完整的中间字典，按块产出 UTF-8 字节串，
+可直接作为 Flask 的分块响应体。
+"""
+import json
+
+CHUNK_SIZE = 64 * 1024
+
+# node_link_data 的顶层键（插入顺序）；编码器 sort_keys=True 时按字母序输出
+TOP_LEVEL_KEYS = ('directed', 'multigraph', 'graph', 'nodes', 'links')
+
+
+def _iter_nodes(graph, encode, highlighted_nodes, node_attrs):
+    for node_id, attrs in graph.nodes(data=True):
+        node = {**attrs, 'id': node_id}
+        # 高亮标记与附加属性在编码时直接写入，不再回头修改已生成的节点列表
+        if node_id in highlighted_nodes:
+            node['highlight'] = True
+        extra = node_attrs.get(node_id)
+        if extra:
+            node.update(extra)
+        yield encode(node)
+
+
+def _iter_links(graph, encode):
+    if graph.is_multigraph():
+        for u, v, key, attrs in graph.edges(keys=True, data=True):
+            yield encode({**attrs, 'source': u, 'target': v, 'key': key})
+    else:
+        for u, v, attrs in graph.edges(data=True):
+            yield encode({**attrs, 'source': u, 'target': v})
+
+
+def _iter_pieces(graph, encoder, highlighted_nodes, node_attrs, graph_attrs):
+    encode = encoder.encode
+    item_separator = encoder.item_separator
+    keys = sorted(TOP_LEVEL_KEYS) if encoder.sort_keys else TOP_LEVEL_KEYS
+
+    yield '{'
+    for i, key in enumerate(keys):
+        if i:
+            yield item_separator
+        yield encode(key) + encoder.key_separator
+        if key == 'directed':
+            yield encode(graph.is_directed())
+        elif key == 'multigraph':
+            yield encode(graph.is_multigraph())
+        elif key == 'graph':
+            yield encode({**graph.graph, **graph_attrs} if graph_attrs else graph.graph)
+        else:
+            items = (
+                _iter_nodes(graph, encode, highlighted_nodes, node_attrs) if key == 'nodes'
+                else _iter_links(graph, encode)
+            )
+            yield '['
+            for j, item in enumerate(items):
+                yield item_separator + item if j else item
+            yield ']'
+    yield '}\n'
+
+
+def iter_node_link_json(graph, encoder=None, highlighted_nodes=None, node_attrs=None, graph_attrs=None,
+                        chunk_size=CHUNK_SIZE):
+    """
+    以约 chunk_size 字节为一块，逐块产出 graph 的 node-link JSON（bytes）。
+    encoder 为 json.JSONEncoder 实例，决定键排序、分隔符等；highlighted_nodes 中的节点带 "highlight": true；
+    node_attrs ({节点ID: 属性字典}) 与 graph_attrs 为附加到节点和顶层 graph 上的属性（不修改原图）。
+    """
+    if encoder is None:
+        encoder = json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+    highlighted_nodes = highlighted_nodes or ()
+    node_attrs = node_attrs or {}
+
+    buffer = []
+    buffered = 0
+    for piece in _iter_pieces(graph, encoder, highlighted_nodes, node_attrs, graph_attrs):
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
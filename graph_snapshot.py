@@ -0,0 +1,299 @@
+# graph_snapshot.py
+"""
+已处理图数据 (graph_processed.json) 的二进制快照，用于服务快速启动。
+
+快照是一个目录，包含 meta.json 和若干 .npy 数组:
+- CSR 邻接: out_offsets / out_edges（按源节点分组的边号，组内顺序与 networkx 的邻接遍历一致），in_offsets / in_edges 同理；
+  edge_src / edge_dst 为每条边的源/目标节点下标
+- 列式属性: 每个节点/边属性一列（编码方式与 graph_binary 相同），缺失值由 *_present 标记
+- 驻留字符串表: strings_blob（UTF-8 拼接）+ strings_offsets
+
+服务端通过 np.load(mmap_mode='r') 以内存映射方式读取，多个工作进程共享同一份页缓存。
+边号即原始 JSON 中边的插入顺序，因此由快照重建的 MultiDiGraph 与直接读取 JSON 构建的图
+（节点顺序、邻接顺序、边键、属性）完全一致。
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import networkx as nx
+import numpy as np
+
+from graph_binary import MISSING, StringTable, decode_column, encode_column, rows_to_columns
+
+SNAPSHOT_FORMAT_VERSION = 3
+META_FILE = 'meta.json'
+
+
+def build_graph_from_processed_data(data):
+    """
+    由 graph_processed.json 格式的数据（nodes / links）构建 MultiDiGraph。
+    返回 (图, 按插入顺序排列的边键 (u, v, key) 列表)。
+    """
+    # 使用MultiDiGraph因为它支持平行边和有向边
+    G = nx.MultiDiGraph()
+
+    # 添加节点，将所有属性解包作为节点属性
+    for node_data in data.get('nodes', []):
+        G.add_node(node_data['id'], **node_data)
+
+    # 添加边 (注意：JSON文件中的键是 'links')
+    edge_order = []
+    for edge_data in data.get('links', []):
+        source_id = edge_data.get('source')
+        target_id = edge_data.get('target')
+        if G.has_node(source_id) and G.has_node(target_id):
+            key = G.add_edge(source_id, target_id, **edge_data)
+            edge_order.append((source_id, target_id, key))
+    # 显式指定了相同 key 的重复边只会更新属性，保留第一次出现的位置
+    return G, list(dict.fromkeys(edge_order))
+
+
+def source_version(raw):
+    """数据文件内容哈希（与 app.GRAPH_VERSION 一致）"""
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def _csr(index, pair_first, count):
+    """
+    按 index 分组的 CSR 偏移与边号。组内顺序与 networkx 的邻接遍历一致：
+    先按该 (u, v) 节点对第一条边出现的先后排列，同一节点对的平行边再按插入顺序排列。
+    """
+    order = np.lexsort((pair_first, index)).astype(np.int32)
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(index, minlength=count), out=offsets[1:])
+    return offsets, order
+
+
+def _stat_signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_snapshot(G, edge_order, snapshot_path, version, source_path=None):
+    """把图写成快照目录（先写临时目录，再通过两次改名替换旧快照，见 _swap_directory）"""
+    node_keys = list(G.nodes())
+    node_index = {node_id: i for i, node_id in enumerate(node_keys)}
+    table = StringTable()
+    arrays = {}
+
+    def add_column(file, name, values):
+        column, array, present = encode_column(values, table.string_id)
+        column['name'] = name
+        column['file'] = file
+        arrays[file] = array
+        if present is not None:
+            column['present_file'] = column['file'] + '_present'
+            arrays[column['present_file']] = present
+        return column
+
+    node_key_column = add_column('node_key', None, node_keys)
+    node_columns = [
+        add_column(f'node_{i}', name, values)
+        for i, (name, values) in enumerate(rows_to_columns([attrs for _, attrs in G.nodes(data=True)]).items())
+    ]
+    edge_key_column = add_column('edge_key', None, [key for _, _, key in edge_order])
+    edge_columns = [
+        add_column(f'edge_{i}', name, values)
+        for i, (name, values) in enumerate(rows_to_columns([G[u][v][key] for u, v, key in edge_order]).items())
+    ]
+
+    edge_src = np.array([node_index[u] for u, _, _ in edge_order], dtype=np.int32)
+    edge_dst = np.array([node_index[v] for _, v, _ in edge_order], dtype=np.int32)
+    arrays['edge_src'] = edge_src
+    arrays['edge_dst'] = edge_dst
+    # 每条边所在 (u, v) 节点对第一次出现的边号
+    _, first, inverse = np.unique(
+        edge_src.astype(np.int64) * max(len(node_keys), 1) + edge_dst, return_index=True, return_inverse=True
+    )
+    pair_first = first[inverse.reshape(-1)]
+    arrays['out_offsets'], arrays['out_edges'] = _csr(edge_src, pair_first, len(node_keys))
+    arrays['in_offsets'], arrays['in_edges'] = _csr(edge_dst, pair_first, len(node_keys))
+
+    encoded = [text.encode('utf-8') for text in table.strings]
+    arrays['strings_offsets'] = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=arrays['strings_offsets'][1:])
+    arrays['strings_blob'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    meta = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'version': version,
+        'source': _stat_signature(source_path) if source_path and os.path.exists(source_path) else None,
+        'node_count': len(node_keys),
+        'edge_count': len(edge_order),
+        'graph': G.graph,
+        'node_key': node_key_column,
+        'node_columns': node_columns,
+        'edge_key': edge_key_column,
+        'edge_columns': edge_columns,
+    }
+
+    parent = os.path.dirname(os.path.abspath(snapshot_path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.snapshot-', dir=parent)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, name + '.npy'), np.ascontiguousarray(array))
+        with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        _swap_directory(tmp_dir, snapshot_path)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def _swap_directory(new_dir, path):
+    """
+    用 new_dir 替换目录 path：旧目录先改名到一旁，新目录再改名到位，最后才删除旧目录。
+    目录无法被 os.replace 直接覆盖，两次改名之间 path 会短暂不存在（此时启动的进程找不到快照，回退为读取 JSON）；
+    但任何时刻都不会在删除旧快照后才发现新快照无法就位：改名失败时旧目录被移回原位，
+    进程在两次改名之间崩溃时旧快照仍保留在 .<快照名>-old-* 中，下次写快照时清理。
+    """
+    parent, name = os.path.split(os.path.abspath(path))
+    prefix = f'.{name}-old-'
+    for stale in os.listdir(parent):
+        if stale.startswith(prefix):
+            shutil.rmtree(os.path.join(parent, stale), ignore_errors=True)
+    old_dir = None
+    if os.path.exists(path):
+        old_dir = tempfile.mkdtemp(prefix=prefix, dir=parent)
+        os.replace(path, old_dir)
+    try:
+        os.replace(new_dir, path)
+    except Exception:
+        if old_dir is not None:
+            os.replace(old_dir, path)
+        raise
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def write_snapshot_from_file(source_path, snapshot_path):
+    """读取 graph_processed.json 并写出快照，返回 (节点数, 边数, 版本)"""
+    with open(source_path, 'rb') as f:
+        raw = f.read()
+    G, edge_order = build_graph_from_processed_data(json.loads(raw))
+    version = source_version(raw)
+    write_snapshot(G, edge_order, snapshot_path, version, source_path=source_path)
+    return G.number_of_nodes(), len(edge_order), version
+
+
+class SnapshotStrings:
+    """内存映射的字符串表，首次取值时整体读入，之后按下标解码并缓存"""
+
+    def __init__(self, blob, offsets):
+        self._blob_array = blob
+        self._offsets_array = offsets
+        self._blob = None
+        self._offsets = None
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._offsets_array) - 1
+
+    def __getitem__(self, i):
+        text = self._cache.get(i)
+        if text is None:
+            if self._blob is None:
+                self._blob = self._blob_array.tobytes()
+                self._offsets = self._offsets_array.tolist()
+            text = self._cache[i] = self._blob[self._offsets[i]:self._offsets[i + 1]].decode('utf-8')
+        return text
+
+
+class GraphSnapshot:
+    """以内存映射方式打开的图快照"""
+
+    def __init__(self, snapshot_path, mmap=True):
+        self.path = snapshot_path
+        with open(os.path.join(snapshot_path, META_FILE), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format: {self.meta.get('format_version')}")
+        self._mmap_mode = 'r' if mmap else None
+        self.version = self.meta['version']
+        self.node_count = self.meta['node_count']
+        self.edge_count = self.meta['edge_count']
+        self.strings = SnapshotStrings(self.array('strings_blob'), self.array('strings_offsets'))
+        self.edge_src = self.array('edge_src')
+        self.edge_dst = self.array('edge_dst')
+        self.out_offsets = self.array('out_offsets')
+        self.out_edges = self.array('out_edges')
+        self.in_offsets = self.array('in_offsets')
+        self.in_edges = self.array('in_edges')
+        self._node_keys = None
+
+    def array(self, name):
+        return np.load(os.path.join(self.path, name + '.npy'), mmap_mode=self._mmap_mode)
+
+    def is_fresh_for(self, source_path):
+        """快照是否对应当前的源文件（源文件不存在时直接使用快照）"""
+        if not os.path.exists(source_path):
+            return True
+        return self.meta.get('source') == _stat_signature(source_path)
+
+    def decode_column(self, column):
+        present = self.array(column['present_file']) if 'present_file' in column else None
+        return decode_column(column, self.array(column['file']), present, self.strings)
+
+    @property
+    def node_keys(self):
+        if self._node_keys is None:
+            self._node_keys = self.decode_column(self.meta['node_key'])
+        return self._node_keys
+
+    def _rows(self, columns, count):
+        rows = [{} for _ in range(count)]
+        for column in columns:
+            name = column['name']
+            for row, value in zip(rows, self.decode_column(column)):
+                if value is not MISSING:
+                    row[name] = value
+        return rows
+
+    def node_attrs(self):
+        return self._rows(self.meta['node_columns'], self.node_count)
+
+    def edge_attrs(self):
+        return self._rows(self.meta['edge_columns'], self.edge_count)
+
+    def to_networkx(self):
+        """
+        重建与直接读取 JSON 时完全一致的 MultiDiGraph。
+        直接填充内部邻接字典（与 add_edges_from 的结果相同），省去逐条 add_edge 的开销。
+        """
+        G = nx.MultiDiGraph()
+        G.graph.update(self.meta['graph'])
+        keys = self.node_keys
+        succ, pred = G._succ, G._pred
+        G._node.update(zip(keys, self.node_attrs()))
+        for node_id in keys:
+            succ[node_id] = {}
+            pred[node_id] = {}
+
+        edge_keys = self.decode_column(self.meta['edge_key'])
+        for u, v, key, attrs in zip(self.edge_src.tolist(), self.edge_dst.tolist(), edge_keys, self.edge_attrs()):
+            u, v = keys[u], keys[v]
+            neighbors = succ[u]
+            keydict = neighbors.get(v)
+            if keydict is None:
+                keydict = neighbors[v] = pred[v][u] = {}
+            keydict[key] = attrs
+        return G
+
+
+def default_snapshot_path(source_path):
+    """graph_processed.json -> graph_processed.snapshot"""
+    return os.path.splitext(source_path)[0] + '.snapshot'
+
+
+def open_snapshot(snapshot_path, source_path=None):
+    """打开快照；不存在、格式不符或与源文件不一致时返回 None"""
+    if not os.path.isfile(os.path.join(snapshot_path, META_FILE)):
+        return None
+    snapshot = GraphSnapshot(snapshot_path)
+    if source_path is not None and not snapshot.is_fresh_for(source_path):
+        return None
+    return snapshot
@@ -0,0 +1,23 @@
+# gunicorn.conf.py
+"""
+gunicorn 配置：preload_app 使图只在主进程中加载一次（见 wsgi.py），工作进程 fork 后共享内存页。
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+环境变量:
+- WEB_CONCURRENCY: 工作进程数（默认 CPU 核数）
+- GUNICORN_THREADS: 每个工作进程的线程数（默认 1）
+- PORT: 监听端口（默认 5001，与前端 dataService 一致）
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = True
+# 布局响应是流式输出的大 JSON，慢客户端不应触发超时
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# 增量更新 (/api/graph/ingest) 只作用于收到请求的进程：多进程时默认关闭，避免各进程的图不一致
+os.environ.setdefault('GRAPH_INGEST', '1' if workers == 1 else '0')
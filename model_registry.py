@@ -0,0 +1,141 @@
+# model_registry.py
+"""
+已训练模型的磁盘注册表。
+
+每个条目以「图内容哈希 + 用户权重偏好」为键，保存 GNN 模型权重、
+已拟合的 StandardScaler 以及优化后的权重系数。相同请求再次到来时
+可以跳过网格搜索和训练，直接进入推理。条目按最近使用时间（LRU）淘汰。
+"""
+import errno
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 模型结构或特征定义变化时递增，使旧条目自动失效
+REGISTRY_SCHEMA_VERSION = 1
+
+MODEL_FILE = 'model.pt'
+META_FILE = 'meta.pkl'
+
+
+def graph_content_hash(graph_data):
+    """对图数据（nodes/edges 字典）计算与键顺序无关的内容哈希"""
+    payload = json.dumps(graph_data, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ModelRegistry:
+    """
+    磁盘上的模型注册表，目录结构为 <root>/<key>/{model.pt, meta.pkl}。
+    max_entries 限制条目数量，max_bytes（可选）限制总占用空间，超出时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, root, max_entries=16, max_bytes=None):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def make_key(graph_hash, weight_preferences, **extra):
+        """由图内容哈希、权重偏好及其他影响结果的参数生成条目键"""
+        payload = json.dumps({
+            'schema': REGISTRY_SCHEMA_VERSION,
+            'graph': graph_hash,
+            'weight_preferences': weight_preferences,
+            **extra
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def load(self, key):
+        """读取条目，命中时刷新其最近使用时间；未命中或条目损坏时返回 None"""
+        import torch  # 只在读写模型时导入，查询接口导入本模块时不加载 torch
+        entry_dir = self._entry_dir(key)
+        with self._lock:
+            if not os.path.isdir(entry_dir):
+                return None
+            try:
+                with open(os.path.join(entry_dir, META_FILE), 'rb') as f:
+                    entry = pickle.load(f)
+                entry['model_state'] = torch.load(os.path.join(entry_dir, MODEL_FILE), map_location='cpu')
+                os.utime(entry_dir)
+            except Exception as e:
+                logger.warning(f"模型注册表条目 {key} 读取失败，将重新训练: {e}")
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                return None
+        return entry
+
+    def save(self, key, model_state, **meta):
+        """
+        保存条目，随后按 LRU 淘汰超出上限的条目。成功（或条目已存在）时返回 True。
+        先写入唯一的临时目录再原子重命名为条目目录，不删除已有条目：多个进程（异步任务进程池、
+        gunicorn 工作进程）同时保存同一个键时，先完成重命名的进程胜出，其余进程视为已保存。
+        写入失败只记录日志并返回 False，不影响已经得到的预测结果。
+        """
+        import torch
+        with self._lock:
+            tmp_dir = None
+            try:
+                tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=self.root)
+                torch.save(model_state, os.path.join(tmp_dir, MODEL_FILE))
+                with open(os.path.join(tmp_dir, META_FILE), 'wb') as f:
+                    pickle.dump(meta, f)
+                entry_dir = self._entry_dir(key)
+                try:
+                    os.rename(tmp_dir, entry_dir)
+                    tmp_dir = None
+                except OSError as e:
+                    # 目标目录已存在（其他进程已保存同一个键）：rename 报 ENOTEMPTY / EEXIST
+                    if e.errno not in (errno.ENOTEMPTY, errno.EEXIST) or not os.path.isdir(entry_dir):
+                        raise
+                    logger.info(f"模型注册表条目 {key[:12]} 已由其他进程保存，沿用已有条目")
+                self._evict()
+                return True
+            except Exception as e:
+                logger.warning(f"模型注册表条目 {key[:12]} 写入失败: {e}")
+                return False
+            finally:
+                if tmp_dir is not None:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def __contains__(self, key):
+        return os.path.isdir(self._entry_dir(key))
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith('.') or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)
+                )
+                entries.append((os.path.getmtime(path), size, path))
+            except FileNotFoundError:
+                continue  # 其他进程刚刚淘汰了该条目
+        entries.sort()
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (
+            len(entries) > self.max_entries or
+            (self.max_bytes is not None and total_bytes > self.max_bytes and len(entries) > 1)
+        ):
+            _, size, path = entries.pop(0)
+            shutil.rmtree(path, ignore_errors=True)
+            total_bytes -= size
+            logger.info(f"模型注册表淘汰条目: {os.path.basename(path)}")
@@ -0,0 +1,156 @@
+# name_index.py
+"""
+节点名称搜索索引（不区分大小写）。
+
+- 完全匹配：小写名称 -> 节点ID 的字典
+- 前缀匹配：按小写名称排序的列表，二分查找
+- 子串匹配：长度 1~3 的 n-gram 倒排表；查询取其全部 3-gram 的倒排表求交集后再逐个校验
+
+搜索结果按 完全匹配 > 前缀匹配 > 词首匹配 > 其他子串匹配 排序，同一档内名称越短越靠前，
+只返回前 k 个候选。
+"""
+import heapq
+from bisect import bisect_left, bisect_right, insort
+
+MAX_GRAM = 3
+
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_WORD_PREFIX = 2
+RANK_SUBSTRING = 3
+
+
+def _grams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NameIndex:
+    def __init__(self, entries=()):
+        """entries: 可迭代的 (node_id, name, node_type)"""
+        self.exact = {}       # 小写名称 -> 节点ID（重名时保留最后一个，与旧的 NODE_ID_MAP 一致）
+        self._entries = []    # 条目号 -> (小写名称, 名称, 节点ID, 节点类型)；已删除的条目为 None
+        self._entry_of_node = {}  # 节点ID -> 条目号
+        self._sorted = []     # 按小写名称排序的 (小写名称, 条目号)
+        self._postings = {}   # n-gram -> 条目号集合
+        self._sorted_names = None
+        for node_id, name, node_type in entries:
+            key = self._add_entry(node_id, name, node_type)
+            if key is not None:
+                self._sorted.append(key)
+        self._sorted.sort()
+
+    def __len__(self):
+        return len(self._entry_of_node)
+
+    def _add_entry(self, node_id, name, node_type):
+        if not isinstance(name, str):
+            return None
+        lower = name.lower()
+        entry_id = len(self._entries)
+        self._entries.append((lower, name, node_id, node_type))
+        self._entry_of_node[node_id] = entry_id
+        self.exact[lower] = node_id
+        for n in range(1, MAX_GRAM + 1):
+            for gram in _grams(lower, n):
+                self._postings.setdefault(gram, set()).add(entry_id)
+        self._sorted_names = None
+        return lower, entry_id
+
+    def add(self, node_id, name, node_type=None):
+        """加入一个节点名称（增量更新，无需重建）"""
+        key = self._add_entry(node_id, name, node_type)
+        if key is not None:
+            insort(self._sorted, key)
+
+    def remove(self, node_id):
+        """删除一个节点的名称（节点没有名称时什么也不做）"""
+        entry_id = self._entry_of_node.pop(node_id, None)
+        if entry_id is None:
+            return
+        lower = self._entries[entry_id][0]
+        self._entries[entry_id] = None
+        del self._sorted[bisect_left(self._sorted, (lower, entry_id))]
+        for n in range(1, MAX_GRAM + 1):
+            for gram in _grams(lower, n):
+                postings = self._postings[gram]
+                postings.discard(entry_id)
+                if not postings:
+                    del self._postings[gram]
+        if self.exact.get(lower) == node_id:
+            # 重名时退回到剩余条目中最后加入的一个
+            hi = bisect_right(self._sorted, (lower, len(self._entries)))
+            if hi and self._sorted[hi - 1][0] == lower:
+                self.exact[lower] = self._entries[self._sorted[hi - 1][1]][2]
+            else:
+                del self.exact[lower]
+        self._sorted_names = None
+
+    def update(self, node_id, name, node_type=None):
+        """替换一个节点的名称与类型"""
+        self.remove(node_id)
+        self.add(node_id, name, node_type)
+
+    def sorted_names(self):
+        """全部名称（区分大小写排序），供 /api/graph/meta 使用；结果会被缓存"""
+        if self._sorted_names is None:
+            self._sorted_names = sorted(entry[1] for entry in self._entries if entry is not None)
+        return self._sorted_names
+
+    def _prefix_matches(self, query):
+        for i in range(bisect_left(self._sorted, (query,)), len(self._sorted)):
+            lower, entry_id = self._sorted[i]
+            if not lower.startswith(query):
+                break
+            yield entry_id
+
+    def _substring_candidates(self, query):
+        if len(query) <= MAX_GRAM:
+            return self._postings.get(query, set())
+        postings = [self._postings.get(gram) for gram in _grams(query, MAX_GRAM)]
+        if any(p is None for p in postings):
+            return set()
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            candidates &= p
+            if not candidates:
+                break
+        return {entry_id for entry_id in candidates if query in self._entries[entry_id][0]}
+
+    def _rank(self, query, entry_id):
+        lower = self._entries[entry_id][0]
+        if lower == query:
+            rank = RANK_EXACT
+        elif lower.startswith(query):
+            rank = RANK_PREFIX
+        elif any(word.startswith(query) for word in lower.split()):
+            rank = RANK_WORD_PREFIX
+        else:
+            rank = RANK_SUBSTRING
+        return (rank, len(lower), lower, entry_id)
+
+    def search(self, query, limit=10):
+        """返回排序后的前 limit 个候选: [{'id', 'name', 'type', 'rank'}]"""
+        if not query or limit <= 0:
+            return []
+        query = query.lower()
+        # 前缀匹配的排名总是高于其他子串匹配：前缀候选已足够时不必再查 n-gram 倒排表
+        candidates = list(self._prefix_matches(query))
+        if len(candidates) < limit:
+            candidates = self._substring_candidates(query)
+        top = heapq.nsmallest(limit, (self._rank(query, entry_id) for entry_id in candidates))
+        results = []
+        for rank, _, _, entry_id in top:
+            _, name, node_id, node_type = self._entries[entry_id]
+            results.append({'id': node_id, 'name': name, 'type': node_type, 'rank': rank})
+        return results
+
+    def lookup(self, query):
+        """按名称查找单个节点ID：优先完全匹配，否则取排名最高的候选"""
+        if not query:
+            return None
+        lower = query.lower()
+        if lower in self.exact:
+            return self.exact[lower]
+        results = self.search(lower, limit=1)
+        return results[0]['id'] if results else None
@@ -0,0 +1,1346 @@
+# prediction.py
+"""
+艺术家潜力预测流水线：构建知识图谱 -> 特征提取 -> 权重优化 -> 异构图神经网络训练/复用 -> 生成报告。
+
+依赖 torch / torch_geometric / scikit-learn / shap / matplotlib，导入开销较大。
+app.py 只在第一次处理 /predict 请求时才导入本模块；异步预测任务的工作进程也只导入本模块。
+"""
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+
+import matplotlib
+matplotlib.use('Agg')  # 使用非GUI后端
+import networkx as nx
+import numpy as np
+import shap
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import GridSearchCV, KFold
+from sklearn.preprocessing import StandardScaler
+from torch_geometric.data import HeteroData
+from torch_geometric.nn import GATConv
+
+from feature_engine import extract_features_columnar, get_graph_columns
+from model_registry import ModelRegistry, graph_content_hash
+
+logger = logging.getLogger(__name__)
+
+# 当前日期设定
+CURRENT_YEAR = 2040
+
+# 特征提取引擎: 'columnar'（向量化列式引擎，默认）或 'legacy'（逐节点构建字典）
+FEATURE_ENGINE = os.environ.get('FEATURE_ENGINE', 'columnar')
+
+# 已训练模型的磁盘注册表（LRU 淘汰，上限可通过环境变量配置）
+MODEL_REGISTRY = ModelRegistry(
+    os.environ.get('MODEL_REGISTRY_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_registry')),
+    max_entries=int(os.environ.get('MODEL_REGISTRY_MAX_ENTRIES', 16))
+)
+
+# 1. 数据加载与预处理（过滤未来数据）
+def load_data(filename):
+    with open(filename, 'r') as f:
+        data = json.load(f)
+    
+    # 过滤未来数据
+    for node in data['nodes']:
+        if 'release_date' in node and node['release_date'].isdigit():
+            release_year = int(node['release_date'])
+            if release_year > CURRENT_YEAR:
+                # 清空未来数据
+                node['release_date'] = ""
+                node['notable'] = False
+    
+    return data
+
+# 2. 构建知识图谱
+def build_knowledge_graph(data):
+    G = nx.MultiDiGraph()
+    node_mapping = {}
+    label_mapping = {}
+    
+    for node in data['nodes']:
+        node_id = node['id']
+        node_mapping[node_id] = node
+        node_type = node['Node Type']
+        G.add_node(node_id, **node)
+        
+        if node_type == 'RecordLabel':
+            label_mapping[node_id] = node['name']
+    
+    for edge in data['edges']:
+        source = edge['source']
+        target = edge['target']
+        edge_type = edge['Edge Type']
+        
+        if source in node_mapping and target in node_mapping:
+            G.add_edge(source, target, relationship=edge_type)
+    
+    return G, node_mapping, label_mapping
+
+# 作品参与者倒排索引：作品ID -> 作品属性及 {艺术家ID: [角色]}
+def build_work_participants_index(G):
+    """
+    一次遍历图中的作品节点，建立作品到参与艺术家（演唱/作曲/作词）及其角色的倒排索引。
+    未来年份的作品会被跳过，与 extract_features 的过滤规则保持一致。
+    """
+    work_index = {}
+    role_names = {
+        'PerformerOf': 'performer',
+        'ComposerOf': 'composer',
+        'LyricistOf': 'lyricist'
+    }
+    
+    for node_id, data in G.nodes(data=True):
+        node_type = data.get('Node Type', '')
+        if node_type not in ['Song', 'Album']:
+            continue
+        
+        # 过滤未来年份数据
+        release_date = data.get('release_date')
+        if release_date and release_date.isdigit():
+            release_year = int(release_date)
+            if release_year > CURRENT_YEAR:  # 跳过未来数据
+                continue
+        else:
+            release_year = 0
+        
+        participants = {}
+        for src, _, edge_data in G.in_edges(node_id, data=True):
+            role = role_names.get(edge_data['relationship'])
+            if role is None:
+                continue
+            roles = participants.setdefault(src, [])
+            if role not in roles:
+                roles.append(role)
+        
+        # 角色顺序固定为 performer -> composer -> lyricist
+        for roles in participants.values():
+            roles.sort(key=['performer', 'composer', 'lyricist'].index)
+        
+        work_index[node_id] = {
+            'type': node_type,
+            'notable': data.get('notable', False),
+            'release_year': release_year,
+            'genre': data.get('genre', ''),
+            'participants': participants
+        }
+    
+    return work_index
+
+# 3. 增强特征工程 - 使用动态计算的唱片公司权重
+def extract_features(G, node_mapping, label_mapping, work_index=None):
+    # 作品 -> 参与艺术家及角色的倒排索引（每个图只构建一次，可由调用方传入复用）
+    if work_index is None:
+        work_index = build_work_participants_index(G)
+    
+    # 动态计算唱片公司权重
+    label_stats = defaultdict(lambda: {
+        'artist_count': 0,
+        'total_works': 0,
+        'notable_works': 0,
+        'recent_works': 0
+    })
+    
+    # 构建作品到唱片公司的映射
+    work_to_labels = defaultdict(set)
+    for src, tgt, data in G.edges(data=True):
+        edge_type = data.get('relationship', '')
+        # 处理唱片公司关联边
+        if edge_type in ['RecordedBy', 'DistributedBy']:
+            work_id = src
+            label_id = tgt
+            if (G.nodes.get(work_id, {}).get('Node Type') in ['Song', 'Album'] and 
+                G.nodes.get(label_id, {}).get('Node Type') == 'RecordLabel'):
+                work_to_labels[work_id].add(label_id)
+    
+    # 构建艺术家到唱片公司的映射 - 通过作品间接关联
+    artist_to_labels = defaultdict(set)
+    
+    # 第一轮：通过作品统计唱片公司数据
+    for node_id, data in G.nodes(data=True):
+        node_type = data.get('Node Type', '')
+        
+        # 只处理作品节点
+        if node_type not in ['Song', 'Album']:
+            continue
+        
+        # 过滤未来数据
+        release_date = data.get('release_date', '')
+        if release_date and release_date.isdigit():
+            release_year = int(release_date)
+            if release_year > CURRENT_YEAR:  # 跳过未来数据
+                continue
+        else:
+            release_year = 0
+        
+        notable = data.get('notable', False)
+        is_recent = CURRENT_YEAR - 3 < release_year <= CURRENT_YEAR
+        
+        # 获取作品关联的唱片公司
+        label_ids = work_to_labels.get(node_id, set())
+        
+        # 更新唱片公司统计
+        for label_id in label_ids:
+            label_stats[label_id]['total_works'] += 1
+            if notable:
+                label_stats[label_id]['notable_works'] += 1
+            if is_recent:
+                label_stats[label_id]['recent_works'] += 1
+        
+        # 获取作品关联的艺术家
+        artists = work_index[node_id]['participants'].keys()
+        
+        # 将艺术家与唱片公司关联
+        for artist_id in artists:
+            artist_to_labels[artist_id].update(label_ids)
+    
+    # 第二轮：通过艺术家统计唱片公司数据
+    for artist_id, label_ids in artist_to_labels.items():
+        for label_id in label_ids:
+            label_stats[label_id]['artist_count'] += 1
+    
+    # 第三轮：直接关联统计（确保所有唱片公司都被包含）
+    for node_id, data in G.nodes(data=True):
+        if data.get('Node Type') == 'RecordLabel' and node_id not in label_stats:
+            label_stats[node_id] = {
+                'artist_count': 0,
+                'total_works': 0,
+                'notable_works': 0,
+                'recent_works': 0
+            }
+    
+    # 计算唱片公司权重（仅基于历史数据）
+    LABEL_WEIGHTS = {}
+    
+    # 计算各项指标的最大值（避免除零错误）
+    max_artist = max(1, max(stats['artist_count'] for stats in label_stats.values()))
+    max_works = max(1, max(stats['total_works'] for stats in label_stats.values()))
+    max_notable = max(1, max(stats['notable_works'] for stats in label_stats.values()))
+    max_recent = max(1, max(stats['recent_works'] for stats in label_stats.values()))
+    
+    # 计算每家唱片公司的权重
+    for label_id, stats in label_stats.items():
+        # 标准化各项指标（0-1范围）
+        artist_score = stats['artist_count'] / max_artist
+        works_score = stats['total_works'] / max_works
+        notable_score = stats['notable_works'] / max_notable
+        recent_score = stats['recent_works'] / max_recent
+        
+        # 计算综合权重
+        composite_score = (
+            0.3 * artist_score +
+            0.2 * works_score +
+            0.3 * notable_score +
+            0.2 * recent_score
+        )
+        
+        # 确保权重在合理范围内
+        weight = max(0.4, min(0.95, composite_score))
+        
+        label_name = node_mapping.get(label_id, {}).get('name', f"Label_{label_id}")
+        LABEL_WEIGHTS[label_name] = weight
+    
+    # 设置默认权重
+    LABEL_WEIGHTS["Other"] = 0.5
+    
+    # 打印权重信息
+    print("\n唱片公司权重计算:")
+    print("=" * 70)
+    print(f"{'唱片公司':<25}{'艺术家数':<8}{'作品数':<8}{'上榜作品':<10}{'近期作品':<10}{'权重':<8}")
+    print("-" * 70)
+    for label_name, weight in sorted(LABEL_WEIGHTS.items(), key=lambda x: x[1], reverse=True):
+        if label_name == "Other":
+            continue
+        # 查找对应的统计数据
+        label_stats_entry = next(
+            (stats for label_id, stats in label_stats.items() 
+             if node_mapping.get(label_id, {}).get('name') == label_name),
+            {'artist_count': 0, 'total_works': 0, 'notable_works': 0, 'recent_works': 0}
+        )
+        print(f"{label_name:<25}{label_stats_entry.get('artist_count',0):<8}{label_stats_entry.get('total_works',0):<8}"
+              f"{label_stats_entry.get('notable_works',0):<10}{label_stats_entry.get('recent_works',0):<10}{weight:.4f}")
+    print("=" * 70)
+    
+    # 艺术家特征提取
+    artist_features_dict = {}
+    work_stats = defaultdict(lambda: defaultdict(int))
+    all_works = defaultdict(list)
+    
+    # 收集所有作品信息（过滤未来数据）
+    for work_id, work_entry in work_index.items():
+        notable = work_entry['notable']
+        release_year = work_entry['release_year']
+        genre = work_entry['genre']
+        
+        for artist_id, roles in work_entry['participants'].items():
+            all_works[artist_id].append({
+                'id': work_id,
+                'type': work_entry['type'],
+                'notable': notable,
+                'release_year': release_year,
+                'genre': genre,
+                'roles': list(roles)
+            })
+            
+            # 确保只统计当前及之前年份的数据
+            if 'Oceanus Folk' in genre and release_year <= CURRENT_YEAR:
+                work_stats[artist_id]['oceanus_works'] += 1
+                if notable:
+                    work_stats[artist_id]['oceanus_notable'] += 1
+                if release_year > CURRENT_YEAR - 3 and release_year <= CURRENT_YEAR:
+                    work_stats[artist_id]['oceanus_recent'] += 1
+    
+    # 计算影响力特征
+    for node_id, data in G.nodes(data=True):
+        node_type = data.get('Node Type', '')
+        
+        if node_type == 'Person':
+            features = {
+                'oceanus_works': 0,
+                'oceanus_notable': 0,
+                'oceanus_recent': 0,
+                'total_works': 0,
+                'total_notable': 0,
+                'recent_activity': CURRENT_YEAR,
+                'collab_diversity': 0,
+                'influence_score': 0,
+                'creative_depth': 0,
+                'label_weight': 0,
+                'years_active': 0,
+                'last_release_year': 0,  # 新增：最后发布作品的年份
+                'composer_count': 0,
+                'lyricist_count': 0,
+                'producer_count': 0,
+                'oceanus_ratio': 0.0,
+                'interpolation_count': 0,
+                'lyrical_references': 0,
+                'collaboration_score': 0 
+            }
+            
+            if node_id in work_stats:
+                for k, v in work_stats[node_id].items():
+                    features[k] = v
+            
+            artist_works = all_works.get(node_id, [])
+            features['total_works'] = len(artist_works)
+            
+            collaborators = set()
+            labels_worked_with = set()
+            earliest_year = CURRENT_YEAR
+            latest_year = 0
+            notable_count = 0
+            composer_count = 0
+            lyricist_count = 0
+            producer_count = 0
+            
+            for work in artist_works:
+                release_year = work['release_year']
+                # 确保只使用有效历史数据
+                if release_year > 0 and release_year <= CURRENT_YEAR:
+                    earliest_year = min(earliest_year, release_year)
+                    latest_year = max(latest_year, release_year)
+                    # 封顶到当前年份
+                    features['last_release_year'] = max(features['last_release_year'], min(release_year, CURRENT_YEAR))
+                
+                if work['notable']:
+                    notable_count += 1
+                
+                if 'composer' in work['roles']:
+                    composer_count += 1
+                if 'lyricist' in work['roles']:
+                    lyricist_count += 1
+                
+                # 通过倒排索引直接取得同一作品的其他参与者
+                for other_artist in work_index[work['id']]['participants']:
+                    if other_artist != node_id:
+                        collaborators.add(other_artist)
+                        # 计算协作强度
+                        features['collaboration_score'] += 1
+                
+                # 处理作品关联的唱片公司
+                for _, label_id, e_data in G.in_edges(work['id'], data=True):
+                    if e_data['relationship'] in ['RecordedBy', 'DistributedBy']:
+                        label_name = node_mapping.get(label_id, {}).get('name', "Other")
+                        labels_worked_with.add(label_name)
+            
+            features['total_notable'] = notable_count
+            features['composer_count'] = composer_count
+            features['lyricist_count'] = lyricist_count
+            features['collab_diversity'] = len(collaborators)
+            # 确保活跃年限计算有效
+            if latest_year > 0 and earliest_year <= CURRENT_YEAR:
+                features['years_active'] = min(latest_year, CURRENT_YEAR) - min(earliest_year, CURRENT_YEAR)
+            else:
+                features['years_active'] = 0
+            
+            # 确保最近活动时间有效
+            if latest_year > 0 and latest_year <= CURRENT_YEAR:
+                features['recent_activity'] = CURRENT_YEAR - latest_year
+                features['last_release_year'] = latest_year  # 记录最后发布年份
+            else:
+                features['recent_activity'] = CURRENT_YEAR
+                features['last_release_year'] = 0
+            
+            label_weight_sum = 0
+            for label in labels_worked_with:
+                label_weight_sum += LABEL_WEIGHTS.get(label, LABEL_WEIGHTS['Other'])
+            features['label_weight'] = label_weight_sum / max(1, len(labels_worked_with)) if labels_worked_with else 0
+            
+            # 计算影响力评分 - 包含所有关系类型
+            influence_score = 0
+            influence_relations = [
+                'InStyleOf', 'CoverOf', 'DirectlySamples',
+                'InterpolatesFrom', 'LyricalReferenceTo'
+            ]
+            
+            for work in artist_works:
+                # 只考虑当前及之前年份的影响力
+                if work['release_year'] > CURRENT_YEAR:
+                    continue
+                    
+                # 作品被其他作品影响
+                for _, _, edge_data in G.in_edges(work['id'], data=True):
+                    if edge_data['relationship'] in influence_relations:
+                        influence_score += 0.5  # 被动影响力
+                    
+                # 作品影响其他作品
+                for _, _, edge_data in G.out_edges(work['id'], data=True):
+                    if edge_data['relationship'] in influence_relations:
+                        influence_score += 1.0  # 主动影响力
+                        
+                    # 特定关系类型计数
+                    if edge_data['relationship'] == 'InterpolatesFrom':
+                        features['interpolation_count'] += 1
+                    elif edge_data['relationship'] == 'LyricalReferenceTo':
+                        features['lyrical_references'] += 1
+            
+            # 艺术家被直接引用
+            for src, _, edge_data in G.in_edges(node_id, data=True):
+                if edge_data['relationship'] in influence_relations:
+                    influence_score += 2.0  # 直接影响力
+            
+            influence_score += features['total_notable'] * 0.5
+            influence_score += features['oceanus_notable'] * 1.0
+            
+            features['influence_score'] = influence_score
+            
+            # 制作人角色统计
+            for _, _, edge_data in G.out_edges(node_id, data=True):
+                if edge_data['relationship'] == 'ProducerOf':
+                    producer_count += 1
+            features['producer_count'] = producer_count
+            
+            # 乐队成员关系统计
+            band_members = set()
+            for _, tgt, edge_data in G.in_edges(node_id, data=True):
+                if edge_data['relationship'] == 'MemberOf':
+                    band_members.add(tgt)
+            for src, _, edge_data in G.out_edges(node_id, data=True):
+                if edge_data['relationship'] == 'MemberOf':
+                    band_members.add(src)
+            features['band_members'] = len(band_members)
+            
+            # 创作深度计算
+            creative_works = composer_count + lyricist_count + features['interpolation_count'] + features['lyrical_references']
+            features['creative_depth'] = creative_works / max(1, features['total_works']) if features['total_works'] > 0 else 0
+            
+            oceanus_works = features.get('oceanus_works', 0)
+            features['oceanus_ratio'] = oceanus_works / max(1, features['total_works']) if features['total_works'] > 0 else 0
+            
+            artist_features_dict[node_id] = features
+    
+    return artist_features_dict
+
+# 按配置选择特征提取引擎，两者返回形状相同的 artist_features_dict
+def extract_artist_features(G, node_mapping, label_mapping):
+    if FEATURE_ENGINE == 'legacy':
+        return extract_features(G, node_mapping, label_mapping)
+    return extract_features_columnar(G, CURRENT_YEAR).to_features_dict()
+
+# 4. 自定义权重优化器类（符合scikit-learn接口）
+class WeightOptimizer(BaseEstimator, RegressorMixin):
+    def __init__(self, weights=None):
+        self.weights = weights if weights is not None else [0.20, 0.18, 0.15, 0.15, 0.12, 0.10, 0.05, 0.05]
+    
+    def fit(self, X, y):
+        # 不需要实际训练，权重已由网格搜索提供
+        return self
+    
+    def predict(self, X):
+        return np.sum(X * self.weights, axis=1)
+    
+    def score(self, X, y):
+        predictions = self.predict(X)
+        return -mean_squared_error(y, predictions)  # 负MSE，越大越好
+    
+    def get_params(self, deep=True):
+        return {"weights": self.weights}
+    
+    def set_params(self, **params):
+        if "weights" in params:
+            self.weights = params["weights"]
+        return self
+
+# 5. 网格搜索优化权重系数（修改为接受用户权重偏好）
+# 默认权重排序（如果用户未提供）
+DEFAULT_WEIGHT_PREFS = [
+    'influence_score',
+    'creative_depth',
+    'label_weight',
+    'producer_count',
+    'oceanus',
+    'collab'
+]
+
+# 潜力评分（训练标签）使用的 8 个特征，顺序即权重向量的顺序
+LABEL_FEATURES = [
+    'influence_score',
+    'creative_depth',
+    'label_weight',
+    'oceanus_recent',
+    'collab_diversity',
+    'producer_count',
+    'oceanus_ratio',
+    'collaboration_score'
+]
+
+# 映射用户偏好到特征索引
+WEIGHT_PREFERENCE_FEATURES = {
+    'influence_score': [0],
+    'creative_depth': [1],
+    'label_weight': [2],
+    'producer_count': [5],
+    'oceanus': [3, 6],  # oceanus_recent 和 oceanus_ratio
+    'collab': [4, 7]    # collab_diversity 和 collaboration_score
+}
+
+def label_feature_matrix(artist_features_dict, artist_ids):
+    """艺术家 x 8 个标签特征的矩阵，潜力评分即该矩阵与权重向量的乘积"""
+    return np.array([
+        [artist_features_dict[artist_id].get(name, 0) for name in LABEL_FEATURES]
+        for artist_id in artist_ids
+    ], dtype=float).reshape(len(artist_ids), len(LABEL_FEATURES))
+
+def _weight_search_inputs(artist_features_dict):
+    """网格搜索的输入：标准化后的标签特征矩阵与按当前公式计算的基准分数（与用户偏好无关）"""
+    features_list = []
+    scores_list = []
+    
+    for artist_id, feat in artist_features_dict.items():
+        features_list.append([
+            feat.get('influence_score', 0),
+            feat.get('creative_depth', 0),
+            feat.get('label_weight', 0),
+            feat.get('oceanus_recent', 0),
+            feat.get('collab_diversity', 0),
+            feat.get('producer_count', 0),
+            feat.get('oceanus_ratio', 0),
+            feat.get('collaboration_score', 0)
+        ])
+        
+        # 使用当前公式计算基准分数
+        base_score = (
+            feat.get('influence_score', 0) * 0.20 +
+            feat.get('creative_depth', 0) * 0.18 +
+            feat.get('label_weight', 0) * 0.15 +
+            feat.get('oceanus_recent', 0) * 0.15 +
+            feat.get('collab_diversity', 0) * 0.12 +
+            feat.get('producer_count', 0) * 0.10 +
+            feat.get('oceanus_ratio', 0) * 0.05 +
+            feat.get('collaboration_score', 0) * 0.05
+        )
+        scores_list.append(base_score)
+    
+    X = np.array(features_list)
+    y = np.array(scores_list)
+    
+    # 标准化特征
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    return X_scaled, y
+
+def weight_candidates(weight_preferences):
+    """根据用户偏好生成参与网格搜索的权重组合（均已归一化）"""
+    feature_mapping = WEIGHT_PREFERENCE_FEATURES
+    
+    # 根据用户偏好生成初始权重矩阵
+    base_weights = [0] * 8
+    weight_values = [0.25, 0.20, 0.18, 0.15, 0.12, 0.10]  # 线性递减权重
+    
+    # 应用用户权重偏好
+    for pref, weight in zip(weight_preferences, weight_values):
+        indices = feature_mapping.get(pref, [])
+        if not indices:
+            continue
+            
+        # 平分权重到组内特征
+        per_feature_weight = weight / len(indices)
+        for idx in indices:
+            base_weights[idx] = per_feature_weight
+    
+    # 生成权重调整版本
+    candidates = [base_weights]  # 包含用户偏好的基础权重
+    
+    # 创建5个更聚焦的调整版本
+    # 1. 放大用户最关注的特征
+    top_focus = [0] * 8
+    for idx in feature_mapping[weight_preferences[0]]:
+        top_focus[idx] = 0.15  # 显著增加最关注特征的权重
+    candidates.append([
+        min(0.3, max(0.01, base_weights[i] + top_focus[i]))
+        for i in range(8)
+    ])
+    
+    # 2. 缩小用户最不关注的特征
+    bottom_focus = [0] * 8
+    for idx in feature_mapping[weight_preferences[-1]]:
+        bottom_focus[idx] = -0.1  # 显著减少最不关注特征的权重
+    candidates.append([
+        min(0.3, max(0.01, base_weights[i] + bottom_focus[i]))
+        for i in range(8)
+    ])
+    
+    # 3. 放大前两个关注特征
+    top2_focus = [0] * 8
+    for pref in weight_preferences[:2]:
+        for idx in feature_mapping.get(pref, []):
+            top2_focus[idx] = 0.08  # 增加关注特征的权重
+    candidates.append([
+        min(0.3, max(0.01, base_weights[i] + top2_focus[i]))
+        for i in range(8)
+    ])
+    
+    # 4. 缩小后两个关注特征
+    bottom2_focus = [0] * 8
+    for pref in weight_preferences[-2:]:
+        for idx in feature_mapping.get(pref, []):
+            bottom2_focus[idx] = -0.06  # 减少不太关注特征的权重
+    candidates.append([
+        min(0.3, max(0.01, base_weights[i] + bottom2_focus[i]))
+        for i in range(8)
+    ])
+    
+    # 5. 平均权重作为参考
+    candidates.append([0.125, 0.125, 0.125, 0.125, 0.125, 0.125, 0.125, 0.125])
+    
+    # 归一化所有权重组合
+    normalized_weights = []
+    for weight_list in candidates:
+        total = sum(weight_list)
+        normalized = [w / total for w in weight_list]
+        normalized_weights.append(normalized)
+    return normalized_weights
+
+def _shap_weights(X_scaled, y):
+    """线性模型的 SHAP 特征重要性（归一化），与用户偏好无关"""
+    model = LinearRegression()
+    model.fit(X_scaled, y)
+    explainer = shap.Explainer(model, X_scaled)
+    shap_values = explainer(X_scaled)
+    
+    shap_importances = np.abs(shap_values.values).mean(axis=0)
+    total_shap = sum(shap_importances)
+    shap_weights = shap_importances / total_shap
+    
+    print("\nSHAP特征重要性:")
+    for i, name in enumerate(LABEL_FEATURES):
+        print(f"{name}: {shap_weights[i]:.4f}")
+    return shap_weights
+
+def _combine_weights(best_weights, shap_weights):
+    # 结合网格搜索和SHAP结果
+    final_weights = [
+        0.8 * best_weights[i] + 0.2 * shap_weights[i]
+        for i in range(len(best_weights))
+    ]
+    
+    # 归一化确保权重和为1
+    total = sum(final_weights)
+    final_weights = [w / total for w in final_weights]
+    
+    print("\n优化后最终权重:")
+    for i, name in enumerate(LABEL_FEATURES):
+        print(f"{name}: {final_weights[i]:.4f}")
+    
+    return final_weights
+
+def optimize_weights(artist_features_dict, weight_preferences=None):
+    # 如果用户未提供权重偏好，使用默认值
+    if weight_preferences is None:
+        weight_preferences = DEFAULT_WEIGHT_PREFS
+    
+    # 准备数据
+    X_scaled, y = _weight_search_inputs(artist_features_dict)
+    param_grid = {'weights': weight_candidates(weight_preferences)}
+    
+    # 网格搜索
+    grid_search = GridSearchCV(
+        WeightOptimizer(),
+        param_grid,
+        scoring='neg_mean_squared_error',
+        cv=5,
+        refit=True
+    )
+    
+    grid_search.fit(X_scaled, y)
+    
+    # 获取最佳权重
+    best_weights = grid_search.best_params_['weights']
+    print(f"网格搜索完成，最佳权重: {best_weights}")
+    print(f"最佳分数: {-grid_search.best_score_:.4f}")
+    
+    # 使用SHAP分析特征重要性（保持不变）
+    return _combine_weights(best_weights, _shap_weights(X_scaled, y))
+
+# 6. 异构图神经网络模型
+class HeteroArtistPredictor(nn.Module):
+    def __init__(self, input_dim_artist, input_dim_work, hidden_dim):
+        super(HeteroArtistPredictor, self).__init__()
+        
+        # 艺术家特征编码
+        self.artist_encoder = nn.Sequential(
+            nn.Linear(input_dim_artist, hidden_dim),
+            nn.ReLU(),
+            nn.Linear(hidden_dim, hidden_dim)
+        )
+        
+        # 作品特征编码
+        self.work_encoder = nn.Sequential(
+            nn.Linear(input_dim_work, hidden_dim),
+            nn.ReLU(),
+            nn.Linear(hidden_dim, hidden_dim)
+        )
+        
+        # 创作关系图卷积
+        self.creation_conv = GATConv(
+            in_channels=hidden_dim,
+            out_channels=hidden_dim,
+            heads=1,
+            concat=False
+        )
+        
+        # 影响关系图卷积
+        self.influence_conv = GATConv(
+            in_channels=hidden_dim,
+            out_channels=hidden_dim,
+            heads=1,
+            concat=False
+        )
+        
+        # 协作关系图卷积
+        self.collab_conv = GATConv(
+            in_channels=hidden_dim,
+            out_channels=hidden_dim,
+            heads=1,
+            concat=False
+        )
+        
+        # 预测层
+        self.predictor = nn.Sequential(
+            nn.Linear(hidden_dim * 2, 256),
+            nn.ReLU(),
+            nn.Dropout(0.4),
+            nn.Linear(256, 128),
+            nn.ReLU(),
+            nn.Dropout(0.3),
+            nn.Linear(128, 1)
+        )
+
+    def forward(self, data):
+        # 编码节点特征
+        artist_x = self.artist_encoder(data['artist'].x)
+        work_x = self.work_encoder(data['work'].x)
+        
+        # 创作关系传播 (艺术家 -> 作品)
+        if hasattr(data, 'artist_creates_work_edge_index'):
+            work_x = self.creation_conv(
+                (artist_x, work_x),
+                data.artist_creates_work_edge_index
+            )
+            work_x = F.elu(work_x)
+        
+        # 影响关系传播 (作品 -> 作品)
+        if hasattr(data, 'work_influences_work_edge_index'):
+            work_x = self.influence_conv(
+                work_x,
+                data.work_influences_work_edge_index
+            )
+            work_x = F.elu(work_x)
+        
+        # 反向创作关系传播 (作品 -> 艺术家)
+        if hasattr(data, 'work_created_by_artist_edge_index'):
+            artist_x_updated = self.creation_conv(
+                (work_x, artist_x),
+                data.work_created_by_artist_edge_index
+            )
+        else:
+            artist_x_updated = artist_x
+        
+        # 协作关系传播 (艺术家 -> 艺术家)
+        if hasattr(data, 'artist_collaborates_artist_edge_index'):
+            artist_collab = self.collab_conv(
+                artist_x_updated,
+                data.artist_collaborates_artist_edge_index
+            )
+            artist_collab = F.elu(artist_collab)
+        else:
+            artist_collab = artist_x_updated
+        
+        # 合并特征
+        combined = torch.cat([artist_x_updated, artist_collab], dim=1)
+        
+        # 最终预测
+        return self.predictor(combined).squeeze()
+
+# 标准化特征：优先复用已拟合的 scaler，否则拟合后存入 scalers
+def _scale_features(scalers, name, features, width):
+    if not len(features):
+        return np.zeros((0, width))
+    scaler = scalers.get(name)
+    if scaler is None:
+        scaler = StandardScaler().fit(features)
+        scalers[name] = scaler
+    return scaler.transform(features)
+
+# 7. 准备异构图数据
+def prepare_hetero_graph_data(G, artist_features_dict, node_mapping, weights, scalers=None):
+    """
+    scalers: 可选的 {'artist': StandardScaler, 'work': StandardScaler} 字典。
+    传入已拟合的 scaler 时直接复用（如从模型注册表恢复），否则拟合新的 scaler 并写回该字典。
+    """
+    if scalers is None:
+        scalers = {}
+    
+    # 收集艺术家节点 - 只包含最近5年有活动的艺术家
+    artist_nodes = []
+    artist_features_list = []
+    for node_id, data in G.nodes(data=True):
+        if data['Node Type'] == 'Person' and node_id in artist_features_dict:
+            feat = artist_features_dict[node_id]
+            
+            # 检查艺术家是否在最近5年有活动
+            if feat.get('last_release_year', 0) >= CURRENT_YEAR - 5:
+                artist_nodes.append(node_id)
+                artist_features_list.append([
+                    feat.get('oceanus_works', 0),
+                    feat.get('oceanus_notable', 0),
+                    feat.get('oceanus_recent', 0),
+                    feat.get('total_works', 0),
+                    feat.get('total_notable', 0),
+                    feat.get('influence_score', 0),
+                    feat.get('creative_depth', 0),
+                    feat.get('label_weight', 0),
+                    feat.get('composer_count', 0),
+                    feat.get('lyricist_count', 0),
+                    feat.get('producer_count', 0),
+                    feat.get('collab_diversity', 0),
+                    feat.get('oceanus_ratio', 0),
+                    feat.get('interpolation_count', 0),
+                    feat.get('lyrical_references', 0),
+                    feat.get('collaboration_score', 0)
+                ])
+    
+    # 列式快照（每个图只构建一次），用于数组化查找
+    columns = get_graph_columns(G)
+    
+    # 收集作品节点
+    work_rows = np.flatnonzero(columns.type_mask('Song', 'Album'))
+    work_nodes = [columns.node_ids[i] for i in work_rows]
+    # 过滤未来作品：未来年份或无效日期记为0
+    release_years = np.where(
+        columns.has_year & (columns.year <= CURRENT_YEAR), columns.year, 0
+    )[work_rows]
+    work_features_list = np.column_stack([
+        columns.notable[work_rows].astype(int),
+        release_years,
+        columns.genre_contains('Oceanus Folk')[work_rows].astype(int)
+    ]) if len(work_rows) else []
+    
+    # 标准化特征
+    artist_features_scaled = _scale_features(scalers, 'artist', artist_features_list, 16)
+    work_features_scaled = _scale_features(scalers, 'work', work_features_list, 3)
+    
+    # 创建异构图数据对象
+    data = HeteroData()
+    
+    # 添加节点
+    data['artist'].x = torch.tensor(artist_features_scaled, dtype=torch.float)
+    data['artist'].node_id = artist_nodes
+    data['work'].x = torch.tensor(work_features_scaled, dtype=torch.float)
+    data['work'].node_id = work_nodes
+    
+    # 节点在列式快照中的行号 -> 艺术家/作品下标的查找表（-1 表示不在集合中）
+    artist_lut = np.full(columns.num_nodes, -1, dtype=np.int64)
+    artist_lut[[columns.id_to_index[n] for n in artist_nodes]] = np.arange(len(artist_nodes))
+    work_lut = np.full(columns.num_nodes, -1, dtype=np.int64)
+    work_lut[work_rows] = np.arange(len(work_rows))
+    
+    def lookup_edges(src_lut, dst_lut, *relations):
+        """按关系类型取边，并一次性映射为两端节点的下标（保持原始边顺序）"""
+        src, dst = columns.edges(*relations)
+        src_idx, dst_idx = src_lut[src], dst_lut[dst]
+        keep = (src_idx >= 0) & (dst_idx >= 0)
+        return src_idx[keep], dst_idx[keep]
+    
+    # 添加边索引
+    # 协作关系 (艺术家-艺术家)，每条边正反两个方向交替排列
+    member_src, member_dst = lookup_edges(artist_lut, artist_lut, 'MemberOf')
+    if len(member_src):
+        collab_edge_index = np.empty((2, 2 * len(member_src)), dtype=np.int64)
+        collab_edge_index[0, 0::2] = member_src
+        collab_edge_index[1, 0::2] = member_dst
+        collab_edge_index[0, 1::2] = member_dst
+        collab_edge_index[1, 1::2] = member_src
+        setattr(data, 'artist_collaborates_artist_edge_index', torch.from_numpy(collab_edge_index))
+    
+    # 影响关系 (作品-作品)
+    influence_relations = [
+        'InStyleOf', 'CoverOf', 'DirectlySamples',
+        'InterpolatesFrom', 'LyricalReferenceTo'
+    ]
+    influence_src, influence_dst = lookup_edges(work_lut, work_lut, *influence_relations)
+    if len(influence_src):
+        influence_edge_index = torch.from_numpy(np.vstack([influence_src, influence_dst]))
+        setattr(data, 'work_influences_work_edge_index', influence_edge_index)
+    
+    # 创作关系 (艺术家-作品)
+    artist_idx, work_idx = lookup_edges(artist_lut, work_lut, 'PerformerOf', 'ComposerOf', 'LyricistOf')
+    if len(artist_idx):
+        creates_edge_index = torch.from_numpy(np.vstack([artist_idx, work_idx]))
+        setattr(data, 'artist_creates_work_edge_index', creates_edge_index)
+        
+        created_by_edge_index = torch.from_numpy(np.vstack([work_idx, artist_idx]))
+        setattr(data, 'work_created_by_artist_edge_index', created_by_edge_index)
+    
+    # 使用优化后的权重计算标签
+    labels = []
+    for artist_id in artist_nodes:
+        feat = artist_features_dict[artist_id]
+        # 使用后的权重计算潜力评分
+        score = (
+            feat.get('influence_score', 0) * weights[0] +
+            feat.get('creative_depth', 0) * weights[1] +
+            feat.get('label_weight', 0) * weights[2] +
+            feat.get('oceanus_recent', 0) * weights[3] +
+            feat.get('collab_diversity', 0) * weights[4] +
+            feat.get('producer_count', 0) * weights[5] +
+            feat.get('oceanus_ratio', 0) * weights[6] +
+            feat.get('collaboration_score', 0) * weights[7]
+        )
+        labels.append(score)
+    
+    data['artist'].y = torch.tensor(labels, dtype=torch.float) if labels else torch.zeros(0, dtype=torch.float)
+    
+    return data
+
+# 8. 训练与预测 (基于训练损失早停)
+MODEL_HIDDEN_DIM = 64
+
+def build_model(data):
+    return HeteroArtistPredictor(
+        input_dim_artist=data['artist'].x.size(1),
+        input_dim_work=data['work'].x.size(1),
+        hidden_dim=MODEL_HIDDEN_DIM
+    )
+
+def train_model(data, progress=None):
+    model = build_model(data)
+    
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.001, weight_decay=1e-4)
+    criterion = nn.MSELoss()
+    
+    # 早停法参数 - 基于训练损失
+    patience = 50  # 连续多少个epoch损失无改善则停止
+    min_delta = 0.001  # 视为改善的最小变化量
+    best_loss = float('inf')
+    patience_counter = 0
+    best_model_state = None
+    
+    model.train()
+    losses = []
+    max_epochs = 1000
+    
+    for epoch in range(max_epochs):
+        # 每10个epoch上报一次训练进度
+        if progress is not None and epoch % 10 == 0:
+            progress('training', epoch, max_epochs)
+        
+        optimizer.zero_grad()
+        out = model(data)
+        
+        if data['artist'].y.numel() > 0:
+            loss = criterion(out, data['artist'].y)
+            loss.backward()
+            optimizer.step()
+            losses.append(loss.item())
+            
+            # 早停法检查 - 基于训练损失
+            if loss.item() < best_loss - min_delta:
+                best_loss = loss.item()
+                patience_counter = 0
+                # 保存最佳模型状态
+                best_model_state = model.state_dict().copy()
+            else:
+                patience_counter += 1
+                
+            if patience_counter >= patience:
+                print(f'早停在epoch {epoch}: 训练损失连续{patience}个epoch未改善')
+                # 恢复最佳模型状态
+                model.load_state_dict(best_model_state)
+                break
+        else:
+            # 如果没有标签数据，无法计算损失，跳过训练
+            print("无有效标签数据，跳过训练")
+            break
+        
+        if epoch % 50 == 0:
+            loss_value = loss.item() if 'loss' in locals() else float('nan')
+            print(f'Epoch {epoch}, Loss: {loss_value:.4f}')
+    
+    return model
+
+def predict_with_model(model, data, node_mapping, artist_features_dict):
+    if data['artist'].num_nodes == 0:
+        return []
+    
+    model.eval()
+    with torch.no_grad():
+        if data['artist'].x.size(0) > 0:
+            raw_predictions = model(data)
+            predictions = torch.sigmoid(raw_predictions)
+        else:
+            predictions = torch.tensor([])
+    
+    results = []
+    for i in range(data['artist'].num_nodes):
+        artist_id = data['artist'].node_id[i]
+        artist_data = node_mapping.get(artist_id, {'name': 'Unknown', 'stage_name': 'Unknown'})
+        
+        name = artist_data.get('stage_name', artist_data.get('name', 'Unknown'))
+        feat = artist_features_dict.get(artist_id, {})
+        
+        # 双重验证：只包含最近5年有活动的艺术家
+        if feat.get('last_release_year', 0) < CURRENT_YEAR - 5:
+            continue
+        
+        probability = predictions[i].item() if predictions.numel() > 1 else (predictions.item() if predictions.numel() == 1 else 0.0)
+        
+        results.append({
+            'id': artist_id,
+            'name': name,
+            'probability': probability,
+            'features': feat
+        })
+    
+    results.sort(key=lambda x: x['probability'], reverse=True)
+    return results
+
+def fine_tune_model(data, model_state, epochs):
+    """从已训练模型的参数出发，按当前标签继续训练固定的少量 epoch（不做早停）"""
+    model = build_model(data)
+    model.load_state_dict(model_state)
+    if data['artist'].y.numel() == 0:
+        return model
+    
+    optimizer = torch.optim.Adam(model.parameters(), lr=0.001, weight_decay=1e-4)
+    criterion = nn.MSELoss()
+    model.train()
+    for _ in range(epochs):
+        optimizer.zero_grad()
+        loss = criterion(model(data), data['artist'].y)
+        loss.backward()
+        optimizer.step()
+    return model
+
+def train_and_predict(data, node_mapping, artist_features_dict):
+    if data['artist'].num_nodes == 0:
+        return []
+    
+    model = train_model(data)
+    return predict_with_model(model, data, node_mapping, artist_features_dict)
+
+# 9. 完整预测流程：构建图谱 -> 特征 -> 权重优化 -> 训练/复用模型 -> 生成报告
+PREDICTION_STAGES = ['features', 'weight_optimization', 'graph_build', 'training', 'inference']
+
+def prediction_key(graph_data, weight_preferences, graph_hash=None):
+    """预测请求的唯一键：同时用作模型注册表键和异步任务去重键"""
+    if graph_hash is None:
+        graph_hash = graph_content_hash(graph_data)
+    return MODEL_REGISTRY.make_key(graph_hash, weight_preferences, current_year=CURRENT_YEAR)
+
+def run_prediction(graph_data, weight_preferences=None, progress=None, registry_key=None):
+    """progress: 可选回调 progress(stage, current=None, total=None)，用于按阶段上报进度"""
+    if progress is None:
+        progress = lambda stage, current=None, total=None: None
+    
+    # 使用接收到的数据构建图谱
+    progress('features')
+    G, node_mapping, label_mapping = build_knowledge_graph(graph_data)
+    
+    # 特征提取
+    artist_features_dict = extract_artist_features(G, node_mapping, label_mapping)
+    
+    # 查询模型注册表：同一图内容 + 同一权重偏好直接复用已训练模型
+    if registry_key is None:
+        registry_key = prediction_key(graph_data, weight_preferences)
+    entry = MODEL_REGISTRY.load(registry_key)
+    
+    if entry is not None:
+        logger.info(f"模型注册表命中 {registry_key[:12]}，跳过权重优化与训练")
+        optimized_weights = entry['weights']
+        progress('graph_build')
+        hetero_data = prepare_hetero_graph_data(
+            G, artist_features_dict, node_mapping, optimized_weights, scalers=entry['scalers']
+        )
+        model = build_model(hetero_data)
+        model.load_state_dict(entry['model_state'])
+    else:
+        # 优化权重（传入用户偏好）
+        progress('weight_optimization')
+        optimized_weights = optimize_weights(artist_features_dict, weight_preferences)
+        
+        # 准备图数据
+        progress('graph_build')
+        scalers = {}
+        hetero_data = prepare_hetero_graph_data(
+            G, artist_features_dict, node_mapping, optimized_weights, scalers=scalers
+        )
+        
+        # 训练并写入注册表
+        model = None
+        if hetero_data['artist'].num_nodes > 0:
+            model = train_model(hetero_data, progress=progress)
+            MODEL_REGISTRY.save(
+                registry_key, model.state_dict(),
+                weights=optimized_weights, scalers=scalers
+            )
+    
+    # 预测
+    progress('inference')
+    results = predict_with_model(model, hetero_data, node_mapping, artist_features_dict) if model is not None else []
+    return build_prediction_report(results, artist_features_dict, label_mapping)
+
+def build_prediction_report(results, artist_features_dict, label_mapping):
+    """由按概率排序的预测结果生成报告（前五名、趋势、未来之星、雷达图数据）"""
+    # 准备返回结果
+    top_artists = []
+    for artist in results[:5]:
+        features = artist.get('features', {})
+        top_artists.append({
+            'id': artist['id'],
+            'name': artist['name'],
+            'probability': artist['probability'],
+            'last_active': features.get('last_release_year', '未知'),
+            'oceanus_works': features.get('oceanus_works', 0),
+            'notable_works': features.get('total_notable', 0),
+            'influence_score': features.get('influence_score', 0),
+            'creative_depth': features.get('creative_depth', 0),
+            'features': features
+        })
+    
+    # 生成报告
+    creativity_scores = [a['features'].get('creative_depth', 0) for a in results]
+    avg_creativity = np.mean(creativity_scores) if creativity_scores else 0
+    
+    top_companies = list(label_mapping.values())[:3] if label_mapping else ["无唱片公司数据"]
+    
+    # 准备未来之星数据
+    predicted_stars = []
+    for artist in results[:3]:
+        feat = artist.get('features', {})
+        strengths = []
+        if feat.get('composer_count', 0) > 0:
+            strengths.append(f"作曲作品: {feat['composer_count']}")
+        if feat.get('lyricist_count', 0) > 0:
+            strengths.append(f"作词作品: {feat['lyricist_count']}")
+        if feat.get('producer_count', 0) > 0:
+            strengths.append(f"制作经验: {feat['producer_count']}")
+        
+        risk_factors = []
+        if 'recent_activity' in feat:
+            risk_factors.append(f"最近活动: {feat['recent_activity']}年前")
+        if 'collab_diversity' in feat:
+            risk_factors.append(f"合作多样性: {feat['collab_diversity']}")
+        
+        predicted_stars.append({
+            'name': artist['name'],
+            'probability': round(artist['probability'], 4),
+            'strengths': strengths,
+            'risk_factors': risk_factors
+        })
+    
+    # 准备雷达图数据
+    radar_dimensions = {
+        'influence_score': '影响力',
+        'creative_depth': '创作深度',
+        'collab_diversity': '合作多样性',
+        'oceanus_works': 'Oceanus作品',
+        'total_notable': '知名作品',
+        'collaboration_score': '协作强度'
+    }
+    
+    radar_data = []
+    for artist in results[:3]:
+        feat = artist['features']
+        radar_values = {}
+        # 预计算每个维度的最大值（排除creative_depth）
+        max_values = {}
+        for dim in radar_dimensions.keys():
+            if dim == 'creative_depth': 
+                continue  # creative_depth不需要最大值
+            # 获取该维度在所有特征中的最大值（至少为1）
+            max_val = max(1, max(feat.get(dim, 0) for feat in artist_features_dict.values()))
+            max_values[dim] = max_val
+
+        # 计算每个维度的标准化值 (50-100)
+        radar_values = {}
+        for dim, dim_name in radar_dimensions.items():
+            value = feat.get(dim, 0)
+            
+            if dim == 'influence_score':
+                # 使用预计算的最大值归一化
+                normalized = min(value / max_values[dim] * 100, 100)
+            elif dim == 'creative_depth':
+                normalized = value * 100  # 0-1 -> 0-100
+            else:
+                # 使用预计算的最大值归一化
+                normalized = min(value / max_values[dim] * 100, 100)
+            
+            # 关键变换：映射到50-100范围
+            scaled_value = 50 + normalized * 0.5
+            radar_values[dim_name] = round(scaled_value, 1)          
+        
+        radar_data.append({
+            'name': artist['name'],
+            'data': radar_values
+        })
+
+    report = {
+        "top_artists": top_artists,
+        "trends": {
+            "top_companies": top_companies,
+            "avg_creativity": round(avg_creativity, 2),
+            "active_artists": len(results)
+        },
+        "predicted_stars": predicted_stars,
+        "radar_data": radar_data  # 包含三位艺术家的雷达图数据
+    }
+    print(radar_data)
+    return report
+
+# 10. 快速重新评分：拖动/重排 weightPreferences 时的交互路径
+# 标签只是 8 个特征与权重的点积，因此按图缓存特征矩阵、网格搜索输入、SHAP 权重与基础模型，
+# 偏好变化时只需重新选择权重（numpy 计算交叉验证分数）、一次矩阵-向量乘积得到新标签，
+# 再从基础模型微调少量 epoch。结果是完整流程的近似，不写入模型注册表。
+FAST_FINE_TUNE_EPOCHS = int(os.environ.get('FAST_FINE_TUNE_EPOCHS', 20))
+SCORING_CACHE_SIZE = int(os.environ.get('SCORING_CACHE_SIZE', 2))
+WEIGHT_SEARCH_FOLDS = 5  # 与 optimize_weights 中 GridSearchCV 的 cv 一致
+
+class ScoringContext:
+    """某个图版本的快速评分缓存：图谱、特征、网格搜索输入、异构图数据与基础模型参数"""
+
+    def __init__(self, graph_data, graph_hash, progress):
+        progress('features')
+        self.G, self.node_mapping, self.label_mapping = build_knowledge_graph(graph_data)
+        self.artist_features_dict = extract_artist_features(self.G, self.node_mapping, self.label_mapping)
+        
+        # 与偏好无关的网格搜索输入与 SHAP 权重只计算一次
+        progress('weight_optimization')
+        self.X_scaled, self.y = _weight_search_inputs(self.artist_features_dict)
+        self.folds = [test for _, test in KFold(n_splits=WEIGHT_SEARCH_FOLDS).split(self.X_scaled)]
+        self.shap_weights = _shap_weights(self.X_scaled, self.y)
+        
+        # 基础模型：默认偏好的注册表条目；不存在时完整训练一次并写入注册表
+        base_key = prediction_key(graph_data, DEFAULT_WEIGHT_PREFS, graph_hash=graph_hash)
+        entry = MODEL_REGISTRY.load(base_key)
+        progress('graph_build')
+        if entry is not None:
+            self.data = prepare_hetero_graph_data(
+                self.G, self.artist_features_dict, self.node_mapping, entry['weights'], scalers=entry['scalers']
+            )
+            self.base_state = entry['model_state']
+        else:
+            weights = self.select_weights(DEFAULT_WEIGHT_PREFS)
+            scalers = {}
+            self.data = prepare_hetero_graph_data(
+                self.G, self.artist_features_dict, self.node_mapping, weights, scalers=scalers
+            )
+            self.base_state = None
+            if self.data['artist'].num_nodes > 0:
+                self.base_state = train_model(self.data, progress=progress).state_dict()
+                MODEL_REGISTRY.save(base_key, self.base_state, weights=weights, scalers=scalers)
+        self.label_matrix = label_feature_matrix(self.artist_features_dict, self.data['artist'].node_id)
+        # 同一图上的微调共用 self.data，串行执行
+        self.lock = threading.Lock()
+
+    def select_weights(self, weight_preferences):
+        """与 optimize_weights 相同的权重选择（GridSearchCV 的交叉验证改为直接的 numpy 计算）"""
+        candidates = weight_candidates(weight_preferences)
+        mean_scores = [
+            np.mean([
+                -mean_squared_error(self.y[test], np.sum(self.X_scaled[test] * weights, axis=1))
+                for test in self.folds
+            ])
+            for weights in candidates
+        ]
+        return _combine_weights(candidates[int(np.argmax(mean_scores))], self.shap_weights)
+
+    def rescore(self, weight_preferences, epochs):
+        weights = self.select_weights(weight_preferences)
+        with self.lock:
+            self.data['artist'].y = torch.from_numpy(self.label_matrix @ np.asarray(weights, dtype=float)).float()
+            if self.base_state is None:
+                return []
+            model = fine_tune_model(self.data, self.base_state, epochs)
+            return predict_with_model(model, self.data, self.node_mapping, self.artist_features_dict)
+
+_SCORING_CONTEXTS = OrderedDict()  # 图哈希 -> Future[ScoringContext]（LRU）
+_SCORING_CONTEXTS_LOCK = threading.Lock()  # 只保护上面的字典，构建缓存时不持有
+
+def scoring_context(graph_data, graph_hash=None, progress=None):
+    """
+    返回图对应的快速评分缓存，第一次使用某个图时构建（包括必要时训练基础模型）。
+    构建在全局锁之外进行：同一个图的并发请求等待同一个 Future，其他已缓存的图不受影响。
+    """
+    if graph_hash is None:
+        graph_hash = graph_content_hash(graph_data)
+    if progress is None:
+        progress = lambda stage, current=None, total=None: None
+    with _SCORING_CONTEXTS_LOCK:
+        future = _SCORING_CONTEXTS.get(graph_hash)
+        builder = future is None
+        if builder:
+            future = _SCORING_CONTEXTS[graph_hash] = Future()
+            while len(_SCORING_CONTEXTS) > SCORING_CACHE_SIZE:
+                _SCORING_CONTEXTS.popitem(last=False)
+        else:
+            _SCORING_CONTEXTS.move_to_end(graph_hash)
+    
+    if builder:
+        try:
+            future.set_result(ScoringContext(graph_data, graph_hash, progress))
+        except BaseException as e:
+            # 构建失败不缓存，下一次请求重新构建
+            with _SCORING_CONTEXTS_LOCK:
+                if _SCORING_CONTEXTS.get(graph_hash) is future:
+                    del _SCORING_CONTEXTS[graph_hash]
+            future.set_exception(e)
+            raise
+    return future.result()
+
+def run_fast_prediction(graph_data, weight_preferences=None, graph_hash=None, epochs=None, progress=None):
+    """快速重新评分，返回与 run_prediction 格式相同的报告"""
+    context = scoring_context(graph_data, graph_hash=graph_hash, progress=progress)
+    results = context.rescore(
+        weight_preferences or DEFAULT_WEIGHT_PREFS, FAST_FINE_TUNE_EPOCHS if epochs is None else epochs
+    )
+    return build_prediction_report(results, context.artist_features_dict, context.label_mapping)
@@ -0,0 +1,196 @@
+# prediction_jobs.py
+"""
+异步预测任务：提交后立即返回任务ID，由有界进程池在后台执行完整预测流程。
+
+- 相同参数（同一去重键）的进行中任务只会执行一次，后续提交直接复用同一任务ID。
+- 工作进程通过共享字典按阶段（特征、权重优化、建图、训练轮次……）上报进度，
+  客户端轮询任务状态即可看到。
+- 工作进程异常退出（如训练时内存不足）会使进程池失效，下一次提交时重新创建进程池。
+"""
+import importlib
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class JobSubmitError(RuntimeError):
+    """任务无法提交到进程池（重新创建进程池后仍然失败）"""
+
+
+class _ProgressReporter:
+    """在工作进程中把阶段进度写入共享字典（可被 pickle 传给子进程）"""
+
+    def __init__(self, store, job_id):
+        self.store = store
+        self.job_id = job_id
+
+    def __call__(self, stage, current=None, total=None):
+        try:
+            self.store[self.job_id] = {
+                'stage': stage,
+                'current': current,
+                'total': total,
+                'updated_at': time.time()
+            }
+        except Exception:
+            # 进度上报失败不应影响预测本身
+            pass
+
+
+def _resolve(run_fn):
+    """'模块:函数' 形式的字符串在工作进程中才导入，主进程无需加载该模块"""
+    if isinstance(run_fn, str):
+        module_name, _, name = run_fn.partition(':')
+        return getattr(importlib.import_module(module_name), name)
+    return run_fn
+
+
+def _run_job(run_fn, progress, args, kwargs):
+    """工作进程入口"""
+    return _resolve(run_fn)(*args, progress=progress, **kwargs)
+
+
+class PredictionJob:
+    def __init__(self, job_id, dedupe_key):
+        self.job_id = job_id
+        self.dedupe_key = dedupe_key
+        self.status = STATUS_QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+
+class PredictionJobManager:
+    """
+    run_fn 必须是模块级函数（可被 pickle）或 '模块:函数' 字符串，签名为 run_fn(*args, progress=callable, **kwargs)。
+    max_workers 为进程池大小；max_finished 为保留的已完成任务数量（超出后淘汰最早完成的任务）。
+    """
+
+    def __init__(self, run_fn, max_workers=2, max_finished=100, start_method='spawn'):
+        self.run_fn = run_fn
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self.start_method = start_method
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._inflight = {}
+        self._executor = None
+        self._manager = None
+        self._progress = None
+
+    def _ensure_started(self):
+        # 进程池与共享字典在第一次提交任务时才创建
+        if self._executor is None:
+            context = multiprocessing.get_context(self.start_method)
+            self._manager = context.Manager()
+            self._progress = self._manager.dict()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    def _restart_executor(self):
+        # 失效的进程池不再接受任务：丢弃后重新创建（共享字典所在的管理进程不受影响）
+        logger.warning("预测进程池已失效，重新创建")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        context = multiprocessing.get_context(self.start_method)
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    def _submit_to_executor(self, job_id, args, kwargs):
+        progress = _ProgressReporter(self._progress, job_id)
+        try:
+            return self._executor.submit(_run_job, self.run_fn, progress, args, kwargs)
+        except BrokenProcessPool:
+            self._restart_executor()
+            return self._executor.submit(_run_job, self.run_fn, progress, args, kwargs)
+
+    def submit(self, dedupe_key, *args, **kwargs):
+        """
+        提交任务，返回 (job_id, 是否复用了进行中的任务)。
+        无法提交时撤销该任务（不会留下一直处于排队状态的去重条目）并抛出 JobSubmitError。
+        """
+        with self._lock:
+            existing = self._inflight.get(dedupe_key)
+            if existing is not None:
+                return existing, True
+
+            self._ensure_started()
+            job_id = uuid.uuid4().hex
+            job = PredictionJob(job_id, dedupe_key)
+            self._jobs[job_id] = job
+            self._inflight[dedupe_key] = job_id
+
+            try:
+                future = self._submit_to_executor(job_id, args, kwargs)
+            except Exception as e:
+                del self._jobs[job_id]
+                del self._inflight[dedupe_key]
+                logger.exception(f"预测任务 {job_id} 提交失败")
+                raise JobSubmitError(str(e)) from e
+        future.add_done_callback(lambda f, job=job: self._on_done(job, f))
+        return job_id, False
+
+    def _on_done(self, job, future):
+        with self._lock:
+            try:
+                job.result = future.result()
+                job.status = STATUS_DONE
+            except Exception as e:
+                logger.exception(f"预测任务 {job.job_id} 失败")
+                job.error = str(e)
+                job.status = STATUS_FAILED
+            job.finished_at = time.time()
+            if self._inflight.get(job.dedupe_key) == job.job_id:
+                del self._inflight[job.dedupe_key]
+            self._prune()
+
+    def _prune(self):
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished_at is not None),
+            key=lambda job: job.finished_at
+        )
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            self._jobs.pop(job.job_id, None)
+            self._progress.pop(job.job_id, None)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """返回任务状态字典；任务不存在时返回 None"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+
+        progress = None
+        try:
+            progress = self._progress.get(job_id)
+        except Exception:
+            pass
+
+        status = job.status
+        if status == STATUS_QUEUED and progress is not None:
+            status = STATUS_RUNNING
+        return {
+            'job_id': job.job_id,
+            'status': status,
+            'progress': dict(progress) if progress else None,
+            'error': job.error,
+            'submitted_at': job.submitted_at,
+            'finished_at': job.finished_at
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._executor = None
@@ -1,12 +1,40 @@
 // src/services/dataService.js
 import * as d3 from 'd3';
 import axios from 'axios';
+import { GRAPH_BINARY_MIMETYPE, decodeGraphBinary } from './graphBinary.js';
+
+export { decodeGraphBinary };
 
 const API_BASE_URL = 'http://localhost:5001/api';
 
+// 图数据接口使用二进制传输格式（通过 Accept 头协商；后端返回 JSON 时同样可以处理）
+const USE_BINARY_GRAPH_TRANSPORT = true;
+
+/**
+ * 以二进制格式（可选）请求图数据接口，并把响应统一解码为 D3 兼容的图数据。
+ * @param {string} url - 接口地址。
+ * @param {object} payload - 请求体。
+ * @returns {Promise<object>} D3兼容的图数据。
+ */
+async function postForGraph(url, payload) {
+  if (!USE_BINARY_GRAPH_TRANSPORT) {
+    const response = await axios.post(url, payload);
+    return response.data;
+  }
+  const response = await axios.post(url, payload, {
+    responseType: 'arraybuffer',
+    headers: { Accept: `${GRAPH_BINARY_MIMETYPE}, application/json;q=0.9` },
+  });
+  const contentType = response.headers['content-type'] || '';
+  if (contentType.includes(GRAPH_BINARY_MIMETYPE)) {
+    return decodeGraphBinary(response.data);
+  }
+  return JSON.parse(new TextDecoder().decode(response.data));
+}
+
 /**
  * @deprecated This function loads the full, unprocessed graph.
- * Use loadYearlyData for better performance.
+ * Use fetchGraphLayout (filtered on the server) for better performance.
  */
 export async function loadData() {
   console.log("loadData 被调用 (deprecated)");
@@ -18,8 +46,7 @@ export async function loadData() {
 export async function fetchGraphLayout(payload) {
   try {
     // 调用后端的 /api/graph/layout 接口
-    const response = await axios.post(`${API_BASE_URL}/graph/layout`, payload);
-    return response.data;
+    return await postForGraph(`${API_BASE_URL}/graph/layout`, payload);
   } catch (error) {
     console.error("获取图布局时出错:", error);
     // 重新抛出错误，以便 store 中的调用函数可以捕获它
@@ -34,8 +61,7 @@ export async function fetchGraphLayout(payload) {
  */
 export async function getFilteredGraphForSankey(payload) {
   try {
-    const response = await axios.post(`${API_BASE_URL}/filter-for-sankey`, payload);
-    return response.data;
+    return await postForGraph(`${API_BASE_URL}/filter-for-sankey`, payload);
   } catch (error)
   {
     console.error("从桑基图交互获取图数据时出错:", error);
@@ -43,6 +69,22 @@ export async function getFilteredGraphForSankey(payload) {
   }
 }
 
+/**
+ * 节点名称自动补全：由后端的名称索引返回按相关度排序的候选节点。
+ * @param {string} query - 搜索词（不区分大小写）。
+ * @param {number} limit - 最多返回的候选数量。
+ * @returns {Promise<Array<{id: number, name: string, type: string}>>} 候选节点列表。
+ */
+export async function searchNodes(query, limit = 10) {
+  try {
+    const response = await axios.get(`${API_BASE_URL}/graph/search`, { params: { q: query, limit } });
+    return response.data.results || [];
+  } catch (error) {
+    console.error("搜索节点时出错:", error);
+    throw error;
+  }
+}
+
 /**
  * 从后端获取可用的筛选选项（流派、节点类型等）。
  * @returns {Promise<object>} 筛选选项数据。
@@ -58,17 +100,6 @@ export async function fetchFilterOptions() {
   }
 }
 
-/**
- * Loads the graph data that has been pre-processed and chunked by year.
- * @returns {Promise<Object>} A promise that resolves to the yearly graph data.
- */
-export async function loadYearlyData() {
-  console.log("Loading pre-processed yearly data...");
-  const yearlyData = await d3.json('/graph_by_year.json');
-  console.log("Yearly data loaded:", yearlyData);
-  return yearlyData;
-}
-
 /**
  * Loads the available filter options (genres, node types, edge types).
  * @returns {Promise<Object>} A promise that resolves to the filter options.
@@ -81,33 +112,97 @@ export async function loadFilterOptions() {
 }
 
 
+const PREDICT_JOBS_URL = 'http://localhost:5001/predict/jobs';
+const PREDICT_POLL_INTERVAL = 1000;
+
+/**
+ * 提交异步预测任务。
+ * @param {object} requestBody - 与 /predict 相同的请求体 { graphData, weightPreferences }
+ * @returns {Promise<object>} 任务状态，包含 job_id
+ */
+export async function submitPredictionJob(requestBody) {
+  const response = await fetch(PREDICT_JOBS_URL, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify(requestBody)
+  });
+
+  if (!response.ok) {
+    const error = new Error(`预测任务提交失败: ${response.status} ${response.statusText}`);
+    // 附带状态码，调用方据此决定是否回退为上传完整图数据
+    error.status = response.status;
+    throw error;
+  }
+  return response.json();
+}
+
+/**
+ * 轮询预测任务直到完成，并返回预测结果。
+ * @param {string} jobId - 任务ID
+ * @param {Function|null} onProgress - 可选回调，参数为任务状态（含 progress.stage/current/total）
+ * @returns {Promise<object>} 预测报告
+ */
+export async function waitForPredictionJob(jobId, onProgress = null) {
+  for (;;) {
+    const response = await fetch(`${PREDICT_JOBS_URL}/${jobId}`);
+    if (!response.ok) {
+      throw new Error(`查询预测任务失败: ${response.status} ${response.statusText}`);
+    }
+    const status = await response.json();
+    if (onProgress) {
+      onProgress(status);
+    }
+
+    if (status.status === 'failed') {
+      throw new Error(status.error || '预测任务失败');
+    }
+    if (status.status === 'done') {
+      const resultResponse = await fetch(`${PREDICT_JOBS_URL}/${jobId}/result`);
+      if (!resultResponse.ok) {
+        throw new Error(`获取预测结果失败: ${resultResponse.status} ${resultResponse.statusText}`);
+      }
+      return resultResponse.json();
+    }
+
+    await new Promise(resolve => setTimeout(resolve, PREDICT_POLL_INTERVAL));
+  }
+}
+
 // 修改函数以接受权重偏好参数
-export async function loadOceanusDataAndPredict(weightPreferences = null) {
+export async function loadOceanusDataAndPredict(weightPreferences = null, onProgress = null) {
   try {
-    console.log("加载 Oceanus 数据...");
-    const oceanusData = await d3.json('/Oceanus.json');
-    console.log("Oceanus 数据加载完成", oceanusData);
-
-    // 构建请求体，包含权重偏好
-    const requestBody = { graphData: oceanusData };
+    // 优先引用后端已有的 Oceanus 数据集，避免上传整张图
+    const refBody = { graphRef: { dataset: 'oceanus' } };
     if (weightPreferences) {
-      requestBody.weightPreferences = weightPreferences;
+      refBody.weightPreferences = weightPreferences;
     }
 
-    // 发送数据到后端进行预测
-    const response = await fetch('http://localhost:5001/predict', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json'
-      },
-      body: JSON.stringify(requestBody)
-    });
+    let job;
+    try {
+      job = await submitPredictionJob(refBody);
+    } catch (refError) {
+      // 只有后端不接受该图引用（400/409）时才回退；预测不可用 (503)、网络错误等上传整张图也无济于事
+      if (![400, 409].includes(refError.status)) {
+        throw refError;
+      }
+      console.warn("后端无法解析图引用，回退为上传完整 Oceanus 数据:", refError);
 
-    if (!response.ok) {
-      throw new Error(`预测请求失败: ${response.status} ${response.statusText}`);
+      console.log("加载 Oceanus 数据...");
+      const oceanusData = await d3.json('/Oceanus.json');
+      console.log("Oceanus 数据加载完成", oceanusData);
+
+      // 构建请求体，包含权重偏好
+      const requestBody = { graphData: oceanusData };
+      if (weightPreferences) {
+        requestBody.weightPreferences = weightPreferences;
+      }
+      job = await submitPredictionJob(requestBody);
     }
 
-    const result = await response.json();
+    // 轮询任务结果（相同的进行中请求由后端合并为同一任务）
+    const result = await waitForPredictionJob(job.job_id, onProgress);
     console.log("预测结果:", result);
     return result;
 
@@ -117,6 +212,29 @@ export async function loadOceanusDataAndPredict(weightPreferences = null) {
   }
 }
 
+const PREDICT_RESCORE_URL = 'http://localhost:5001/predict/rescore';
+
+/**
+ * 调整权重偏好时的快速重新评分：后端复用已缓存的特征矩阵与基础模型，只重新计算标签并微调少量 epoch。
+ * 返回与完整预测相同格式的报告（近似结果，适合交互预览）。
+ * @param {Array<string>} weightPreferences - 按重要性排序的权重因素
+ * @returns {Promise<object>} 预测报告
+ */
+export async function rescoreOceanusPrediction(weightPreferences) {
+  const response = await fetch(PREDICT_RESCORE_URL, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify({ graphRef: { dataset: 'oceanus' }, weightPreferences })
+  });
+
+  if (!response.ok) {
+    throw new Error(`快速重新评分失败: ${response.status} ${response.statusText}`);
+  }
+  return response.json();
+}
+
 //新增艺术家生涯轨迹数据处理函数
 /**
  * 处理艺术家生涯数据
@@ -0,0 +1,113 @@
+// src/services/graphBinary.js
+// 二进制图传输格式的解码器（与后端 graph_binary.py 对应）。
+// 布局（小端序）：'MC1G' | uint32 头部长度 | 头部 JSON | 8 字节对齐 | 各列数据（每列 8 字节对齐）
+// 解码结果与 /api/graph/layout 返回的 D3 JSON 结构相同：{ directed, multigraph, graph, nodes, links }
+
+export const GRAPH_BINARY_MIMETYPE = 'application/vnd.mc1.graph+binary';
+
+const MAGIC = [0x4d, 0x43, 0x31, 0x47]; // 'MC1G'
+const ALIGNMENT = 8;
+
+/**
+ * 判断一段数据是否为二进制图格式。
+ * @param {ArrayBuffer} buffer
+ * @returns {boolean}
+ */
+export function isGraphBinary(buffer) {
+  if (!buffer || buffer.byteLength < 8) return false;
+  const bytes = new Uint8Array(buffer, 0, 4);
+  return MAGIC.every((byte, i) => bytes[i] === byte);
+}
+
+// 按列类型创建读取第 i 行取值的函数（TypedArray 使用平台字节序，主流平台均为小端序）
+function columnReader(buffer, base, column, count, strings) {
+  const offset = base + column.offset;
+  switch (column.kind) {
+    case 'int32': {
+      const values = new Int32Array(buffer, offset, count);
+      return i => values[i];
+    }
+    case 'float64': {
+      const values = new Float64Array(buffer, offset, count);
+      return i => values[i];
+    }
+    case 'bool': {
+      const values = new Uint8Array(buffer, offset, count);
+      return i => values[i] === 1;
+    }
+    case 'dict8':
+    case 'dict16': {
+      const codes = column.kind === 'dict8'
+        ? new Uint8Array(buffer, offset, count)
+        : new Uint16Array(buffer, offset, count);
+      const dictionary = column.dictionary;
+      return i => dictionary[codes[i]];
+    }
+    case 'str': {
+      const indexes = new Int32Array(buffer, offset, count);
+      return i => strings[indexes[i]];
+    }
+    case 'json': {
+      const indexes = new Int32Array(buffer, offset, count);
+      return i => JSON.parse(strings[indexes[i]]);
+    }
+    default:
+      throw new Error(`Unknown binary graph column kind: ${column.kind}`);
+  }
+}
+
+function decodeRows(buffer, base, columns, count, strings) {
+  const readers = columns.map(column => ({
+    name: column.name,
+    read: columnReader(buffer, base, column, count, strings),
+    present: column.present === undefined ? null : new Uint8Array(buffer, base + column.present, count),
+  }));
+
+  const rows = new Array(count);
+  for (let i = 0; i < count; i++) {
+    const row = {};
+    for (const { name, read, present } of readers) {
+      if (present === null || present[i]) {
+        row[name] = read(i);
+      }
+    }
+    rows[i] = row;
+  }
+  return rows;
+}
+
+/**
+ * 解码二进制图格式。
+ * @param {ArrayBuffer|Uint8Array} data - 响应体。
+ * @returns {{directed: boolean, multigraph: boolean, graph: object, nodes: object[], links: object[]}}
+ */
+export function decodeGraphBinary(data) {
+  let bytes = data instanceof Uint8Array ? data : new Uint8Array(data);
+  // TypedArray 视图要求按元素大小对齐，起点未按 8 字节对齐时先复制一份
+  if (bytes.byteOffset % ALIGNMENT !== 0) {
+    bytes = bytes.slice();
+  }
+  const buffer = bytes.buffer;
+  const start = bytes.byteOffset;
+  if (!isGraphBinary(buffer.slice(start, start + 8))) {
+    throw new Error('Not a binary graph payload');
+  }
+
+  const headerLength = new DataView(buffer, start + 4, 4).getUint32(0, true);
+  const header = JSON.parse(new TextDecoder().decode(bytes.subarray(8, 8 + headerLength)));
+  if (header.version !== 1) {
+    throw new Error(`Unsupported binary graph version: ${header.version}`);
+  }
+
+  let base = 8 + headerLength;
+  base += (ALIGNMENT - (base % ALIGNMENT)) % ALIGNMENT;
+  base += start;
+
+  return {
+    directed: header.directed,
+    multigraph: header.multigraph,
+    graph: header.graph,
+    nodes: decodeRows(buffer, base, header.nodes, header.nodeCount, header.strings),
+    links: decodeRows(buffer, base, header.links, header.linkCount, header.strings),
+  };
+}
@@ -6,29 +6,52 @@ export const predictArtists = async (weightPreferences = null) => {
   try {
     const graphStore = useGraphStore();
 
-    // 确保图数据已加载
-    if (!graphStore.nodes.length) {
-      await graphStore.fetchGraphData();
-    }
-
-    // 准备图数据
-    const graphData = {
-      nodes: graphStore.nodes,
-      edges: graphStore.links
+    // 优先只发送图引用，由后端直接使用已加载的图数据
+    const refBody = {
+      graphRef: { dataset: 'full', version: graphStore.graphVersion || undefined }
     };
-
-    // 构建请求体，包含权重偏好
-    const requestBody = { graphData };
     if (weightPreferences) {
-      requestBody.weightPreferences = weightPreferences;
+      refBody.weightPreferences = weightPreferences;
     }
 
-    // 使用代理路径
-    const response = await axios.post('/api/predict', requestBody, {
-      headers: {
-        'Content-Type': 'application/json'
+    let response;
+    try {
+      response = await axios.post('/api/predict', refBody, {
+        headers: {
+          'Content-Type': 'application/json'
+        }
+      });
+    } catch (refError) {
+      // 后端无法解析引用（未加载、版本不一致等）时，回退为上传完整图数据
+      const status = refError.response?.status;
+      if (![400, 409, 503].includes(status)) {
+        throw refError;
+      }
+      console.warn(`图引用不可用 (${status})，回退为上传完整图数据`);
+
+      // 确保图数据已加载
+      if (!graphStore.nodes.length) {
+        await graphStore.fetchGraphData();
       }
-    });
+
+      // 准备图数据
+      const graphData = {
+        nodes: graphStore.nodes,
+        edges: graphStore.links
+      };
+
+      // 构建请求体，包含权重偏好
+      const requestBody = { graphData };
+      if (weightPreferences) {
+        requestBody.weightPreferences = weightPreferences;
+      }
+
+      response = await axios.post('/api/predict', requestBody, {
+        headers: {
+          'Content-Type': 'application/json'
+        }
+      });
+    }
 
     return response.data;
   } catch (error) {
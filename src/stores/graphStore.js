@@ -7,6 +7,7 @@ export const useGraphStore = defineStore('graph', {
     // --- Data from Backend ---
     graphData: { nodes: [], links: [] },
     filterOptions: { genres: [], node_types: [], edge_types: [], node_names: [] },
+    graphVersion: null, // 后端图数据的版本哈希，用于 /predict 的图引用
 
     // --- Filter Criteria ---
     selectedTimeRange: { start: 1981, end: 2040 },
@@ -15,11 +16,13 @@ export const useGraphStore = defineStore('graph', {
     selectedEdgeTypes: [],
     searchQuery: null,
     hopLevel: 1, // 新增：控制网络图的跳数，1或2
+    maxNodes: 1500, // 中心子图的节点预算，超出时后端按度数截断最外层（见 graph.truncated）
 
     // --- UI State ---
     isLoading: false,
     error: null,
     isRequestPending: false,
+    isUpdateQueued: false, // 请求进行中又有新的筛选变化：完成后按最新状态再请求一次
     isInitialized: false,
 
     //新增艺术家生涯轨迹相关状态
@@ -100,6 +103,7 @@ export const useGraphStore = defineStore('graph', {
             this.filterOptions.node_types = options.node_types || [];
             this.filterOptions.edge_types = options.edge_types || [];
             this.filterOptions.node_names = options.node_names || [];
+            this.graphVersion = options.version || null;
         } catch (e) {
             console.error('Failed to load filter options:', e);
             this.error = 'Could not load filter options.';
@@ -111,7 +115,8 @@ export const useGraphStore = defineStore('graph', {
      */
     async updateGraphLayout() {
       if (this.isRequestPending) {
-        console.log("Request is already in progress. Skipping new request.");
+        // 不丢弃新的筛选状态（例如连续调整时间范围）：当前请求完成后只补发一次最新状态的请求
+        this.isUpdateQueued = true;
         return;
       }
 
@@ -122,6 +127,7 @@ export const useGraphStore = defineStore('graph', {
       const payload = {
         centerNodeName: this.searchQuery,
         hopLevel: this.hopLevel, // 新增：将跳数信息发送给后端
+        maxNodes: this.maxNodes,
         filters: {
           nodeTypes: this.selectedNodeTypes.length > 0 ? this.selectedNodeTypes : null,
           edgeTypes: this.selectedEdgeTypes.length > 0 ? this.selectedEdgeTypes : null,
@@ -147,6 +153,11 @@ export const useGraphStore = defineStore('graph', {
         this.isLoading = false;
         this.isRequestPending = false;
       }
+
+      if (this.isUpdateQueued) {
+        this.isUpdateQueued = false;
+        await this.updateGraphLayout();
+      }
     },
 
     /**
@@ -179,7 +190,7 @@ export const useGraphStore = defineStore('graph', {
      */
     debouncedUpdateGraphLayout: debounce(function() {
       this.updateGraphLayout();
-    }, 500),
+    }, 150),
 
     /**
      * Resets the view to the initial state by setting filters and fetching data.
@@ -0,0 +1,30 @@
+# wsgi.py
+"""
+生产环境入口：在主进程中一次性加载图与索引，再由 WSGI 服务器 fork 出多个工作进程，
+各工作进程以写时复制 (copy-on-write) 的方式共享这些内存页。
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+加载完成后调用 gc.freeze()，把已加载的对象移入永久代：工作进程中的垃圾回收不再遍历、
+改写这些对象的 GC 头，避免共享页被逐页复制。引用计数的写入无法完全避免；
+GRAPH_ENGINE=csr 时图数据位于内存映射的 NumPy 数组中，不受引用计数影响，共享效果最好。
+"""
+import gc
+import os
+
+from app import APP_MODE, app, load_graph_data, prediction_module
+
+GRAPH_DATA_PATH = os.environ.get(
+    'GRAPH_DATA_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public', 'graph_processed.json')
+)
+
+with app.app_context():
+    load_graph_data(GRAPH_DATA_PATH)
+
+# 预测流水线默认在各工作进程第一次处理 /predict 时才导入；PRELOAD_PREDICTION=1 时改为在主进程中导入，
+# 由全部工作进程共享（代价是启动更慢、主进程常驻内存更大）
+if APP_MODE != 'query' and os.environ.get('PRELOAD_PREDICTION') == '1':
+    prediction_module()
+
+gc.collect()
+gc.freeze()
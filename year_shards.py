@@ -0,0 +1,84 @@
+# year_shards.py
+"""
+按年份分片的预处理输出（data_preprocessor.py 生成，默认模式与 --streaming 的结果相同）：
+public/graph_by_year/manifest.json 列出各年份分片的文件名、节点/边数、字节数与内容哈希，
+每个分片是一个紧凑 JSON 文件 {"links": [...], "nodes": [节点ID...]}。
+
+服务端按需读取请求的年份并以 NDJSON 流式返回（每行一个年份），不需要把全部年份读入内存；
+清单按文件 mtime 缓存，预处理重新生成分片后自动重新读取。
+"""
+import hashlib
+import json
+import os
+import threading
+
+MANIFEST_FILE = 'manifest.json'
+CHUNK_SIZE = 64 * 1024
+
+
+class YearShards:
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._raw = None
+        self._signature = None
+
+    def manifest(self):
+        """返回 (清单, 清单原始字节)；清单不存在时抛出 FileNotFoundError"""
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if self._signature != signature:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                manifest = json.loads(raw)
+                manifest['_by_year'] = {entry['year']: entry for entry in manifest['years']}
+                self._manifest, self._raw, self._signature = manifest, raw, signature
+            return self._manifest, self._raw
+
+    def select(self, years=None, start=None, end=None):
+        """
+        按年份列表或闭区间 [start, end] 选出清单条目（按年份排序）。
+        列表中出现清单里没有的年份时抛出 KeyError；区间只匹配数字年份。
+        """
+        manifest, _ = self.manifest()
+        by_year = manifest['_by_year']
+        if years is not None:
+            missing = [year for year in years if year not in by_year]
+            if missing:
+                raise KeyError(missing)
+            return [by_year[year] for year in sorted(set(years))]
+        return [
+            entry for entry in manifest['years']
+            if entry['year'].isdigit()
+            and (start is None or int(entry['year']) >= start)
+            and (end is None or int(entry['year']) <= end)
+        ]
+
+    @staticmethod
+    def etag(entries, extra=''):
+        """所选分片内容哈希的组合，extra 用于区分同一组分片的不同表示（如附带节点属性时的图版本）"""
+        digest = hashlib.sha256(extra.encode('utf-8'))
+        for entry in entries:
+            digest.update(f"{entry['year']}:{entry['sha256']}\n".encode('utf-8'))
+        return 'years-' + digest.hexdigest()[:32]
+
+    def _path(self, entry):
+        return os.path.join(self.directory, os.path.basename(entry['file']))
+
+    def iter_ndjson(self, entries):
+        """逐个分片原样转发为 NDJSON 行 {"year": ..., "links": [...], "nodes": [...]}，按块产出字节串"""
+        for entry in entries:
+            yield b'{"year":' + json.dumps(entry['year']).encode('utf-8') + b','
+            with open(self._path(entry), 'rb') as f:
+                f.read(1)  # 分片自身的左花括号，已在上面输出
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    yield chunk
+            yield b'\n'
+
+    def load(self, entry):
+        """解析单个分片"""
+        with open(self._path(entry), 'rb') as f:
+            return json.loads(f.read())